@@ -0,0 +1,65 @@
+"""
+Compares finding runs by a value in the SQLite metadata catalog with reading all their JSON-LD files.
+
+The GROMACS simulation example is replicated to the requested number of runs, each with another 'ppn' value.
+
+    python benchmarks/bench_catalog.py [runs ...]
+"""
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng'))
+from lib.jsonldGenerator import JSONLDGenerator
+from lib.metadataCatalog import MetadataCatalog
+from lib.util import save_json, load_json
+
+EXAMPLE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng', 'simulations', 'gromacs')
+
+
+def prepare(folder: str, runs: int):
+    output_folder = os.path.join(folder, '__output__')
+    os.mkdir(output_folder)
+    shutil.copy(os.path.join(EXAMPLE_FOLDER, '__expected__', 'context.json'), output_folder)
+    extract = load_json(os.path.join(EXAMPLE_FOLDER, '__expected__', 'extract_simulation 1.json'))
+    catalog = MetadataCatalog(os.path.join(folder, 'catalog.db'))
+    insert_time = 0
+    for run in range(runs):
+        name = f'run {run}'
+        metadata = {"ppn: variable": {"has symbol": str(run)}}
+        save_json(metadata, os.path.join(output_folder, f'metadata_{name}.json'))
+        JSONLDGenerator(os.path.join(output_folder, f'metadata_{name}.json'),
+                        os.path.join(output_folder, f'extract_{name}.json')).start(metadata, extract)
+        start = time.perf_counter()
+        catalog.add_run(output_folder, name, "gromacs", extract, metadata)
+        insert_time += time.perf_counter() - start
+    return catalog, insert_time
+
+
+def scan_jsonld(folder: str, value: str):
+    runs = []
+    for file_path in glob.glob(os.path.join(folder, '__output__', 'metadata_*.jsonld')):
+        if any(node.get("has symbol") == value for node in load_json(file_path)["@graph"]):
+            runs.append(os.path.basename(file_path)[len('metadata_'):-len('.jsonld')])
+    return runs
+
+
+if __name__ == '__main__':
+    print(f"{'runs':>8} {'insert (s)':>10} {'catalog (ms)':>13} {'jsonld scan (ms)':>17}")
+    for runs in [int(arg) for arg in sys.argv[1:]] or [100, 1000, 5000]:
+        folder = tempfile.mkdtemp()
+        try:
+            catalog, insert_time = prepare(folder, runs)
+            value = str(runs // 2)
+            start = time.perf_counter()
+            assert len(catalog.find_runs([("has symbol", value)])) == 1
+            catalog_time = time.perf_counter() - start
+            start = time.perf_counter()
+            assert len(scan_jsonld(folder, value)) == 1
+            scan_time = time.perf_counter() - start
+            print(f"{runs:>8} {insert_time:>10.2f} {catalog_time * 1e3:>13.2f} {scan_time * 1e3:>17.1f}")
+        finally:
+            shutil.rmtree(folder)
@@ -0,0 +1,56 @@
+"""
+Compares the size and the generation time of the CSV JSON-LD output in the default layout,
+where every row repeats all constant properties of each column, and in the compact layout,
+where constant properties are emitted once in shared column nodes.
+
+The rows of the CSV simulation example are replicated to the requested number of rows.
+
+    python benchmarks/bench_csv_jsonld.py [rows ...]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng'))
+from lib.jsonldGenerator import JSONLDGenerator
+from lib.util import extract_csv, save_json, load_json
+
+EXAMPLE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng', 'simulations', 'csv')
+
+
+def prepare(folder: str, rows: int):
+    extract = extract_csv(os.path.join(EXAMPLE_FOLDER, 'parking.csv'))
+    example_rows = list(extract['csv_dict']['rows'].values())
+    extract['csv_dict']['rows'] = {str(index): example_rows[index % len(example_rows)] for index in range(rows)}
+    save_json(extract, os.path.join(folder, 'extract_bench.json'))
+    shutil.copy(os.path.join(EXAMPLE_FOLDER, '__expected__', 'context.json'), folder)
+    shutil.copy(os.path.join(EXAMPLE_FOLDER, '__expected__', 'template.json'),
+                os.path.join(folder, 'metadata_bench.json'))
+
+
+def run(folder: str, compact_csv: bool):
+    generator = JSONLDGenerator(os.path.join(folder, 'metadata_bench.json'),
+                                os.path.join(folder, 'extract_bench.json'), compact_csv=compact_csv)
+    start = time.perf_counter()
+    generator.start()
+    write_time = time.perf_counter() - start
+    start = time.perf_counter()
+    load_json(generator.jsonld_file_path)
+    load_time = time.perf_counter() - start
+    return os.path.getsize(generator.jsonld_file_path), write_time, load_time
+
+
+if __name__ == '__main__':
+    print(f"{'rows':>8} {'layout':>8} {'size (MB)':>10} {'write (s)':>10} {'load (s)':>10}")
+    for rows in [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]:
+        folder = tempfile.mkdtemp()
+        try:
+            prepare(folder, rows)
+            for compact_csv in (False, True):
+                size, write_time, load_time = run(folder, compact_csv)
+                layout = 'compact' if compact_csv else 'default'
+                print(f"{rows:>8} {layout:>8} {size / 1e6:>10.2f} {write_time:>10.3f} {load_time:>10.3f}")
+        finally:
+            shutil.rmtree(folder)
@@ -0,0 +1,53 @@
+"""
+Compares the size and the serialisation time of the JSON-LD output of each example simulation with
+its context embedded, and with the context referenced by its URL ("remote") or by the 'context.json'
+file next to it ("file"), as set by 'context_reference' in the config.
+
+    python benchmarks/bench_jsonld_context.py [repeats]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng'))
+from lib.jsonldGenerator import JSONLDGenerator
+
+SIMULATIONS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng', 'simulations')
+EXAMPLES = {
+    'csv': 'parking',
+    'netcdf': 'simulation 1',
+    'open_dihu': 'simulation 1',
+    'gromacs': 'simulation 1',
+}
+
+
+def prepare(folder: str, example: str, run: str):
+    expected_folder = os.path.join(SIMULATIONS_FOLDER, example, '__expected__')
+    for file_name in ('context.json', f'metadata_{run}.json', f'extract_{run}.json'):
+        shutil.copy(os.path.join(expected_folder, file_name), folder)
+
+
+def run(folder: str, run: str, context_reference: str, repeats: int):
+    generator = JSONLDGenerator(os.path.join(folder, f'metadata_{run}.json'),
+                                os.path.join(folder, f'extract_{run}.json'), context_reference=context_reference)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        generator.start()
+    write_time = (time.perf_counter() - start) / repeats
+    return os.path.getsize(generator.jsonld_file_path), write_time
+
+
+if __name__ == '__main__':
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f"{'example':>10} {'context':>8} {'size (kB)':>10} {'write (ms)':>11}")
+    for example, example_run in EXAMPLES.items():
+        folder = tempfile.mkdtemp()
+        try:
+            prepare(folder, example, example_run)
+            for context_reference in ('', 'remote', 'file'):
+                size, write_time = run(folder, example_run, context_reference, repeats)
+                print(f"{example:>10} {context_reference or 'embed':>8} {size / 1e3:>10.1f} {write_time * 1e3:>11.2f}")
+        finally:
+            shutil.rmtree(folder)
@@ -0,0 +1,83 @@
+"""
+Measures the time 'OntologyScraper' takes to scrape an ontology into 'classes.json', and the time of each
+of its SPARQL queries.
+
+Without an ontology path or URL, a synthetic ontology is generated with the requested number of classes,
+arranged in a class hierarchy with object and data properties, named individuals and disjoint classes.
+
+    python benchmarks/bench_ontology_scraper.py [classes | ontology.owl]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from rdflib import Graph, Literal, Namespace
+from rdflib.namespace import RDF, OWL, RDFS, SKOS
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng'))
+from lib.ontologyScraper import OntologyScraper
+from lib.util import save_json
+
+EX = Namespace("http://example.org/ontology#")
+
+
+def generate_ontology(file_path: str, classes: int):
+    graph = Graph()
+    for index in range(classes):
+        class_iri = EX[f"Class{index}"]
+        graph.add((class_iri, RDF.type, OWL.Class))
+        graph.add((class_iri, RDFS.label, Literal(f"class {index}", lang="en")))
+        if index:
+            graph.add((class_iri, RDFS.subClassOf, EX[f"Class{(index - 1) // 3}"]))
+        if index % 7 == 1:
+            graph.add((class_iri, OWL.disjointWith, EX[f"Class{index + 1}"]))
+
+        object_property, data_property = EX[f"hasPart{index}"], EX[f"hasValue{index}"]
+        graph.add((object_property, RDF.type, OWL.ObjectProperty))
+        graph.add((object_property, SKOS.prefLabel, Literal(f"has part {index}", lang="en")))
+        graph.add((object_property, RDFS.domain, class_iri))
+        graph.add((object_property, RDFS.range, EX[f"Class{(index * 5 + 1) % classes}"]))
+        graph.add((data_property, RDF.type, OWL.DatatypeProperty))
+        graph.add((data_property, RDFS.label, Literal(f"has value {index}", lang="en")))
+        graph.add((data_property, RDFS.domain, class_iri))
+
+        individual = EX[f"individual{index}"]
+        graph.add((individual, RDF.type, OWL.NamedIndividual))
+        graph.add((individual, RDF.type, class_iri))
+        graph.add((individual, RDFS.label, Literal(f"individual {index}", lang="en")))
+    graph.serialize(file_path, format="xml")
+
+
+def run(folder: str, url: str, workers: int):
+    scraper = OntologyScraper(folder)
+    scraper.url = url
+    scraper.workers = workers
+    start = time.perf_counter()
+    scraper.scrapOntology()
+    return time.perf_counter() - start, scraper
+
+
+if __name__ == '__main__':
+    argument = sys.argv[1] if len(sys.argv) > 1 else "200"
+    folder = tempfile.mkdtemp()
+    try:
+        # An existing context keeps the scraper from downloading it
+        os.mkdir(os.path.join(folder, '__output__'))
+        save_json({"@context": {}}, os.path.join(folder, '__output__', 'context.json'))
+        url = argument
+        if argument.isdigit():
+            url = os.path.join(folder, 'ontology.owl')
+            generate_ontology(url, int(argument))
+
+        print(f"{'workers':>8} {'classes':>8} {'scrape (s)':>11}")
+        for workers in sorted({0, 2, 4, os.cpu_count()}):
+            scrape_time, scraper = run(folder, url, workers)
+            print(f"{workers:>8} {len(scraper.classes_dict):>8} {scrape_time:>11.2f}")
+            if not workers:
+                serial_scraper = scraper
+        print()
+        serial_scraper.printQueryTimes()
+    finally:
+        shutil.rmtree(folder)
@@ -0,0 +1,41 @@
+import sys
+import time
+from lib.metadataCatalog import MetadataCatalog
+from lib.util import load_config
+
+def query():
+    """
+    This method finds the runs in the catalog given by 'catalog_path' in 'lib/config.json' which have all
+    of the values given on the command line, as 'property=value', for example:
+
+        python catalog.py ref_t=300 "GROMACS version=2023*"
+
+    The values may contain the wildcards '*' and '?'. With '--entries', the entries of each run found are listed as well.
+
+    Parameters
+    ----------
+    None
+    """
+    catalog_path = load_config().get("catalog_path")
+    if not catalog_path:
+        print("No catalog configured, set 'catalog_path' in 'lib/config.json' first.")
+        return
+
+    arguments = [argument for argument in sys.argv[1:] if argument != "--entries"]
+    conditions = [argument.split("=", 1) for argument in arguments]
+    if not conditions or any(len(condition) != 2 for condition in conditions):
+        print("Usage: python catalog.py [--entries] property=value [property=value ...]")
+        return
+
+    catalog = MetadataCatalog.open(catalog_path)
+    start = time.perf_counter()
+    runs = catalog.find_runs([(property.strip(), value.strip()) for property, value in conditions])
+    print(f"{len(runs)} runs found in {(time.perf_counter() - start) * 1000:.1f} ms.")
+    for folder, name in runs:
+        print(f"{folder}: {name}")
+        if "--entries" in sys.argv:
+            for source, node, node_type, property, value in catalog.get_entries(folder, name):
+                print(f"    {source} {node}{f' ({node_type})' if node_type else ''} {property} = {value}")
+
+if __name__ == "__main__":
+    query()
@@ -1,14 +1,25 @@
+import io
 import os
 try:
     from lib.ontologyScraper import OntologyScraper
     from lib.metadataGeneratorHelper import MetadataGeneratorHelper
     from lib.jsonldGenerator import JSONLDGenerator
-    from lib.util import save_json, extract_csv
+    from lib.asyncPipeline import AsyncPipeline
+    from lib.jsonldDataset import JSONLDDataset
+    from lib.metadataCatalog import MetadataCatalog
+    from lib.csvChunkReader import CsvChunkReader, extract_csv_chunked_batch
+    from lib.util import save_json, load_json, extract_csv, extract_csv_columns, extract_csv_batch, load_config, scan_folder, \
+        read_csv_header, parse_csv_rows, parse_csv_columns
 except ImportError:
     from .lib.ontologyScraper import OntologyScraper
     from .lib.metadataGeneratorHelper import MetadataGeneratorHelper
     from .lib.jsonldGenerator import JSONLDGenerator
-    from .lib.util import save_json, extract_csv
+    from .lib.asyncPipeline import AsyncPipeline
+    from .lib.jsonldDataset import JSONLDDataset
+    from .lib.metadataCatalog import MetadataCatalog
+    from .lib.csvChunkReader import CsvChunkReader, extract_csv_chunked_batch
+    from .lib.util import save_json, load_json, extract_csv, extract_csv_columns, extract_csv_batch, load_config, scan_folder, \
+        read_csv_header, parse_csv_rows, parse_csv_columns
 
 def extract():
     """
@@ -48,31 +59,142 @@ def extract():
             return
 
     output_folder = os.path.join(folder_path + '/__output__')
+    config = load_config()
+    columnar = config.get("csv_columnar", False)
+    delimiter = config.get("csv_delimiter") or None
+    parallel_workers = config.get("csv_parallel_workers", 0)
+    jsonld = not config.get("dataset_output", False)
 
-    for file_name in os.listdir(folder_path):
-        if os.path.isfile(os.path.join(folder_path, file_name)):
-            if file_name == '.DS_Store':
-                continue
-            filename = file_name.split('.')[0]
-            filepath = f'{folder_path}/{file_name}'
-            extract_file_path = f'{output_folder}/extract_{filename}.json'
-            metadata_file_path = f'{output_folder}/metadata_{filename}.json'
+    # The files are scanned lazily, the first file is processed before the scan has finished
+    file_paths = (entry.path for entry in scan_folder(folder_path, ['*.csv'], config.get("scan_exclude"),
+                                                      config.get("scan_max_depth", 0)))
 
-            metadata_extract = extract_metadata(filepath)
-            save_json(metadata_extract, extract_file_path)
+    if parallel_workers:
+        # Each file is split into chunks which are parsed in a pool of worker processes
+        metadata_extracts = extract_csv_chunked_batch(file_paths, delimiter, columnar, parallel_workers)
+    elif config.get("async_in_flight", 0):
+        # Reading, parsing and writing of different files overlap
+        pipeline = AsyncPipeline(read_simulation, parse_simulation,
+                                 lambda path, metadata_extract: write_simulation(path, output_folder, metadata_extract, jsonld=jsonld),
+                                 config["async_in_flight"], config.get("async_parse_workers", 0))
+        pipeline.start(file_paths)
+        metadata_extracts = ()
+    else:
+        # Sibling CSV files share one header validation and delimiter detection
+        metadata_extracts = extract_csv_batch(file_paths, delimiter, columnar)
+
+    for filepath, metadata_extract in metadata_extracts:
+        if isinstance(metadata_extract, ValueError):
+            print(f"Error: {metadata_extract}")
+            continue
+        process_simulation(filepath, output_folder, metadata_extract, jsonld=jsonld)
+
+    if not jsonld:
+        # All runs are aggregated into one dataset document with a shared context
+        dataset = JSONLDDataset(output_folder, config.get("compact_csv", False), config.get("dataset_shard_size", 0),
+                                config.get("context_reference", ""), config.get("rdf_export", ""))
+        for file_path in dataset.write():
+            print(f"File {file_path} successfully created.")
+
+def process_simulation(filepath: str, output_folder: str, metadata_extract: dict = None, interactive: bool = True, jsonld: bool = True):
+    """
+    Creates the extract, metadata and JSON-LD files of a single csv file in 'output_folder'.
+
+    Parameters
+    ----------
+    filepath: str
+        File path to the csv file
+
+    output_folder: str
+        Folder of the output files, holding 'classes.json' and 'context.json'
+
+    metadata_extract: dict
+        The metadata already extracted from the file, extracted here if not given.
+        A ValueError is raised if the file is not a valid csv file
+
+    interactive: bool
+        Whether the user may be asked to create the template. If False, a ValueError is raised instead
+
+    jsonld: bool
+        Whether the JSON-LD file is created, which is left out when the runs are aggregated into a dataset
+    """
+    config = load_config()
+    columnar = config.get("csv_columnar", False)
+    delimiter = config.get("csv_delimiter") or None
+    parallel_workers = config.get("csv_parallel_workers", 0)
+
+    if metadata_extract is None:
+        if parallel_workers:
+            metadata_extract = CsvChunkReader(filepath, delimiter, parallel_workers).extract(columnar)
+        else:
+            metadata_extract = extract_metadata(filepath, columnar, delimiter)
+
+    write_simulation(filepath, output_folder, metadata_extract, interactive, jsonld)
 
-            metadata_generator = MetadataGeneratorHelper(extract_file_path, ["csv_dict"])
-            metadata_generator.start()  
-            
-            jsonLDGenerator = JSONLDGenerator(metadata_file_path, extract_file_path)
-            jsonLDGenerator.start()
+def read_simulation(filepath: str):
+    """
+    Reads the content of a csv file, the I/O-bound first step of 'process_simulation'.
+    """
+    with open(filepath, mode="r") as file:
+        return file.read()
+
+def parse_simulation(filepath: str, content: str):
+    """
+    Extracts the metadata from the content of a csv file, the CPU-bound second step of 'process_simulation'.
+    A ValueError is raised if the file is not a valid csv file.
+    """
+    config = load_config()
+    csv_reader, keys, _ = read_csv_header(io.StringIO(content), filepath, config.get("csv_delimiter") or None)
+    parse = parse_csv_columns if config.get("csv_columnar", False) else parse_csv_rows
+    return parse(csv_reader, keys, filepath)
+
+def write_simulation(filepath: str, output_folder: str, metadata_extract: dict, interactive: bool = True, jsonld: bool = True):
+    """
+    Creates the extract, metadata and JSON-LD files of a csv file from its extracted metadata,
+    the I/O-bound last step of 'process_simulation'.
+    """
+    config = load_config()
+    compact_csv = config.get("compact_csv", False)
+    delimiter = config.get("csv_delimiter") or None
+    parallel_workers = config.get("csv_parallel_workers", 0)
+
+    filename = os.path.basename(filepath).split('.')[0]
+    extract_file_path = f'{output_folder}/extract_{filename}.json'
+    metadata_file_path = f'{output_folder}/metadata_{filename}.json'
+
+    save_json(metadata_extract, extract_file_path)
+
+    metadata_generator = MetadataGeneratorHelper(extract_file_path, ["csv_dict"], "csv", interactive, metadata_extract)
+    metadata_generator.start()  
+
+    if config.get("catalog_path"):
+        MetadataCatalog.open(config["catalog_path"]).add_run(output_folder, filename, "csv", metadata_extract,
+                                                             metadata_generator.metadata)
+
+    if not jsonld:
+        print(f"File {metadata_file_path} successfully created.")
+        return
+
+    jsonLDGenerator = JSONLDGenerator(metadata_file_path, extract_file_path, compact_csv=compact_csv,
+                                      context_reference=config.get("context_reference", ""))
+    if parallel_workers:
+        # The records of the chunked extract are streamed into the file, without parsing the CSV file again
+        CsvChunkReader(filepath, delimiter, parallel_workers).write_jsonld(
+            jsonLDGenerator.jsonld_file_path, metadata_generator.metadata,
+            load_json(jsonLDGenerator.context_file_path), compact_csv, jsonLDGenerator.context_reference,
+            metadata_extract)
+    else:
+        jsonLDGenerator.start(metadata_generator.metadata, metadata_extract)
 
-            print(f"File {metadata_file_path.replace('.json','.jsonld')} successfully created.")
+    print(f"File {metadata_file_path.replace('.json','.jsonld')} successfully created.")
+    if config.get("rdf_export"):
+        rdf_file_path = jsonLDGenerator.write_rdf(config["rdf_export"], metadata_generator.metadata, metadata_extract)
+        print(f"File {rdf_file_path} successfully created.")
 
-def extract_metadata(filepath: str):
+def extract_metadata(filepath: str, columnar: bool = False, delimiter: str = None):
     extension = os.path.splitext(filepath)[1]
     if extension == '.csv':
-        return extract_csv(filepath)
+        return extract_csv_columns(filepath, delimiter) if columnar else extract_csv(filepath, delimiter)
     else:
         return None   
     
@@ -1,15 +1,41 @@
 import os
 import re
+import struct
 try:
     from lib.ontologyScraper import OntologyScraper
     from lib.metadataGeneratorHelper import MetadataGeneratorHelper
     from lib.jsonldGenerator import JSONLDGenerator
-    from lib.util import save_json
+    from lib.asyncPipeline import AsyncPipeline
+    from lib.jsonldDataset import JSONLDDataset
+    from lib.metadataCatalog import MetadataCatalog
+    from lib.gromacsBinaryReader import GromacsBinaryReader
+    from lib.jobScriptParser import JobScriptParser, get_job_script_parser, parse_sacct
+    from lib.util import save_json, read_marked_section, read_tail_section, load_config, scan_folder
 except ImportError:
     from .lib.ontologyScraper import OntologyScraper
     from .lib.metadataGeneratorHelper import MetadataGeneratorHelper
     from .lib.jsonldGenerator import JSONLDGenerator
-    from .lib.util import save_json
+    from .lib.asyncPipeline import AsyncPipeline
+    from .lib.jsonldDataset import JSONLDDataset
+    from .lib.metadataCatalog import MetadataCatalog
+    from .lib.gromacsBinaryReader import GromacsBinaryReader
+    from .lib.jobScriptParser import JobScriptParser, get_job_script_parser, parse_sacct
+    from .lib.util import save_json, read_marked_section, read_tail_section, load_config, scan_folder
+
+JOB_SCRIPT_EXTENSIONS = ('.job', '.slurm', '.sbatch', '.pbs')
+# The performance summary at the end of a .log file starts with the flop accounting
+LOG_PERFORMANCE_MARKER = "M E G A - F L O P S   A C C O U N T I N G"
+LOG_PERFORMANCE_PATTERNS = {
+    "MPI ranks": r'On (\d+) MPI ranks?(?: doing PP)?',
+    "OpenMP threads": r'On \d+ MPI ranks?(?: doing PP)?,\s*each using (\d+) OpenMP threads?',
+    "PME MPI ranks": r'on (\d+) MPI ranks? doing PME',
+    "PME OpenMP threads": r'on \d+ MPI ranks? doing PME,\s*each using (\d+) OpenMP threads?',
+    "Average load imbalance (%)": r'Average load imbalance:\s*([\d.]+)\s*%',
+    "Time lost to load imbalance (%)": r'Part of the total run time spent waiting due to load imbalance:\s*([\d.]+)\s*%',
+    "Average PME mesh/force load": r'Average PME mesh/force load:\s*([\d.]+)',
+    "GPU/CPU force evaluation time ratio": r'Average per-step force GPU/CPU evaluation time ratio:.*=\s*([\d.]+)',
+    "Finished": r'Finished mdrun on rank \d+ (.+)',
+}
 
 def extract():
     """
@@ -49,24 +75,99 @@ def extract():
 
     output_folder = os.path.join(folder_path + '/__output__')
 
-    for root, dirs, _ in os.walk(folder_path):
-        for dir_name in dirs:
-            if dir_name in ['__output__','__expected__']:
-                continue
-            current_folder_path = os.path.join(root, dir_name)
-            extract_file_path = f'{output_folder}/extract_{dir_name}.json'
-            metadata_file_path = f'{output_folder}/metadata_{dir_name}.json'
+    # Each run is a subfolder of the folder, nested folders are only descended into up to 'scan_max_depth'
+    config = load_config()
+    jsonld = not config.get("dataset_output", False)
+    simulations = (entry.path for entry in scan_folder(folder_path, exclude=config.get("scan_exclude"), max_depth=config.get("scan_max_depth", 0), folders=True))
+    if config.get("async_in_flight", 0):
+        # Reading, parsing and writing of different simulations overlap
+        pipeline = AsyncPipeline(read_simulation, parse_simulation,
+                                 lambda path, metadata_extract: write_simulation(path, output_folder, metadata_extract, jsonld=jsonld),
+                                 config["async_in_flight"], config.get("async_parse_workers", 0))
+        pipeline.start(simulations)
+    else:
+        for path in simulations:
+            process_simulation(path, output_folder, jsonld=jsonld)
+
+    if not jsonld:
+        # All runs are aggregated into one dataset document with a shared context
+        dataset = JSONLDDataset(output_folder, config.get("compact_csv", False), config.get("dataset_shard_size", 0),
+                                config.get("context_reference", ""), config.get("rdf_export", ""))
+        for file_path in dataset.write():
+            print(f"File {file_path} successfully created.")
+
+def process_simulation(current_folder_path: str, output_folder: str, interactive: bool = True, jsonld: bool = True):
+    """
+    Extracts the metadata of a single GROMACS run folder and creates its metadata and JSON-LD files in 'output_folder'.
+
+    Parameters
+    ----------
+    current_folder_path: str
+        Path to the run folder
+
+    output_folder: str
+        Folder of the output files, holding 'classes.json' and 'context.json'
+
+    interactive: bool
+        Whether the user may be asked to create the template. If False, a ValueError is raised instead
+
+    jsonld: bool
+        Whether the JSON-LD file is created, which is left out when the runs are aggregated into a dataset
+    """
+    write_simulation(current_folder_path, output_folder,
+                     parse_simulation(current_folder_path, read_simulation(current_folder_path)), interactive, jsonld)
 
-            metadataExtractor = GromacsMetadataExtractor(current_folder_path, extract_file_path)
-            metadataExtractor.start()
+def read_simulation(current_folder_path: str):
+    """
+    Reads the contents of the files in a GROMACS run folder, the I/O-bound first step of 'process_simulation'.
+    """
+    config = load_config()
+    return GromacsMetadataExtractor(current_folder_path, None, config.get("job_resources", False),
+                                    config.get("job_accounting_file", ""),
+                                    config.get("edr_count_frames", False)).read_files(current_folder_path)
 
-            metadata_generator = MetadataGeneratorHelper(extract_file_path, ["variables", "global_attributes", "log_data", "job_data"])
-            metadata_generator.start()  
-            
-            jsonLDGenerator = JSONLDGenerator(metadata_file_path, extract_file_path)
-            jsonLDGenerator.start()
+def parse_simulation(current_folder_path: str, contents: dict):
+    """
+    Extracts the metadata from the file contents of a GROMACS run folder, the CPU-bound second step of 'process_simulation'.
+    """
+    config = load_config()
+    return GromacsMetadataExtractor(current_folder_path, None, config.get("job_resources", False),
+                                    config.get("job_accounting_file", ""),
+                                    config.get("edr_count_frames", False)).extract_contents(contents)
 
-            print(f"File {metadata_file_path.replace('.json','.jsonld')} successfully created.")
+def write_simulation(current_folder_path: str, output_folder: str, metadata_extract: dict, interactive: bool = True, jsonld: bool = True):
+    """
+    Creates the extract, metadata and JSON-LD files of a GROMACS run folder from its extracted metadata,
+    the I/O-bound last step of 'process_simulation'.
+    """
+    dir_name = os.path.basename(current_folder_path)
+    extract_file_path = f'{output_folder}/extract_{dir_name}.json'
+    metadata_file_path = f'{output_folder}/metadata_{dir_name}.json'
+
+    save_json(metadata_extract, extract_file_path)
+
+    metadata_generator = MetadataGeneratorHelper(extract_file_path, ["variables", "global_attributes", "log_data", "log_performance",
+                                                                      "job_data", "job_resources", "tpr_data", "edr_data"], "gromacs",
+                                                 interactive, metadata_extract)
+    metadata_generator.start()  
+
+    config = load_config()
+    if config.get("catalog_path"):
+        MetadataCatalog.open(config["catalog_path"]).add_run(output_folder, dir_name, "gromacs", metadata_extract,
+                                                             metadata_generator.metadata)
+
+    if not jsonld:
+        print(f"File {metadata_file_path} successfully created.")
+        return
+
+    jsonLDGenerator = JSONLDGenerator(metadata_file_path, extract_file_path, streaming=config.get("jsonld_streaming", False),
+                                      context_reference=config.get("context_reference", ""))
+    jsonLDGenerator.start(metadata_generator.metadata, metadata_extract)
+
+    print(f"File {metadata_file_path.replace('.json','.jsonld')} successfully created.")
+    if config.get("rdf_export"):
+        rdf_file_path = jsonLDGenerator.write_rdf(config["rdf_export"], metadata_generator.metadata, metadata_extract)
+        print(f"File {rdf_file_path} successfully created.")
     
 class GromacsMetadataExtractor:
     """
@@ -92,13 +193,36 @@ class GromacsMetadataExtractor:
     log_data : dict
         A dictionary which holds the 'log_data' metadata
 
+    log_performance : dict
+        A dictionary which holds the 'log_performance' metadata, the performance summary at the end of the .log file
+
     job_data : dict
         A dictionary which holds the 'job_data' metadata
 
+    job_resources : dict
+        A dictionary which holds the 'job_resources' metadata: the resources of the job in a common form for all
+        schedulers, the settings of the run and the accounting of the job, if 'job_resources' is set in config.json
+
+    collect_job_resources : bool
+        Whether 'job_resources' is extracted
+
+    accounting_file_name : str
+        Name of the text dump of 'sacct' in a run folder, read into 'job_resources'
+
+    count_edr_frames : bool
+        Whether the frames of the .edr file are counted, which reads the whole file
+
+    tpr_data : dict
+        A dictionary which holds the 'tpr_data' metadata, read from the header of the .tpr file
+
+    edr_data : dict
+        A dictionary which holds the 'edr_data' metadata, read from the headers of the .edr file
+
 
     Methods
     -------
-    __init__(self, current_folder_path: str, extract_file_path: str) -> None:
+    __init__(self, current_folder_path: str, extract_file_path: str, collect_job_resources: bool = False,
+             accounting_file_name: str = "", count_edr_frames: bool = False) -> None:
         Initilaizes the 'current_folder_path' and 'extract_file_path' variables
 
     start(self) -> None:
@@ -109,12 +233,25 @@ class GromacsMetadataExtractor:
             - .mdp
             - .usermd
             - .log
-            - .job
+            - .job, .slurm, .sbatch or .pbs
+            - the 'sacct' dump 'accounting_file_name'
+            - .tpr and .edr, of which only the headers are read
         And maps extracted metadata from these files into the a dictionary with these top-level keys:
             - variables
             - global_attributes
             - log_data
+            - log_performance, if the .log file ends with a performance summary
             - job_data
+            - job_resources, if 'collect_job_resources' is set
+            - tpr_data and edr_data, if the folder has a .tpr or an .edr file
+
+    read_files(self, read_folder: str) -> dict[str, str]:
+        Reads the contents of the files in the 'read_folder' with the extensions above. Of .log files only the build
+        header is read, and the performance summary, which is read backwards from the end of the file as '<name>.log.tail'.
+        Of .tpr and .edr files, the headers are read into dictionaries by 'GromacsBinaryReader'
+
+    extract_contents(self, contents: dict[str, str]) -> dict[str, Any]:
+        Extracts metadata from the file contents read by 'read_files', into the same dictionary as 'extract_metadata'
     
     extract_from_mdp(content: str) -> None:
         Extracts metadata from .mdp file and populates 'variables' dictionary
@@ -123,10 +260,33 @@ class GromacsMetadataExtractor:
         Extracts metadata from .usermd file and populates 'global_attributes' dictionary       
 
     extract_from_log(content: str) -> None:
-        Extracts metadata from .log file and populates 'log_data' dictionary
+        Extracts metadata from the build header of .log file and populates 'log_data' dictionary.
+        Only the header section between 'GROMACS:' and 'C++ compiler flags:' is read from the file
+
+    extract_performance_from_log(content: str) -> None:
+        Extracts the rank and thread counts, the core and wall times, the performance in ns/day and hour/ns, the load
+        balance and the cycle accounting table from the performance summary of .log file and populates the
+        'log_performance' dictionary
+
+    parse_number(value: str) -> int | float:
+        Returns a number of the .log file as an integer or a float
 
     extract_from_job(content: str) -> None:
-        Extracts metadata from .job file and populates 'job_data' dictionary     
+        Extracts the directives of a MSUB, SLURM or PBS job script into the 'job_data' dictionary, by the parser
+        of its scheduler in 'JOB_SCRIPT_PARSERS'. The resources of the job and the settings of the run, such as
+        'OMP_NUM_THREADS' and the '-ntomp' and '-ntmpi' options of 'gmx mdrun', populate 'job_resources'
+
+    extract_from_accounting(content: str) -> None:
+        Extracts the elapsed time, the allocated cores and nodes, the memory used and the core-hours of the job
+        from a text dump of 'sacct' and populates 'job_resources'
+
+    add_resource_efficiency() -> None:
+        Adds the simulated time and the core-hours per simulated ns to 'job_resources'. The core-hours are taken
+        from the accounting, or else from the core time in the .log file
+
+    get_simulated_time() -> float:
+        Returns the simulated time in ns, from the performance summary of the .log file, the frames of the .edr
+        file or else 'nsteps' and 'dt' of the .mdp file, or None
 
     remap_variables_names() -> None:   
         Replaces the alias variables with their actual names, as following:
@@ -140,13 +300,21 @@ class GromacsMetadataExtractor:
         and returns the index, -1 if not found
     """
 
-    def __init__(self, current_folder_path: str, extract_file_path: str):
+    def __init__(self, current_folder_path: str, extract_file_path: str, collect_job_resources: bool = False,
+                 accounting_file_name: str = "", count_edr_frames: bool = False):
         self.current_folder_path = current_folder_path
         self.extract_file_path = extract_file_path
+        self.collect_job_resources = collect_job_resources
+        self.accounting_file_name = accounting_file_name
+        self.count_edr_frames = count_edr_frames
         self.variables = dict()
         self.global_attributes = dict()
         self.log_data = dict()
+        self.log_performance = dict()
         self.job_data = dict()
+        self.job_resources = dict()
+        self.tpr_data = dict()
+        self.edr_data = dict()
 
     def start(self):
         extracted_metadata = self.extract_metadata(self.current_folder_path)
@@ -154,27 +322,68 @@ class GromacsMetadataExtractor:
 
     def extract_metadata(self, read_folder: str):
         """Main function to extract metadata from a GROMACS folder."""
-        for file_name in os.listdir(read_folder):
-            if file_name == '.DS_Store':
-                continue
-            with open(f"{read_folder}/{file_name}", "r") as file:
-                extention = os.path.splitext(file_name)[1]
-                content = file.read()
-                if extention == '.mdp':
-                    self.extract_from_mdp(content)
-                elif extention == '.usermd':
-                    self.extract_from_usermd(content)
-                elif extention == '.log':
-                    self.extract_from_log(content)
-                elif extention == '.job':
-                    self.extract_from_job(content)
+        return self.extract_contents(self.read_files(read_folder))
+
+    def read_files(self, read_folder: str):
+        contents = {}
+        for entry in scan_folder(read_folder):
+            file_name = entry.name
+            extention = os.path.splitext(file_name)[1]
+            if extention == '.log':
+                # Only the build header of the log is read, instead of the whole solver output
+                section = read_marked_section(f"{read_folder}/{file_name}", "GROMACS:", "C++ compiler flags:", True)
+                if section is not None:
+                    contents[file_name] = section
+                # The performance summary is read from the end of the log, without the solver output before it
+                tail = read_tail_section(f"{read_folder}/{file_name}", LOG_PERFORMANCE_MARKER)
+                if tail is not None:
+                    contents[f"{file_name}.tail"] = tail
+            elif extention in ('.tpr', '.edr'):
+                # Only the headers of the binary files are read, from their memory maps
+                with GromacsBinaryReader(f"{read_folder}/{file_name}") as reader:
+                    try:
+                        contents[file_name] = reader.read_tpr_header() if extention == '.tpr' else reader.read_edr_header(self.count_edr_frames)
+                    except (ValueError, struct.error) as error:
+                        print(f"Couldn't read the header of {file_name}: {error}")
+            elif extention in ('.mdp', '.usermd', *JOB_SCRIPT_EXTENSIONS) or \
+                    (self.collect_job_resources and file_name == self.accounting_file_name):
+                with open(f"{read_folder}/{file_name}", "r") as file:
+                    contents[file_name] = file.read()
+        return contents
+
+    def extract_contents(self, contents: dict):
+        for file_name, content in contents.items():
+            extention = os.path.splitext(file_name)[1]
+            if file_name == self.accounting_file_name:
+                self.extract_from_accounting(content)
+            elif extention == '.mdp':
+                self.extract_from_mdp(content)
+            elif extention == '.usermd':
+                self.extract_from_usermd(content)
+            elif extention == '.log':
+                self.extract_from_log(content)
+            elif extention == '.tail':
+                self.extract_performance_from_log(content)
+            elif extention in JOB_SCRIPT_EXTENSIONS:
+                self.extract_from_job(content)
+            elif extention == '.tpr':
+                self.tpr_data.update(content)
+            elif extention == '.edr':
+                self.edr_data.update(content)
         self.remap_variables_names()
-        return {
+        if self.collect_job_resources:
+            self.add_resource_efficiency()
+        metadata = {
             "variables": self.variables,
             "global_attributes": self.global_attributes,
             "log_data": self.log_data,
             "job_data": self.job_data
         }
+        for key, data in (("log_performance", self.log_performance), ("job_resources", self.job_resources),
+                          ("tpr_data", self.tpr_data), ("edr_data", self.edr_data)):
+            if data:
+                metadata[key] = data
+        return metadata
 
     def extract_from_mdp(self, content: str):
         lines = content.strip().split('\n')
@@ -210,13 +419,81 @@ class GromacsMetadataExtractor:
                 value = lines[start_index + index + 1]
             self.log_data[key.strip()] = value.strip()
 
+    def extract_performance_from_log(self, content: str):
+        for key, pattern in LOG_PERFORMANCE_PATTERNS.items():
+            match = re.search(pattern, content)
+            if match:
+                value = match.group(1).strip()
+                self.log_performance[key] = value if key == "Finished" else self.parse_number(value)
+
+        lines = content.split('\n')
+        for index, line in enumerate(lines[1:], 1):
+            # The values of 'Time:' and 'Performance:' are named by the header line above them
+            if line.strip().startswith('Time:'):
+                for key, value in zip(["Core time (s)", "Wall time (s)", "Core usage (%)"], line.split()[1:]):
+                    self.log_performance[key] = self.parse_number(value)
+            elif line.startswith('Performance:'):
+                for key, value in zip(re.findall(r'\((.+?)\)', lines[index - 1]), line.split()[1:]):
+                    self.log_performance[key] = self.parse_number(value)
+
+        cycle_accounting = {}
+        start_index = self.find_string_index(lines, "R E A L   C Y C L E   A N D   T I M E   A C C O U N T I N G")
+        header_index = self.find_string_index(lines[start_index:], " Computing:") if start_index != -1 else -1
+        if header_index != -1:
+            for line in lines[start_index + header_index + 2:]:
+                if line.startswith('---'):
+                    continue
+                if not line.strip():
+                    break
+                # The name of a row may contain spaces, its values are the numbers at the end of the line
+                tokens = line.split()
+                count = next((i for i, token in enumerate(reversed(tokens)) if not re.fullmatch(r'[\d.]+', token)), len(tokens))
+                name, values = ' '.join(tokens[:len(tokens) - count]), [self.parse_number(token) for token in tokens[len(tokens) - count:]]
+                columns = ["ranks", "threads", "calls", "wall time (s)", "giga-cycles", "percent"][-len(values):]
+                if name and len(values) in (3, 6):
+                    cycle_accounting[name] = dict(zip(columns, values))
+        if cycle_accounting:
+            self.log_performance["cycle accounting"] = cycle_accounting
+
+    @staticmethod
+    def parse_number(value: str):
+        return int(value) if value.isdigit() else float(value)
+
     def extract_from_job(self, content: str):
-        pattern = r'#MSUB -l (.+)'
-        match = re.search(pattern, content)
-        if match:
-            key_value_string = match.group(1)
-            pairs = re.findall(r'(\w+)=(\w+)', key_value_string)
-            self.job_data = {key: value for key, value in pairs}
+        parser = get_job_script_parser(content)
+        if parser is not None:
+            directives = parser.parse_directives(content)
+            if directives:
+                self.job_data = directives
+        if self.collect_job_resources:
+            if parser is not None:
+                self.job_resources["scheduler"] = parser.name
+                self.job_resources.update(parser.parse_resources(content))
+            else:
+                self.job_resources.update(JobScriptParser.parse_run_settings(content))
+
+    def extract_from_accounting(self, content: str):
+        self.job_resources.update(parse_sacct(content))
+
+    def add_resource_efficiency(self):
+        core_hours = self.job_resources.get("core-hours")
+        if core_hours is None and "Core time (s)" in self.log_performance:
+            core_hours = self.log_performance["Core time (s)"] / 3600
+        simulated_time = self.get_simulated_time()
+        if core_hours and simulated_time:
+            self.job_resources["simulated time (ns)"] = round(simulated_time, 6)
+            self.job_resources["core-hours per ns"] = round(core_hours / simulated_time, 4)
+
+    def get_simulated_time(self):
+        if "ns/day" in self.log_performance and "Wall time (s)" in self.log_performance:
+            return self.log_performance["ns/day"] * self.log_performance["Wall time (s)"] / 86400
+        if "last time (ps)" in self.edr_data:
+            return (self.edr_data["last time (ps)"] - self.edr_data["first time (ps)"]) / 1000
+        try:
+            nsteps, dt = int(self.variables.get("nsteps", "")), float(self.variables.get("dt", ""))
+        except ValueError:
+            return None
+        return nsteps * dt / 1000 if nsteps > 0 else None
 
     def remap_variables_names(self):
         variables = ['ref_t', 'tcoupl', 'ref_p', 'pcoupl']
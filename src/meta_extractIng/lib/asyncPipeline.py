@@ -0,0 +1,126 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Callable, Iterable
+
+class AsyncPipeline:
+    """
+    Runs the extraction of many simulations as a pipeline of three stages, so that on high-latency storage
+    the next inputs are read and the previous outputs are written while the current ones are parsed.
+    Reading and writing run in a pool of threads, parsing in a pool of processes. The stages are connected
+    by bounded queues, so a slow stage holds back the stages before it, and at most 'in_flight' simulations
+    are between the start of their reading and the end of their writing at any time.
+
+    The first simulation is written on its own, before any other, as its template may still have to be
+    created interactively; the following ones reuse it.
+
+    Input:
+        - The simulations, and the 'read_simulation', 'parse_simulation' and 'write_simulation' functions of an extractor
+
+    Output:
+        - Whatever the write function creates for each simulation
+
+    ...
+
+    Attributes
+    ----------
+    read : Callable
+        Function reading a simulation, called with its path
+
+    parse : Callable
+        Function extracting the metadata of a simulation, called with its path and what 'read' returned.
+        It has to be a module-level function, as it is run in another process
+
+    write : Callable
+        Function writing the output files of a simulation, called with its path and what 'parse' returned
+
+    in_flight : int
+        Maximum number of simulations in the pipeline at the same time
+
+    parse_workers : int
+        Number of parsing processes, all available cores if not given
+
+
+    Methods
+    -------
+    __init__(read: Callable, parse: Callable, write: Callable, in_flight: int = 8, parse_workers: int = None) -> None:
+        Initializes the class attributes
+
+    start(items: Iterable) -> None:
+        Runs all simulations in 'items' through the pipeline in a new event loop
+
+    run(items: Iterable) -> None:
+        Runs all simulations in 'items' through the pipeline and waits until they are written
+
+    run_stage(name: str, executor: Executor, function: Callable, source: asyncio.Queue, target: asyncio.Queue) -> None:
+        Takes simulations from 'source', runs 'function' on them in 'executor' and puts the results into 'target'
+    """
+
+    def __init__(self, read: Callable, parse: Callable, write: Callable, in_flight: int = 8, parse_workers: int = None):
+        self.read = read
+        self.parse = parse
+        self.write = write
+        self.in_flight = max(in_flight, 1)
+        self.parse_workers = parse_workers or os.cpu_count()
+
+    def start(self, items: Iterable):
+        asyncio.run(self.run(items))
+
+    async def run(self, items: Iterable):
+        loop = asyncio.get_running_loop()
+        read_queue = asyncio.Queue(self.in_flight)
+        parse_queue = asyncio.Queue(self.in_flight)
+        write_queue = asyncio.Queue(self.in_flight)
+        self.slots = asyncio.Semaphore(self.in_flight)
+        self.first_written = asyncio.Event()
+        self.first_item = None
+
+        with ThreadPoolExecutor(self.in_flight) as io_executor, \
+                ProcessPoolExecutor(self.parse_workers) as parse_executor:
+            stages = [
+                *(asyncio.create_task(self.run_stage("read", io_executor, self.read, read_queue, parse_queue))
+                  for _ in range(self.in_flight)),
+                *(asyncio.create_task(self.run_stage("parse", parse_executor, self.parse, parse_queue, write_queue))
+                  for _ in range(self.parse_workers)),
+                *(asyncio.create_task(self.run_stage("write", io_executor, self.write, write_queue, None))
+                  for _ in range(self.in_flight)),
+            ]
+
+            # The items are taken from the (possibly lazy) iterator in a thread, as scanning blocks as well
+            iterator = iter(items)
+            while True:
+                await self.slots.acquire()
+                item = await loop.run_in_executor(io_executor, next, iterator, None)
+                if item is None:
+                    self.slots.release()
+                    break
+                if self.first_item is None:
+                    self.first_item = item
+                await read_queue.put((item, ()))
+
+            for queue in (read_queue, parse_queue, write_queue):
+                await queue.join()
+            for stage in stages:
+                stage.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+
+    async def run_stage(self, name: str, executor, function: Callable, source: asyncio.Queue, target: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            item, arguments = await source.get()
+            try:
+                if name == "write" and item != self.first_item:
+                    await self.first_written.wait()
+                result = await loop.run_in_executor(executor, function, item, *arguments)
+                if target is not None:
+                    await target.put((item, (result,)))
+                    continue
+            except Exception as error:
+                print(f"Error: Couldn't {name} {item}: {error}")
+            finally:
+                source.task_done()
+
+            # The simulation has been written, or it has failed in one of the stages
+            if item == self.first_item:
+                self.first_written.set()
+            self.slots.release()
@@ -0,0 +1,209 @@
+import csv
+import io
+import locale
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from .util import read_csv_header, parse_csv_rows, parse_csv_columns, save_json_stream, dumps_json
+from .jsonldGenerator import JSONLDGenerator
+
+QUOTE = b'"'
+
+class CsvChunkReader:
+    """
+    Parses a single large csv file in parallel. The file is split into chunks at record boundaries,
+    the chunks are parsed in a process pool, and the results are either merged in order into the
+    same extract as 'util.extract_csv', or rendered straight into the same JSON-LD file as
+    'JSONLDGenerator.process_csv_metadata'.
+
+    Record boundaries are quote-aware: a new line only ends a record when an even number of quote
+    characters precede it, so quoted values spanning several lines are never split. This assumes that
+    quote characters only appear around quoted values, as in files written by the csv module.
+
+    Input:
+        - A csv file, with a header row and a column with 'id'
+
+    Output:
+        - The extracted metadata, or a JSON-LD file
+
+    ...
+
+    Attributes
+    ----------
+    filepath : str
+        File path to csv file
+
+    delimiter : str
+        Delimiter of the file, automatically detected if not given
+
+    workers : int
+        Number of worker processes, all available cores if not given
+
+    chunk_size : int
+        Approximate size of the chunks in bytes. Files smaller than one chunk are parsed in the calling process
+
+
+    Methods
+    -------
+    __init__(filepath: str, delimiter: str = None, workers: int = None, chunk_size: int = 32 MB) -> None:
+        Initializes the class attributes, reads the header and detects the delimiter
+
+    find_chunks() -> list:
+        Returns the (start offset, end offset, line offset) of each chunk of records after the header
+
+    find_record_end(data: mmap, start: int, position: int, quotes: int) -> tuple[int, int]:
+        Returns the offset after the first record boundary at or after 'position' and the number of quote
+        characters before it, given the number of quote characters 'quotes' before 'start'
+
+    map_chunks(function: Callable, *args) -> Iterator:
+        Applies 'function' to all chunks in the process pool and yields its results in the order of the chunks
+
+    extract(columnar: bool = False) -> dict:
+        Parses all chunks and merges them into the layout of 'util.extract_csv', or 'util.extract_csv_columns'
+
+    write_jsonld(jsonld_file_path: str, metadata: dict, latest_context: dict, compact_csv: bool = False,
+                 context_reference: str = "", extract: dict = None) -> None:
+        Renders the JSON-LD graph of each chunk in the process pool and writes the chunks in order.
+        If the extract of the file is given, as returned by 'extract', its records are written instead
+        and the file is not parsed again
+    """
+
+    def __init__(self, filepath: str, delimiter: str = None, workers: int = None, chunk_size: int = 32 * 1024 * 1024):
+        self.filepath = filepath
+        self.workers = workers or os.cpu_count()
+        self.chunk_size = chunk_size
+        with open(filepath, mode="r") as file:
+            _, self.keys, self.delimiter = read_csv_header(file, filepath, delimiter)
+
+    def find_chunks(self):
+        chunks = []
+        with open(self.filepath, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size == 0:
+                return chunks
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                start, quotes = self.find_record_end(data, 0, 0, 0)
+                lines = data[:start].count(b"\n")
+                while start < size:
+                    end, quotes = self.find_record_end(data, start, min(start + self.chunk_size, size), quotes)
+                    chunks.append((start, end, lines))
+                    lines += data[start:end].count(b"\n")
+                    start = end
+        return chunks
+
+    @staticmethod
+    def find_record_end(data: mmap.mmap, start: int, position: int, quotes: int):
+        # mmap has no count(), slices are bounded by the chunk size
+        quotes += data[start:position].count(QUOTE)
+        while position < len(data):
+            newline = data.find(b"\n", position)
+            if newline == -1:
+                break
+            quotes += data[position:newline].count(QUOTE)
+            position = newline + 1
+            if quotes % 2 == 0:
+                return position, quotes
+        return len(data), quotes + data[position:].count(QUOTE)
+
+    def map_chunks(self, function, *args):
+        chunks = self.find_chunks()
+        arguments = [(self.filepath, start, end, line_offset, self.keys, self.delimiter, *args)
+                     for start, end, line_offset in chunks]
+        if self.workers <= 1 or len(chunks) <= 1:
+            yield from (function(*chunk_arguments) for chunk_arguments in arguments)
+            return
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            yield from executor.map(function, *zip(*arguments))
+
+    def extract(self, columnar: bool = False):
+        if columnar:
+            merged = {"headers": None, "ids": [], "columns": {}, "nulls": {}}
+        else:
+            merged = {"headers": None, "rows": {}}
+        known_ids = set()
+
+        for chunk in self.map_chunks(parse_chunk, columnar):
+            merged["headers"] = chunk["headers"]
+            ids = chunk["ids"] if columnar else chunk["rows"]
+            if not known_ids.isdisjoint(ids):
+                raise ValueError(f"{self.filepath}: duplicate id '{next(id for id in ids if id in known_ids)}'.")
+            known_ids.update(ids)
+            if columnar:
+                offset = len(merged["ids"])
+                merged["ids"].extend(chunk["ids"])
+                for key, values in chunk["columns"].items():
+                    merged["columns"].setdefault(key, []).extend(values)
+                for key, rows in chunk["nulls"].items():
+                    merged["nulls"].setdefault(key, []).extend(row + offset for row in rows)
+            else:
+                merged["rows"].update(chunk["rows"])
+
+        if merged["headers"] is None:
+            merged["headers"] = self.keys
+            if columnar:
+                merged["columns"] = {key: [] for key in self.keys if key != "" and key != "id"}
+        return {"csv_dict": merged}
+
+    def write_jsonld(self, jsonld_file_path: str, metadata: dict, latest_context: dict, compact_csv: bool = False,
+                     context_reference: str = "", extract: dict = None):
+        context = JSONLDGenerator.get_context(latest_context, context_reference)
+        columns = JSONLDGenerator.build_csv_columns(metadata)
+
+        def fragments():
+            if compact_csv:
+                yield "".join(f"{',' if index else ''}\n        {dumps_json(item, 2)}"
+                              for index, item in enumerate(JSONLDGenerator.iter_csv_column_nodes(columns)))
+            if extract is not None:
+                # The ids of the extract are already unique
+                records = JSONLDGenerator.iter_csv_records_compact if compact_csv else JSONLDGenerator.iter_csv_records
+                yield from (f"\n        {dumps_json(item, 2)}" for item in records(extract, columns))
+                return
+            known_ids = set()
+            for ids, text in self.map_chunks(render_chunk, columns, compact_csv):
+                if not known_ids.isdisjoint(ids):
+                    raise ValueError(f"{self.filepath}: duplicate id '{next(id for id in ids if id in known_ids)}'.")
+                known_ids.update(ids)
+                yield text
+
+        try:
+            save_json_stream({"@context": context}, "@graph", fragments(), jsonld_file_path, serialized=True)
+        except ValueError:
+            os.remove(jsonld_file_path)
+            raise
+
+
+def parse_chunk(filepath: str, start: int, end: int, line_offset: int, keys: list, delimiter: str, columnar: bool):
+    """
+    Parses the records between the byte offsets 'start' and 'end' of a csv file, in a worker process.
+    The chunk is decoded and its new lines translated in the same way as when the file is opened in text mode.
+    """
+    with open(filepath, "rb") as file:
+        file.seek(start)
+        text_file = io.TextIOWrapper(io.BytesIO(file.read(end - start)), encoding=locale.getpreferredencoding(False))
+    csv_reader = csv.reader(text_file, delimiter=delimiter)
+    parse = parse_csv_columns if columnar else parse_csv_rows
+    return parse(csv_reader, keys, filepath, line_offset)["csv_dict"]
+
+
+def render_chunk(filepath: str, start: int, end: int, line_offset: int, keys: list, delimiter: str,
+                 columns: list, compact_csv: bool):
+    """
+    Parses a chunk of a csv file and renders its JSON-LD records, in a worker process.
+    Returns the ids of the chunk and the formatted records.
+    """
+    chunk = parse_chunk(filepath, start, end, line_offset, keys, delimiter, True)
+    records = JSONLDGenerator.iter_csv_records_compact if compact_csv else JSONLDGenerator.iter_csv_records
+    text = ",".join(f"\n        {dumps_json(item, 2)}" for item in records({"csv_dict": chunk}, columns))
+    return chunk["ids"], text
+
+
+def extract_csv_chunked_batch(filepaths: list, delimiter: str = None, columnar: bool = False, workers: int = None):
+    """
+    Extracts metadata from several csv files like 'util.extract_csv_batch', parsing each file in parallel chunks.
+    Yields tuples of the file path and its extracted metadata, or the ValueError raised for that file.
+    """
+    for filepath in filepaths:
+        try:
+            yield filepath, CsvChunkReader(filepath, delimiter, workers).extract(columnar)
+        except ValueError as error:
+            yield filepath, error
@@ -0,0 +1,190 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+class ExtractionService:
+    """
+    Serves the extraction over HTTP on the local machine, so that the ontology, the context, the templates
+    and the compiled template store stay loaded between the requests, and every request only pays for the
+    extraction itself.
+
+    Requests are run in a pool of worker threads. At most 'max_requests' requests are accepted at the same
+    time, further requests are answered with 503 until one of them is finished. Requests for simulations
+    of the same folder are run one after another, as they share the files of its '__output__' folder, such
+    as 'template.json'. Uploaded simulations are extracted in their own temporary folder, so they are not
+    serialised. Invalid requests are answered with 400, and any other error of the extraction with 500.
+
+    Input:
+        - POST /extract with a json body holding the "extractor" and either
+            - "path": the path to a simulation file, or to a GROMACS run folder. The output files are
+              written to the '__output__' folder next to it, as in the interactive extraction
+            - "folder" and "files": a simulation folder, whose '__output__' folder holds 'classes.json',
+              'context.json' and 'template.json', and the uploaded simulation as a dictionary of file names
+              and their contents. A GROMACS run is named by "name". The output files are not kept
+        - GET /health
+
+    Output:
+        - The JSON-LD document of the simulation, or a json object with an "error"
+
+    ...
+
+    Attributes
+    ----------
+    extractors : dict
+        The 'process_simulation' function of each extractor name, and whether its simulations are folders
+
+    executor : ThreadPoolExecutor
+        The pool of worker threads running the extractions
+
+    requests : threading.BoundedSemaphore
+        Limits the number of requests which are accepted at the same time
+
+    locks : dict
+        A lock for each output folder, so that its files are not written by two requests at once
+
+
+    Methods
+    -------
+    __init__(extractors: dict, workers: int = None, max_requests: int = 16) -> None:
+        Initializes the class attributes and the worker pool
+
+    serve(host: str, port: int) -> None:
+        Serves the requests until interrupted
+
+    handle(request: dict) -> tuple[int, bytes]:
+        Runs the extraction of a request in the worker pool and returns the status code and the response body
+
+    extract(request: dict) -> bytes:
+        Runs the extraction of a request and returns the JSON-LD document
+
+    extract_upload(process: Callable, folders: bool, request: dict) -> bytes:
+        Writes the uploaded simulation to a temporary folder, runs its extraction there and returns the JSON-LD document
+
+    run(process: Callable, path: str, output_folder: str) -> bytes:
+        Runs the extraction of a simulation, holding the lock of its output folder, and returns the JSON-LD document
+
+    read_jsonld(path: str, output_folder: str) -> bytes:
+        Returns the JSON-LD document created for a simulation
+    """
+
+    def __init__(self, extractors: dict, workers: int = None, max_requests: int = 16):
+        self.extractors = extractors
+        self.executor = ThreadPoolExecutor(max_workers=workers or None)
+        self.requests = threading.BoundedSemaphore(max_requests)
+        self.locks = {}
+        self.locks_lock = threading.Lock()
+
+    def serve(self, host: str, port: int):
+        service = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/health":
+                    self.respond(200, json.dumps({"status": "ok"}).encode("utf8"))
+                else:
+                    self.respond(404, json.dumps({"error": "Not found"}).encode("utf8"))
+
+            def do_POST(self):
+                if self.path != "/extract":
+                    self.respond(404, json.dumps({"error": "Not found"}).encode("utf8"))
+                    return
+                try:
+                    request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                except ValueError as error:
+                    self.respond(400, json.dumps({"error": f"Invalid request: {error}"}).encode("utf8"))
+                    return
+                if not isinstance(request, dict):
+                    self.respond(400, json.dumps({"error": "Invalid request: expected a json object"}).encode("utf8"))
+                    return
+                self.respond(*service.handle(request))
+
+            def respond(self, status: int, body: bytes):
+                self.send_response(status)
+                self.send_header("Content-Type", "application/ld+json" if status == 200 else "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        server = ThreadingHTTPServer((host, port), RequestHandler)
+        print(f"Serving the extraction on http://{host}:{server.server_port}, press Ctrl+C to stop.")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("Stopped serving.")
+        finally:
+            server.server_close()
+            self.executor.shutdown()
+
+    def handle(self, request: dict):
+        if not self.requests.acquire(blocking=False):
+            return 503, json.dumps({"error": "Too many requests"}).encode("utf8")
+        try:
+            return 200, self.executor.submit(self.extract, request).result()
+        except (ValueError, KeyError, OSError) as error:
+            return 400, json.dumps({"error": str(error)}).encode("utf8")
+        except Exception as error:
+            # The client is answered whatever went wrong in the extraction
+            return 500, json.dumps({"error": f"{type(error).__name__}: {error}"}).encode("utf8")
+        finally:
+            self.requests.release()
+
+    def extract(self, request: dict):
+        if request.get("extractor") not in self.extractors:
+            raise ValueError(f"Unknown extractor '{request.get('extractor')}', expected one of {', '.join(self.extractors)}.")
+        process, folders = self.extractors[request["extractor"]]
+
+        if "files" in request:
+            return self.extract_upload(process, folders, request)
+
+        path = os.path.abspath(request["path"])
+        if folders != os.path.isdir(path):
+            raise ValueError(f"{path} is not a {'folder' if folders else 'file'}.")
+        return self.run(process, path, os.path.join(os.path.dirname(path), '__output__'))
+
+    def extract_upload(self, process: Callable, folders: bool, request: dict):
+        source_folder = os.path.join(os.path.abspath(request["folder"]), '__output__')
+        files = request["files"]
+        if not folders and len(files) != 1:
+            raise ValueError("Exactly one file has to be uploaded for this extractor.")
+
+        upload_folder = tempfile.mkdtemp()
+        try:
+            # The shared files are linked, so that their cached contents are reused
+            output_folder = os.path.join(upload_folder, '__output__')
+            os.mkdir(output_folder)
+            for file_name in ('classes.json', 'context.json', 'template.json', 'template_rules.json'):
+                if os.path.exists(os.path.join(source_folder, file_name)):
+                    os.symlink(os.path.join(source_folder, file_name), os.path.join(output_folder, file_name))
+
+            path = os.path.join(upload_folder, os.path.basename(request.get("name", "simulation")))
+            if folders:
+                os.mkdir(path)
+            for file_name, content in files.items():
+                file_path = os.path.join(path, os.path.basename(file_name)) if folders \
+                    else os.path.join(upload_folder, os.path.basename(file_name))
+                with open(file_path, "w") as file:
+                    file.write(content)
+                if not folders:
+                    path = file_path
+            process(path, output_folder, interactive=False)
+            return self.read_jsonld(path, output_folder)
+        finally:
+            shutil.rmtree(upload_folder)
+
+    def run(self, process: Callable, path: str, output_folder: str):
+        with self.locks_lock:
+            lock = self.locks.setdefault(os.path.abspath(output_folder), threading.Lock())
+        with lock:
+            process(path, output_folder, interactive=False)
+            return self.read_jsonld(path, output_folder)
+
+    @staticmethod
+    def read_jsonld(path: str, output_folder: str):
+        name = os.path.basename(path) if os.path.isdir(path) else os.path.basename(path).split('.')[0]
+        with open(os.path.join(output_folder, f'metadata_{name}.jsonld'), "rb") as file:
+            return file.read()
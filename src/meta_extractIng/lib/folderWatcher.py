@@ -0,0 +1,229 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from typing import Callable
+from .util import scan_folder, match_patterns, SKIPPED_FOLDERS
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+class FolderWatcher:
+    """
+    Watches a simulation folder and processes the simulations which are added or modified in it.
+    Changes are detected with inotify on Linux, or by periodically scanning the folder where inotify
+    is not available, for example on network file systems. A simulation is only processed once it
+    has not changed for 'debounce' seconds, so files which are still being written are not read.
+
+    A simulation is a file, or a folder of files when 'folders' is True, directly inside the folder.
+
+    Input:
+        - The simulation folder, and a function processing a single simulation
+
+    Output:
+        - Whatever the processing function creates for each new or modified simulation
+
+    ...
+
+    Attributes
+    ----------
+    folder_path : str
+        Folder which is watched
+
+    process : Callable
+        Function called with the path of each new or modified simulation
+
+    include : list
+        Glob patterns, of which the name of a simulation has to match one. All names match if not given
+
+    exclude : list
+        Glob patterns of names which are ignored
+
+    folders : bool
+        Whether the simulations are folders instead of files
+
+    debounce : float
+        Number of seconds a simulation has to stay unchanged before it is processed
+
+    poll_interval : float
+        Number of seconds between two scans of the folder, when inotify is not used
+
+    signatures : dict
+        The signature of each simulation when it was last processed, or seen in the initial scan
+
+    pending : dict
+        The simulations waiting to be processed, with their last signature and the time it was seen
+
+
+    Methods
+    -------
+    __init__(folder_path: str, process: Callable, include: list = None, exclude: list = None, folders: bool = False,
+             debounce: float = 2.0, poll_interval: float = 5.0, polling: bool = False) -> None:
+        Initializes the class attributes and sets up inotify, unless 'polling' is True
+
+    setup_inotify() -> bool:
+        Starts watching the folder and its simulation folders with inotify. Returns False if inotify is not available
+
+    add_watch(path: str) -> None:
+        Adds an inotify watch on 'path'
+
+    get_simulation(path: str) -> str:
+        Returns the simulation which a changed path belongs to, or None if it belongs to none
+
+    get_signature(path: str) -> tuple:
+        Returns the modification times and sizes of a simulation, or None if it does not exist anymore
+
+    scan() -> dict:
+        Returns the signatures of all simulations in the folder
+
+    wait_for_changes(timeout: float) -> set:
+        Waits for changes up to 'timeout' seconds and returns the simulations which may have changed
+
+    watch(process_existing: bool = False) -> None:
+        Watches the folder until interrupted, processing the existing simulations first if 'process_existing' is True
+    """
+
+    def __init__(self, folder_path: str, process: Callable, include: list = None, exclude: list = None,
+                 folders: bool = False, debounce: float = 2.0, poll_interval: float = 5.0, polling: bool = False):
+        self.folder_path = folder_path
+        self.process = process
+        self.include = include
+        self.exclude = exclude
+        self.folders = folders
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.signatures = {}
+        self.pending = {}
+        self.inotify_fd = None
+        self.watch_paths = {}
+        if not polling and not self.setup_inotify():
+            print("inotify is not available, the folder is scanned for changes instead.")
+
+    def setup_inotify(self):
+        if not sys.platform.startswith("linux"):
+            return False
+        try:
+            self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            inotify_fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return False
+        if inotify_fd < 0:
+            return False
+        self.inotify_fd = inotify_fd
+        self.add_watch(self.folder_path)
+        if self.folders:
+            for entry in scan_folder(self.folder_path, self.include, self.exclude, folders=True):
+                self.add_watch(entry.path)
+        return True
+
+    def add_watch(self, path: str):
+        watch_descriptor = self.libc.inotify_add_watch(self.inotify_fd, os.fsencode(path), WATCH_MASK)
+        if watch_descriptor < 0:
+            print(f"Error: Couldn't watch {path}: {os.strerror(ctypes.get_errno())}")
+            return
+        self.watch_paths[watch_descriptor] = path
+
+    def get_simulation(self, path: str):
+        relative_path = os.path.relpath(path, self.folder_path)
+        if relative_path.startswith(os.pardir) or relative_path == os.curdir:
+            return None
+        name = relative_path.split(os.sep)[0]
+        simulation_path = os.path.join(self.folder_path, name)
+        if name.startswith('.') or name in SKIPPED_FOLDERS or (self.exclude and match_patterns(name, self.exclude)) \
+                or (self.include and not match_patterns(name, self.include)):
+            return None
+        if self.folders != os.path.isdir(simulation_path):
+            return None
+        return simulation_path
+
+    def get_signature(self, path: str):
+        try:
+            if not self.folders:
+                stat = os.stat(path)
+                return stat.st_mtime_ns, stat.st_size
+            return tuple(sorted((entry.path, stat.st_mtime_ns, stat.st_size)
+                                for entry in scan_folder(path, max_depth=None) for stat in [entry.stat()]))
+        except FileNotFoundError:
+            return None
+
+    def scan(self):
+        return {entry.path: self.get_signature(entry.path)
+                for entry in scan_folder(self.folder_path, self.include, self.exclude, folders=self.folders)}
+
+    def wait_for_changes(self, timeout: float):
+        if self.inotify_fd is None:
+            time.sleep(min(timeout, self.poll_interval))
+            return {path for path, signature in self.scan().items() if signature != self.signatures.get(path)}
+
+        simulations = set()
+        if not select.select([self.inotify_fd], [], [], timeout)[0]:
+            return simulations
+        data = os.read(self.inotify_fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            watch_descriptor, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0")
+            offset += EVENT_HEADER.size + length
+            if mask & IN_DELETE_SELF:
+                self.watch_paths.pop(watch_descriptor, None)
+                continue
+            folder_path = self.watch_paths.get(watch_descriptor)
+            if folder_path is None:
+                continue
+            simulation_path = self.get_simulation(os.path.join(folder_path, os.fsdecode(name)))
+            if simulation_path is None:
+                continue
+            if self.folders and folder_path == self.folder_path and mask & IN_ISDIR \
+                    and mask & (IN_CREATE | IN_MOVED_TO):
+                self.add_watch(simulation_path)
+            simulations.add(simulation_path)
+        return simulations
+
+    def watch(self, process_existing: bool = False):
+        self.signatures = {} if process_existing else self.scan()
+        if process_existing:
+            self.pending = {path: (None, time.monotonic()) for path in self.scan()}
+        print(f"Watching {self.folder_path} for new simulations, press Ctrl+C to stop.")
+        try:
+            while True:
+                timeout = self.debounce if self.pending else (self.poll_interval if self.inotify_fd is None else None)
+                for path in self.wait_for_changes(timeout):
+                    if path not in self.pending:
+                        self.pending[path] = (None, time.monotonic())
+
+                for path, (signature, since) in list(self.pending.items()):
+                    new_signature = self.get_signature(path)
+                    if new_signature is None:
+                        # The simulation has been removed again
+                        del self.pending[path]
+                        self.signatures.pop(path, None)
+                    elif new_signature != signature:
+                        # Still being written, wait until it is unchanged for 'debounce' seconds
+                        self.pending[path] = (new_signature, time.monotonic())
+                    elif time.monotonic() - since >= self.debounce:
+                        del self.pending[path]
+                        if new_signature != self.signatures.get(path):
+                            self.signatures[path] = new_signature
+                            try:
+                                self.process(path)
+                            except Exception as error:
+                                print(f"Error: Couldn't process {path}: {error}")
+        except KeyboardInterrupt:
+            print("Stopped watching.")
+        finally:
+            if self.inotify_fd is not None:
+                os.close(self.inotify_fd)
+                self.inotify_fd = None
@@ -0,0 +1,295 @@
+import mmap
+import os
+import struct
+
+# Magic numbers of the energy file, at the start of its header and of each of its frames
+EDR_HEADER_MAGIC = -55555
+EDR_FRAME_MAGIC = -7777777
+# Size in bytes of each element of an energy frame block, by its xdr_datatype: int, float, double, int64, char.
+# Strings (5) have a variable size
+EDR_BLOCK_SIZES = {0: 4, 1: 4, 2: 8, 3: 8, 4: 4}
+# Size in bytes of the end of an energy file in which its last frame is searched
+EDR_TAIL_SIZE = 1 << 20
+
+class GromacsBinaryReader:
+    """
+    Reads the headers of the binary GROMACS run input (.tpr) and energy (.edr) files in pure Python, without
+    a GROMACS installation. Both files are written in the XDR format, big-endian with every item padded to
+    4 bytes. The file is memory-mapped and only the bytes of the headers are unpacked, so that only the
+    pages holding them are read from disk, however large the file is.
+
+    Of a .tpr file, only the header and the box at the start of its body are read. The integrator and the
+    number of steps are stored after the whole topology, and reading them would mean parsing it; they are
+    taken from the .mdp file instead.
+
+    Of an .edr file, the names and units of the energy terms and the first frame are read, and the last
+    frame is found by searching its magic number backwards in the last MB of the file, so that the reads
+    are bounded whatever the size of the file is. Only if 'count_frames' is set, the frames are counted by
+    reading the header of each frame and skipping its values, which reads pages of the whole file.
+
+    Input:
+        - A .tpr or .edr file
+
+    Output:
+        - A dictionary of the values read from its header
+
+    ...
+
+    Attributes
+    ----------
+    file_path : str
+        Path of the binary file
+
+    data : mmap.mmap
+        The memory-mapped content of the file
+
+    offset : int
+        Position of the next item to read
+
+    double : bool
+        Whether the reals of the file are written in double precision
+
+
+    Methods
+    -------
+    __init__(file_path: str) -> None:
+        Memory-maps the file
+
+    close() -> None:
+        Closes the memory map of the file
+
+    unpack(format: str) -> tuple:
+        Unpacks the items of the big-endian struct 'format' at the current position and moves past them
+
+    read_int() -> int:
+        Reads a 32 bit integer
+
+    read_int64() -> int:
+        Reads a 64 bit integer
+
+    read_double() -> float:
+        Reads a double precision real
+
+    read_real() -> float:
+        Reads a real, in the precision of the file
+
+    read_string() -> str:
+        Reads an XDR string, given by its length and its bytes
+
+    read_gmx_string() -> str:
+        Reads a string of the GROMACS serializer, an XDR string preceded by its length with the terminating null
+
+    read_tpr_header() -> dict:
+        Reads the header of a .tpr file and the box at the start of its body
+
+    read_tpr_box(file_version: int, file_generation: int) -> list[float]:
+        Reads the 3x3 box at the start of the body of a .tpr file, row by row
+
+    read_edr_header(count_frames: bool = False) -> dict:
+        Reads the energy terms of an .edr file and the times and steps of its first and last frame, and
+        the number of frames if 'count_frames' is set
+
+    read_last_edr_frame(start: int) -> dict:
+        Reads the header of the last complete energy frame after 'start', or returns None if none is found
+        in the last 'EDR_TAIL_SIZE' bytes
+
+    read_edr_frame() -> dict:
+        Reads the header of the energy frame at the current position and moves past its values.
+        Returns None at the end of the file
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.offset = 0
+        self.double = False
+        with open(file_path, "rb") as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(file.fileno()).st_size else b""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def unpack(self, format: str):
+        values = struct.unpack_from(f">{format}", self.data, self.offset)
+        self.offset += struct.calcsize(f">{format}")
+        return values
+
+    def read_int(self):
+        return self.unpack("i")[0]
+
+    def read_int64(self):
+        return self.unpack("q")[0]
+
+    def read_double(self):
+        return self.unpack("d")[0]
+
+    def read_real(self):
+        return self.unpack("d" if self.double else "f")[0]
+
+    def read_string(self):
+        length = self.unpack("I")[0]
+        value = bytes(self.data[self.offset:self.offset + length])
+        self.offset += (length + 3) // 4 * 4
+        return value.rstrip(b"\0").decode("utf-8", "replace")
+
+    def read_gmx_string(self):
+        self.read_int()
+        return self.read_string()
+
+    def read_tpr_header(self):
+        version = self.read_gmx_string()
+        if not version.startswith("VERSION"):
+            raise ValueError(f"{self.file_path} is not a GROMACS run input file")
+        precision = self.read_int()
+        self.double = precision == 8
+        file_version = self.read_int()
+        # Development versions 77 to 79 wrote the tag before the generation
+        file_tag = self.read_gmx_string() if 77 <= file_version <= 79 else ""
+        file_generation = self.read_int()
+        if file_version >= 81:
+            file_tag = self.read_gmx_string()
+
+        header = {
+            "GROMACS version": version[len("VERSION"):].strip(),
+            "precision": "double" if self.double else "single",
+            "tpx version": file_version,
+            "tpx generation": file_generation,
+            "file tag": file_tag,
+            "number of atoms": self.read_int(),
+            "temperature-coupling groups": self.read_int()
+        }
+        if file_version < 62:
+            self.unpack("i" + ("d" if self.double else "f"))
+        if file_version >= 79:
+            header["fep state"] = self.read_int()
+        header["lambda"] = self.read_real()
+        flags = dict(zip(["input record", "topology", "coordinates", "velocities", "forces", "box"],
+                         self.unpack("6i")))
+        header.update({f"has {name}": bool(flag) for name, flag in flags.items()})
+        if flags["box"]:
+            header["box (nm)"] = self.read_tpr_box(file_version, file_generation)
+        return header
+
+    def read_tpr_box(self, file_version: int, file_generation: int):
+        # Since the size of the body is stored in the header (tpx version 119, generation 27), the body is
+        # serialized in memory and is not XDR; its byte order is told apart by the box, which is lower triangular
+        if file_version >= 119 and file_generation >= 27:
+            self.read_int64()
+            real = "d" if self.double else "f"
+            boxes = [struct.unpack_from(f"{order}9{real}", self.data, self.offset) for order in "><"]
+            box = next((box for box in boxes if box[1] == box[2] == box[5] == 0
+                        and all(1e-3 < box[index] < 1e6 for index in (0, 4, 8))), boxes[0])
+        else:
+            box = self.unpack(f"9{'d' if self.double else 'f'}")
+        return [round(value, 6) for value in box]
+
+    def read_edr_header(self, count_frames: bool = False):
+        magic = self.read_int()
+        if magic > 0:
+            # Files of the first version start with the number of terms
+            file_version, term_count = 1, magic
+        elif magic == EDR_HEADER_MAGIC:
+            file_version, term_count = self.read_int(), self.read_int()
+        else:
+            raise ValueError(f"{self.file_path} is not a GROMACS energy file")
+
+        units = {}
+        for _ in range(term_count):
+            name = self.read_string()
+            units[name] = self.read_string() if file_version >= 2 else "kJ/mol"
+
+        # The precision of the reals is found from the first real of the first frame, which is -2e10
+        if file_version > 1 and self.offset + 8 <= len(self.data):
+            self.double = struct.unpack_from(">f", self.data, self.offset)[0] > -1e10
+
+        header = {
+            "energy file version": file_version,
+            "precision": "double" if self.double else "single",
+            "number of energy terms": term_count,
+            "energy terms": ", ".join(units),
+            "energy term units": units
+        }
+        first_frame = last_frame = frame = self.read_edr_frame()
+        if count_frames:
+            frame_count = 0
+            while frame is not None:
+                frame_count += 1
+                last_frame = frame
+                frame = self.read_edr_frame()
+            header["number of frames"] = frame_count
+        elif first_frame is not None:
+            last_frame = self.read_last_edr_frame(self.offset) or first_frame
+        if first_frame is not None:
+            header.update({"first time (ps)": first_frame["time"], "last time (ps)": last_frame["time"],
+                           "first step": first_frame["step"], "last step": last_frame["step"]})
+        return header
+
+    def read_last_edr_frame(self, start: int):
+        # Frames of the first version have no magic number, and their last frame is not searched
+        magic = struct.pack(">i", EDR_FRAME_MAGIC)
+        lower = max(start, len(self.data) - EDR_TAIL_SIZE)
+        position = len(self.data)
+        while True:
+            position = self.data.rfind(magic, lower, position)
+            if position < 0:
+                return None
+            # The magic number follows the first real of the frame; the last frame may still be incomplete
+            self.offset = position - (8 if self.double else 4)
+            if self.offset >= start and position % 4 == 0:
+                frame = self.read_edr_frame()
+                # The magic number may also be found within the values of a frame
+                if frame is not None and frame["version"] > 1:
+                    return frame
+
+    def read_edr_frame(self):
+        if self.offset >= len(self.data):
+            return None
+        try:
+            first_real = self.read_real()
+            if first_real > -1e10:
+                # Frames of the first version start with their time
+                frame = {"version": 1, "time": first_real, "step": self.read_int(), "sum count": 0}
+            else:
+                if self.read_int() != EDR_FRAME_MAGIC:
+                    return None
+                version = self.read_int()
+                frame = {"version": version, "time": self.read_double(), "step": self.read_int64(),
+                         "sum count": self.read_int()}
+                if version >= 3:
+                    self.read_int64()
+                if version >= 5:
+                    self.read_double()
+            term_count = self.read_int()
+            self.read_int()
+            blocks = []
+            for _ in range(self.read_int()):
+                if frame["version"] < 4:
+                    # Blocks of older versions hold a single list of reals
+                    blocks.append([(2 if self.double else 1, self.read_int())])
+                else:
+                    self.read_int()
+                    blocks.append([self.unpack("2i") for _ in range(self.read_int())])
+            self.unpack("3i")
+
+            # The values are skipped: each energy, and its average and sum if the frame holds sums
+            values_per_term = 4 if frame["version"] == 1 else 3 if frame["sum count"] > 0 else 1
+            self.offset += term_count * values_per_term * (8 if self.double else 4)
+            for block in blocks:
+                for data_type, count in block:
+                    if data_type in EDR_BLOCK_SIZES:
+                        self.offset += count * EDR_BLOCK_SIZES[data_type]
+                    else:
+                        for _ in range(count):
+                            self.read_gmx_string()
+        except struct.error:
+            # The last frame of a file which is still being written may be incomplete
+            return None
+        if self.offset > len(self.data):
+            return None
+        return frame
@@ -0,0 +1,354 @@
+import re
+from abc import ABC, abstractmethod
+
+# Settings of the run in the body of a job script, whatever the scheduler is
+OMP_NUM_THREADS = re.compile(r'^\s*(?:export\s+)?OMP_NUM_THREADS=["\']?(\d+)', re.MULTILINE)
+MDRUN_OPTION = {option: re.compile(rf'\bmdrun\b[^\n]*?\s-{option}\s+(\d+)') for option in ("ntomp", "ntmpi")}
+MPI_RANKS = re.compile(r'\b(?:mpirun|mpiexec|srun)\b[^\n]*?\s(?:-np|-n|--ntasks(?:=|\s+))\s*(\d+)')
+# Resource lists of PBS and Moab, for example 'nodes=2:ppn=16:gpus=2' or 'select=2:ncpus=16:ngpus=1'
+RESOURCE_PAIR = re.compile(r'(\w+)=([^:,\s]+(?::\d+)*)')
+MEMORY = re.compile(r'(\d+(?:\.\d+)?)\s*([kmgt]?)i?b?', re.IGNORECASE)
+MEMORY_UNITS = {"b": 1 / 1024 / 1024, "k": 1 / 1024, "m": 1, "g": 1024, "t": 1024 * 1024}
+SACCT_TIME = re.compile(r'(?:(\d+)-)?(\d+(?::\d+){0,2}(?:\.\d+)?)')
+SLURM_TIME = re.compile(r'(?:(\d+)-)?(\d+)(?::(\d+))?(?::(\d+))?')
+
+class JobScriptParser(ABC):
+    """
+    Parses the directives of a job script of one batch scheduler, and the settings of the run in its body.
+    Each scheduler has a subclass with the compiled pattern of its directive lines, and the parser of a job
+    script is the first one in 'JOB_SCRIPT_PARSERS' whose directives it contains, see 'get_job_script_parser'.
+
+    Input:
+        - The content of a job script, for example 'run.job'
+
+    Output:
+        - The directives of the job script, as in the 'job_data' of the GROMACS extractor
+        - The resources of the job in a common form, and the settings of the run
+
+    ...
+
+    Attributes
+    ----------
+    name : str
+        Name of the scheduler
+
+    directive : re.Pattern
+        Pattern of the directive lines, with the options of a line as its group
+
+
+    Methods
+    -------
+    matches(content: str) -> bool:
+        Returns whether the job script has directives of this scheduler
+
+    iter_options(content: str) -> Iterator[str]:
+        Yields the options of each directive line
+
+    parse_directives(content: str) -> dict[str, str]:
+        Returns the options of the directives as they are written
+
+    parse_resources(content: str) -> dict:
+        Returns the nodes, tasks, walltime, memory, GPUs, name, queue and account of the job, and the run settings
+
+    parse_run_settings(content: str) -> dict:
+        Returns 'OMP_NUM_THREADS', the '-ntomp' and '-ntmpi' options of 'gmx mdrun' and the number of MPI ranks
+
+    parse_options(content: str) -> dict[str, str]:
+        Returns the resource pairs of all '-l' lists and the name, queue and account of the job, in PBS and MSUB
+
+    parse_walltime(value: str) -> int:
+        Returns a walltime '[[HH:]MM:]SS' in seconds, or None if it is not a time
+
+    parse_memory(value: str, default_unit: str = "m") -> float:
+        Returns a memory size such as '64gb' or '4000M' in MB
+    """
+
+    name = ""
+    directive = None
+
+    def matches(self, content: str):
+        return self.directive.search(content) is not None
+
+    def iter_options(self, content: str):
+        for match in self.directive.finditer(content):
+            yield match.group(1).split('#')[0].strip()
+
+    @abstractmethod
+    def parse_directives(self, content: str):
+        pass
+
+    @abstractmethod
+    def parse_resources(self, content: str):
+        pass
+
+    @staticmethod
+    def parse_run_settings(content: str):
+        settings = {}
+        match = OMP_NUM_THREADS.search(content)
+        if match:
+            settings["OMP_NUM_THREADS"] = int(match.group(1))
+        for option, pattern in MDRUN_OPTION.items():
+            match = pattern.search(content)
+            if match:
+                settings[f"mdrun {option}"] = int(match.group(1))
+        match = MPI_RANKS.search(content)
+        if match:
+            settings["MPI ranks"] = int(match.group(1))
+        return settings
+
+    @staticmethod
+    def parse_walltime(value: str):
+        if not all(part.isdigit() for part in value.split(':')):
+            return None
+        seconds = 0
+        for part in value.split(':'):
+            seconds = seconds * 60 + int(part)
+        return seconds
+
+    @staticmethod
+    def parse_memory(value: str, default_unit: str = "m"):
+        match = MEMORY.fullmatch(value.strip())
+        if not match:
+            return None
+        return float(match.group(1)) * MEMORY_UNITS[(match.group(2) or default_unit).lower()]
+
+
+class PBSJobScriptParser(JobScriptParser):
+    """
+    Parses '#PBS' directives, with the resources given by '-l' lists such as 'nodes=2:ppn=16' or
+    'select=2:ncpus=16:mpiprocs=16:ngpus=1:mem=64gb', and '-N', '-q' and '-A' for the name, queue and account.
+    """
+
+    name = "PBS"
+    directive = re.compile(r'^#PBS\s+(.*)$', re.MULTILINE)
+    options = {"-N": "name", "-q": "queue", "-A": "account"}
+
+    def parse_directives(self, content: str):
+        return self.parse_options(content)
+
+    def parse_options(self, content: str):
+        options = {}
+        for line_options in self.iter_options(content):
+            flag, _, value = line_options.partition(' ')
+            if flag == '-l':
+                options.update(RESOURCE_PAIR.findall(value))
+            elif flag in self.options:
+                options[self.options[flag]] = value.strip()
+        return options
+
+    def parse_resources(self, content: str):
+        directives = self.parse_options(content)
+        resources = {}
+        nodes = directives.get("nodes", directives.get("select"))
+        if nodes and nodes.isdigit():
+            resources["nodes"] = int(nodes)
+        tasks_per_node = directives.get("ppn", directives.get("mpiprocs", directives.get("ncpus")))
+        if tasks_per_node and tasks_per_node.isdigit():
+            resources["tasks per node"] = int(tasks_per_node)
+            resources["tasks"] = resources.get("nodes", 1) * int(tasks_per_node)
+        if self.parse_walltime(directives.get("walltime", "")) is not None:
+            resources["walltime (s)"] = self.parse_walltime(directives["walltime"])
+        # The memory of a 'select' chunk is given per chunk, like '--mem' of SLURM per node, and 'pmem' per process
+        if self.parse_memory(directives.get("mem", ""), "b") is not None:
+            chunks = resources.get("nodes", 1) if "select" in directives else 1
+            resources["memory (MB)"] = self.parse_memory(directives["mem"], "b") * chunks
+        elif self.parse_memory(directives.get("pmem", ""), "b") is not None:
+            resources["memory (MB)"] = self.parse_memory(directives["pmem"], "b") * resources.get("tasks", 1)
+        gpus = directives.get("gpus", directives.get("ngpus"))
+        if gpus and gpus.isdigit():
+            resources["gpus"] = int(gpus) * resources.get("nodes", 1)
+        for key in ("name", "queue", "account"):
+            if key in directives:
+                resources[f"job {key}"] = directives[key]
+        resources.update(self.parse_run_settings(content))
+        return resources
+
+
+class MSUBJobScriptParser(PBSJobScriptParser):
+    """
+    Parses '#MSUB' directives of Moab, which have the options and resource lists of PBS. The directives are
+    the resource pairs of the first '-l' line, as they have always been extracted into 'job_data'.
+    """
+
+    name = "MSUB"
+    directive = re.compile(r'^#MSUB\s+(.*)$', re.MULTILINE)
+    first_resource_list = re.compile(r'#MSUB -l (.+)')
+
+    def parse_directives(self, content: str):
+        match = self.first_resource_list.search(content)
+        if not match:
+            return {}
+        return {key: value for key, value in re.findall(r'(\w+)=(\w+)', match.group(1))}
+
+
+class SBATCHJobScriptParser(JobScriptParser):
+    """
+    Parses '#SBATCH' directives of SLURM, in their long ('--nodes=2') and short ('-N 2' or '-N2') forms.
+    """
+
+    name = "SLURM"
+    directive = re.compile(r'^#SBATCH\s+(.*)$', re.MULTILINE)
+    short_options = {"-N": "nodes", "-n": "ntasks", "-c": "cpus-per-task", "-t": "time", "-J": "job-name",
+                     "-p": "partition", "-A": "account", "-G": "gpus"}
+
+    def parse_directives(self, content: str):
+        directives = {}
+        for options in self.iter_options(content):
+            if options.startswith('--'):
+                option, _, value = options.partition('=') if '=' in options else options.partition(' ')
+            else:
+                # The value of a short option may be attached to it, as in '-N2' or '-t1:00:00'
+                option, value = options[:2], options[2:]
+            option = self.short_options.get(option, option.lstrip('-'))
+            directives[option] = value.strip()
+        return directives
+
+    def parse_resources(self, content: str):
+        directives = self.parse_directives(content)
+        resources = {}
+        for key, option in (("nodes", "nodes"), ("tasks", "ntasks"), ("tasks per node", "ntasks-per-node"),
+                            ("cpus per task", "cpus-per-task")):
+            value = directives.get(option, "").split('-')[0]
+            if value.isdigit():
+                resources[key] = int(value)
+        if "tasks" not in resources and "tasks per node" in resources:
+            resources["tasks"] = resources.get("nodes", 1) * resources["tasks per node"]
+        if self.parse_slurm_time(directives.get("time", "")) is not None:
+            resources["walltime (s)"] = self.parse_slurm_time(directives["time"])
+        if "mem" in directives and self.parse_memory(directives["mem"], "m") is not None:
+            resources["memory (MB)"] = self.parse_memory(directives["mem"], "m") * resources.get("nodes", 1)
+        elif "mem-per-cpu" in directives and self.parse_memory(directives["mem-per-cpu"], "m") is not None:
+            cpus = resources.get("tasks", 1) * resources.get("cpus per task", 1)
+            resources["memory (MB)"] = self.parse_memory(directives["mem-per-cpu"], "m") * cpus
+        gpus = self.parse_gpus(directives)
+        if gpus:
+            resources["gpus"] = gpus
+        for key, option in (("job name", "job-name"), ("queue", "partition"), ("account", "account")):
+            if directives.get(option):
+                resources[key if key != "queue" else "job queue"] = directives[option]
+        resources.update(self.parse_run_settings(content))
+        return resources
+
+    @staticmethod
+    def parse_slurm_time(value: str):
+        # 'minutes', 'minutes:seconds', 'hours:minutes:seconds', 'days-hours', 'days-hours:minutes[:seconds]'
+        match = SLURM_TIME.fullmatch(value.strip())
+        if not match:
+            return None
+        days, first, second, third = (int(group) if group else None for group in match.groups())
+        if days is not None:
+            return ((days * 24 + first) * 60 + (second or 0)) * 60 + (third or 0)
+        if third is not None:
+            return (first * 60 + second) * 60 + third
+        return first * 60 + (second or 0)
+
+    @staticmethod
+    def parse_gpus(directives: dict):
+        # '--gres=gpu:4' or 'gpu:a100:4' per node, '--gpus-per-node=4', or '--gpus=4' in total
+        gres = re.search(r'gpu(?::\w+)?:(\d+)', directives.get("gres", ""))
+        per_node = gres.group(1) if gres else directives.get("gpus-per-node", "").split(':')[-1]
+        if per_node.isdigit():
+            nodes = directives.get("nodes", "1").split('-')[0]
+            return int(per_node) * (int(nodes) if nodes.isdigit() else 1)
+        total = directives.get("gpus", "").split(':')[-1]
+        return int(total) if total.isdigit() else None
+
+
+# The parsers of the supported schedulers, in the order in which they are tried
+JOB_SCRIPT_PARSERS = [MSUBJobScriptParser(), SBATCHJobScriptParser(), PBSJobScriptParser()]
+
+def get_job_script_parser(content: str):
+    """
+    Returns the parser of the first scheduler in 'JOB_SCRIPT_PARSERS' whose directives the job script has.
+
+    Parameters
+    ----------
+    content: str
+        Content of the job script
+
+    Returns
+    ----------
+    JobScriptParser
+        The parser of the job script, or None if it has no directives of a supported scheduler
+    """
+    return next((parser for parser in JOB_SCRIPT_PARSERS if parser.matches(content)), None)
+
+
+def parse_sacct(content: str):
+    """
+    Parses a text dump of SLURM's 'sacct', either in its default fixed-width form, with the column widths
+    given by the line of dashes under the header, or with '--parsable' or '--parsable2' columns separated by '|'.
+    The job's own line gives the elapsed time, the allocated cores and nodes and the state, and the largest
+    'MaxRSS' of its steps the memory used.
+
+    Parameters
+    ----------
+    content: str
+        Output of 'sacct', for example of 'sacct -j <job> --format=JobID,Elapsed,NCPUS,NNodes,TotalCPU,MaxRSS,State'
+
+    Returns
+    ----------
+    dict
+        The accounting figures of the job, empty if the dump has no job line
+    """
+    lines = [line for line in content.splitlines() if line.strip()]
+    if not lines:
+        return {}
+    if '|' in lines[0]:
+        header = [column.strip() for column in lines[0].split('|')]
+        rows = [dict(zip(header, (value.strip() for value in line.split('|')))) for line in lines[1:]]
+    else:
+        dashes = next((index for index, line in enumerate(lines) if set(line.strip()) <= {'-', ' '}), None)
+        if dashes is None:
+            return {}
+        # The last column takes the rest of the line
+        spans = [match.span() for match in re.finditer(r'-+', lines[dashes])]
+        spans[-1] = (spans[-1][0], None)
+        header = [lines[dashes - 1][start:end].strip() for start, end in spans]
+        rows = [dict(zip(header, (line[start:end].strip() for start, end in spans))) for line in lines[dashes + 1:]]
+
+    job = next((row for row in rows if row.get("JobID") and '.' not in row["JobID"]), rows[0] if rows else None)
+    if job is None:
+        return {}
+    accounting = {}
+    if job.get("JobID"):
+        accounting["job id"] = job["JobID"]
+    if job.get("State"):
+        accounting["state"] = job["State"]
+    for key, column in (("elapsed (s)", "Elapsed"), ("total CPU time (s)", "TotalCPU")):
+        if parse_sacct_time(job.get(column, "")) is not None:
+            accounting[key] = parse_sacct_time(job[column])
+    for key, column in (("allocated cores", "NCPUS"), ("allocated nodes", "NNodes")):
+        if job.get(column, "").isdigit():
+            accounting[key] = int(job[column])
+    max_rss = [JobScriptParser.parse_memory(row["MaxRSS"], "k") for row in rows if row.get("MaxRSS")]
+    max_rss = [value for value in max_rss if value is not None]
+    if max_rss:
+        accounting["max RSS (MB)"] = round(max(max_rss), 1)
+    if "elapsed (s)" in accounting and "allocated cores" in accounting:
+        accounting["core-hours"] = round(accounting["elapsed (s)"] * accounting["allocated cores"] / 3600, 3)
+    return accounting
+
+
+def parse_sacct_time(value: str):
+    """
+    Returns a time of 'sacct', '[DD-][HH:]MM:SS[.mmm]', in seconds.
+
+    Parameters
+    ----------
+    value: str
+        The time as written by 'sacct'
+
+    Returns
+    ----------
+    float
+        The time in seconds, or None if it is not a time, for example 'UNLIMITED'
+    """
+    match = SACCT_TIME.fullmatch(value.strip())
+    if not match:
+        return None
+    days, time = match.groups()
+    seconds = 0.0
+    for part in time.split(':'):
+        seconds = seconds * 60 + float(part)
+    return seconds + (int(days) * 86400 if days else 0)
@@ -0,0 +1,117 @@
+import glob
+import os
+from urllib.parse import quote
+from .util import load_json, save_json_stream, scan_folder
+from .jsonldGenerator import JSONLDGenerator
+from .rdfWriter import RDFWriter
+
+class JSONLDDataset:
+    """
+    Aggregates the runs of a simulation folder into a single JSON-LD dataset document, or into shards of
+    'shard_size' runs each, with one shared '@context' instead of one copy of it in each run's document.
+    The local ids of each run are prefixed by the run name, so that the graphs of all runs can be merged
+    without collisions, for example 'local:simulation%201/variable_ref_t_1'. The documents are written in
+    a streaming fashion, one run at a time, so that the whole dataset is never held in memory.
+
+    Input:
+        - 'metadata_<run>.json' and 'extract_<run>.json' files of each run in the output folder
+        - 'context.json' in the output folder
+
+    Output:
+        - 'dataset.jsonld' in the output folder, or 'dataset_1.jsonld', 'dataset_2.jsonld', ... when sharded
+        - 'dataset.nt' or 'dataset.nq' next to each document, if 'rdf_export' is set
+
+    ...
+
+    Attributes
+    ----------
+    output_folder : str
+        Output folder of a simulation folder, holding the metadata and extract files of its runs
+
+    compact_csv : bool
+        Whether csv runs are written in the compact layout, with shared column nodes
+
+    shard_size : int
+        Number of runs in each document, all runs are written into a single document if 0
+
+    context_reference : str
+        How the context is given, as in 'JSONLDGenerator.get_context': embedded if empty, or referenced
+        by its URL if "remote", or by the 'context.json' file if "file"
+
+    rdf_export : str
+        Whether the graph of each document is also written as N-Triples ("nt"), or as N-Quads ("nq") with
+        each run in its own named graph
+
+
+    Methods
+    -------
+    __init__(output_folder: str, compact_csv: bool = False, shard_size: int = 0, context_reference: str = "",
+             rdf_export: str = "") -> None:
+        Initializes the class attributes
+
+    find_runs() -> list[tuple[str, str, str]]:
+        Returns the name, the metadata file path and the extract file path of each run, sorted by name
+
+    iter_run_graph(run: str, metadata_file_path: str, extract_file_path: str) -> Iterator:
+        Yields the graph nodes of a run, with its local ids prefixed by the run name
+
+    write() -> list:
+        Writes the dataset documents and returns their file paths
+
+    write_rdf(shard: list, file_path: str) -> str:
+        Writes the graphs of the runs of a shard as N-Triples or N-Quads and returns the file path
+    """
+
+    def __init__(self, output_folder: str, compact_csv: bool = False, shard_size: int = 0, context_reference: str = "",
+                 rdf_export: str = ""):
+        self.output_folder = output_folder
+        self.compact_csv = compact_csv
+        self.shard_size = shard_size
+        self.context_reference = context_reference
+        self.rdf_export = rdf_export
+
+    def find_runs(self):
+        runs = []
+        for entry in scan_folder(self.output_folder, ['metadata_*.json']):
+            run = entry.name[len('metadata_'):-len('.json')]
+            extract_file_path = os.path.join(self.output_folder, f'extract_{run}.json')
+            if os.path.exists(extract_file_path):
+                runs.append((run, entry.path, extract_file_path))
+        return sorted(runs)
+
+    def iter_run_graph(self, run: str, metadata_file_path: str, extract_file_path: str):
+        generator = JSONLDGenerator(metadata_file_path, extract_file_path, compact_csv=self.compact_csv)
+        yield from generator.iter_jsonld_graph(load_json(metadata_file_path), load_json(extract_file_path),
+                                               f"{quote(run, safe='')}/")
+
+    def write(self):
+        context = JSONLDGenerator.get_context(load_json(os.path.join(self.output_folder, 'context.json')),
+                                              self.context_reference)
+
+        # Shards of an earlier, differently sharded dataset are removed
+        for extension in ('jsonld', 'nt', 'nq'):
+            for file_path in glob.glob(os.path.join(glob.escape(self.output_folder), f'dataset*.{extension}')):
+                os.remove(file_path)
+
+        runs = self.find_runs()
+        shard_size = self.shard_size or max(len(runs), 1)
+        shards = [runs[start:start + shard_size] for start in range(0, len(runs), shard_size)] or [[]]
+        file_paths = []
+        for index, shard in enumerate(shards, 1):
+            file_name = 'dataset.jsonld' if len(shards) == 1 else f'dataset_{index}.jsonld'
+            file_path = os.path.join(self.output_folder, file_name)
+            items = (item for run in shard for item in self.iter_run_graph(*run))
+            save_json_stream({"@context": context}, "@graph", items, file_path)
+            file_paths.append(file_path)
+            if self.rdf_export:
+                file_paths.append(self.write_rdf(shard, file_path.replace('.jsonld', f'.{self.rdf_export}')))
+        return file_paths
+
+    def write_rdf(self, shard: list, file_path: str):
+        writer = RDFWriter(JSONLDGenerator.get_context(load_json(os.path.join(self.output_folder, 'context.json'))))
+        if self.rdf_export == "nq":
+            writer.write_graphs(((f"local:{quote(run[0], safe='')}", self.iter_run_graph(*run)) for run in shard),
+                                file_path)
+        else:
+            writer.write((item for run in shard for item in self.iter_run_graph(*run)), file_path)
+        return file_path
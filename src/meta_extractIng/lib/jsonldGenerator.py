@@ -1,104 +1,232 @@
-from .util import save_json, load_json
+from .util import save_json, save_json_stream, load_json, load_json_cached, load_config
+from .rdfWriter import RDFWriter
+from .models import TemplateEntry
+from urllib.parse import quote
 import os
 
 class JSONLDGenerator:
-    def __init__(self, metadata_file_path: str, extract_file_path: str):
+    def __init__(self, metadata_file_path: str, extract_file_path: str, streaming: bool = False,
+                 compact_csv: bool = False, context_reference: str = ""):
         self.metadata_file_path = metadata_file_path
         self.extract_file_path = extract_file_path
         self.parent_folder = os.path.dirname(self.metadata_file_path)
         self.context_file_path = f'{self.parent_folder}/context.json'
         self.jsonld_file_path = self.metadata_file_path.replace('.json','.jsonld')
-
-    def start(self):
-        latest_context = load_json(self.context_file_path )
-        metadata = load_json(self.metadata_file_path)
-        extract = load_json(self.extract_file_path)
+        self.streaming = streaming
+        self.compact_csv = compact_csv
+        self.context_reference = context_reference
+
+    def start(self, metadata=None, extract=None):
+        latest_context = load_json_cached(self.context_file_path)
+        # Metadata and extract which are already in memory are not loaded again
+        metadata = load_json(self.metadata_file_path) if metadata is None else metadata
+        extract = load_json(self.extract_file_path) if extract is None else extract
         jsonld = {}
-        if "csv_dict" in extract:
+        if "csv_dict" in extract and self.compact_csv:
+            jsonld = self.process_csv_metadata_compact(metadata, extract, latest_context)
+        elif "csv_dict" in extract:
             jsonld = self.process_csv_metadata(metadata, extract, latest_context)
+        elif self.streaming:
+            # Nodes are written one by one, without building the whole graph in memory
+            save_json_stream({"@context": self.get_context(latest_context, self.context_reference)}, "@graph",
+                             self.iter_graph(self.build_node_table(metadata)), self.jsonld_file_path)
+            return
         else:
             jsonld = self.process_metadata(metadata, latest_context)
         save_json(jsonld, self.jsonld_file_path)
     
+    def write_rdf(self, rdf_format, metadata=None, extract=None):
+        # The same graph as in the JSON-LD file, written as 'nt' (N-Triples) or as 'nq' (N-Quads)
+        # with the run as its named graph, next to the JSON-LD file
+        metadata = load_json(self.metadata_file_path) if metadata is None else metadata
+        extract = load_json(self.extract_file_path) if extract is None else extract
+        run = os.path.basename(self.metadata_file_path)[len('metadata_'):-len('.json')]
+        rdf_file_path = self.jsonld_file_path.replace('.jsonld', f'.{rdf_format}')
+        writer = RDFWriter(self.get_context(load_json_cached(self.context_file_path)))
+        writer.write(self.iter_jsonld_graph(metadata, extract), rdf_file_path,
+                     f"local:{quote(run, safe='')}" if rdf_format == "nq" else None)
+        return rdf_file_path
+
     def process_metadata(self, metadata, latest_context):
         jsonld = {
-            "@context": latest_context['@context'],
+            "@context": self.get_context(latest_context, self.context_reference),
             "@graph": []
         }
+        jsonld["@graph"] = list(self.iter_graph(self.build_node_table(metadata)))
 
-        # Adding 'local' to '@context'
-        jsonld['@context']['local'] = "https://local-domain.org/"
+        return jsonld
 
+    @staticmethod
+    def get_context(latest_context, context_reference=""):
+        # The context is embedded with 'local' added to a copy of it, as the loaded context is shared, or it is
+        # referenced by the URL it was downloaded from or by the 'context.json' file next to the JSON-LD file
+        local = "https://local-domain.org/"
+        if context_reference == "remote":
+            return [load_config()["context_URL"], {"local": local}]
+        if context_reference == "file":
+            return ["context.json", {"local": local}]
+        context = dict(latest_context['@context'])
+        context['local'] = local
+        return context
+
+    def build_node_table(self, metadata, id_prefix=""):
+        # Single pass over the template keys: each key is normalised once, and its id is
+        # registered by position, by name and by its full 'name: type' key. Only the ids are kept
+        # next to the template entries, the graph items are built one by one in 'iter_graph'
+        node_table = {"entries": [], "ids": [], "names": {}}
         type_counters = {}  # Dictionary to track the counts of each @type
 
-        id_list = []
-
-        for key, value in metadata.items():
-            variable_name, variable_type = key.split(":", 1)
-            variable_name = variable_name.strip().lower()
-            variable_type = variable_type.strip().lower()
+        for entry in TemplateEntry.from_json(metadata):
+            variable_name = entry.name.lower()
+            variable_type = entry.type.lower()
 
             # Increment the counter for this @type or set it to 1 if it's the first occurrence
             type_counters[variable_type] = type_counters.get(variable_type, 0) + 1
 
-            id = f"local:{variable_type}_{variable_name}_{type_counters[variable_type]}"
-
-            id_list.append(id)
-
-        index = 0
-
-        for key, value in metadata.items():
-            variable_name, variable_type = key.split(":", 1)
-            variable_name = variable_name.strip().lower()
-            variable_type = variable_type.strip().lower()
-
-            item = {
-                "@id": id_list[index],
-                "@type": variable_type,
-                "label": variable_name
-            }
+            id = f"local:{id_prefix}{variable_type}_{variable_name}_{type_counters[variable_type]}"
 
-            for prop_key, prop_val in value.items():
-                if prop_val.startswith("@"):
-                    id_index = int(prop_val[1:])
-                    prop_val = id_list[id_index]
-                item[prop_key] = prop_val
+            node_table["entries"].append(entry)
+            node_table["ids"].append(id)
+            node_table["names"].setdefault(variable_name, id)
+            node_table["names"].setdefault(f"{variable_name}: {variable_type}", id)
 
-            jsonld["@graph"].append(item)
+        return node_table
 
-            index += 1
+    def resolve_reference(self, reference, node_table):
+        # '@N' refers to the N-th node of the template, '@name' or '@name: type' to a node by its key
+        target = reference[1:].strip()
+        if target.isdigit():
+            if int(target) < len(node_table["ids"]):
+                return node_table["ids"][int(target)]
+        else:
+            name, _, variable_type = target.partition(":")
+            name = name.strip().lower()
+            key = f"{name}: {variable_type.strip().lower()}" if variable_type else name
+            if key in node_table["names"]:
+                return node_table["names"][key]
+        raise ValueError(f"Dangling node reference '{reference}' in {self.metadata_file_path}")
+
+    def iter_graph(self, node_table):
+        for entry, id in zip(node_table["entries"], node_table["ids"]):
+            item = {"@id": id, "@type": entry.type.lower(), "label": entry.name.lower()}
+            item.update(entry.properties)
+            for prop_key, prop_val in entry.properties.items():
+                if isinstance(prop_val, str) and prop_val.startswith("@"):
+                    item[prop_key] = self.resolve_reference(prop_val, node_table)
+            yield item
+
+    def iter_jsonld_graph(self, metadata, extract, id_prefix=""):
+        # The graph of a single run without its context, with 'id_prefix' in front of all its local ids
+        if "csv_dict" in extract:
+            columns = self.build_csv_columns(metadata)
+            if self.compact_csv:
+                yield from self.iter_csv_column_nodes(columns, id_prefix)
+                yield from self.iter_csv_records_compact(extract, columns, id_prefix)
+            else:
+                yield from self.iter_csv_records(extract, columns, id_prefix)
+        else:
+            yield from self.iter_graph(self.build_node_table(metadata, id_prefix))
 
-        return jsonld
-    
     def process_csv_metadata(self, metadata, extract, latest_context):
         jsonld = {
-            "@context": latest_context['@context'],
+            "@context": self.get_context(latest_context, self.context_reference),
             "@graph": []
         }
-        # Adding 'local' to '@context'
-        jsonld['@context']['local'] = "https://local-domain.org/"
-        for id, row_values in extract['csv_dict']['rows'].items():
+        columns = self.build_csv_columns(metadata)
+        jsonld["@graph"] = list(self.iter_csv_records(extract, columns))
+        return jsonld
+
+    def process_csv_metadata_compact(self, metadata, extract, latest_context):
+        # Constant properties of each column are emitted once in a shared column node,
+        # and each row only carries its '#Value' properties and a reference to the column node
+        jsonld = {
+            "@context": self.get_context(latest_context, self.context_reference),
+            "@graph": []
+        }
+        columns = self.build_csv_columns(metadata)
+        jsonld["@graph"] = list(self.iter_csv_column_nodes(columns))
+        jsonld["@graph"].extend(self.iter_csv_records_compact(extract, columns))
+        return jsonld
+
+    @staticmethod
+    def iter_csv_records(extract, columns, id_prefix=""):
+        for id, row_values in JSONLDGenerator.iter_csv_rows(extract, columns):
             data = []
             header_item = {
-                "@id": f"local:{id}",
+                "@id": f"local:{id_prefix}{id}",
                 "@type": "record",
                 "data": []
             }
-            for key, value in metadata.items():
-                variable_name_original, variable_type = key.split(":", 1)
-                variable_name = variable_name_original.strip().lower()
-                variable_type = variable_type.strip().lower()
+            for (_, variable_name, variable_type, value), row_value in zip(columns, row_values):
                 row_item = {
-                    "@id": f"local:{variable_name}_{id}",
+                    "@id": f"local:{id_prefix}{variable_name}_{id}",
                     "@type": variable_type,
                     "label": variable_name
                 }
-                if variable_name_original in row_values:
+                if row_value is not None:
                     for prop_key, prop_val in value.items():
                         if prop_val.startswith("#"):
-                            prop_val = row_values[variable_name_original]
+                            prop_val = row_value
                         row_item[prop_key] = prop_val
                     data.append(row_item)  
             header_item["data"] = data
-            jsonld["@graph"].append(header_item)
-        return jsonld
\ No newline at end of file
+            yield header_item
+
+    @staticmethod
+    def iter_csv_column_nodes(columns, id_prefix=""):
+        for _, variable_name, variable_type, value in columns:
+            column_item = {
+                "@id": f"local:{id_prefix}column_{variable_name}",
+                "@type": variable_type,
+                "label": variable_name
+            }
+            column_item.update({k: v for k, v in value.items() if not v.startswith("#")})
+            yield column_item
+
+    @staticmethod
+    def iter_csv_records_compact(extract, columns, id_prefix=""):
+        row_columns = [(variable_name, f"local:{id_prefix}column_{variable_name}",
+                        [k for k, v in value.items() if v.startswith("#")])
+                       for _, variable_name, _, value in columns]
+        for id, row_values in JSONLDGenerator.iter_csv_rows(extract, columns):
+            data = []
+            for (variable_name, column_id, value_keys), row_value in zip(row_columns, row_values):
+                if row_value is not None:
+                    row_item = {
+                        "@id": f"local:{id_prefix}{variable_name}_{id}",
+                        "represents variable": {"@id": column_id}
+                    }
+                    for prop_key in value_keys:
+                        row_item[prop_key] = row_value
+                    data.append(row_item)
+            yield {
+                "@id": f"local:{id_prefix}{id}",
+                "@type": "record",
+                "data": data
+            }
+
+    @staticmethod
+    def build_csv_columns(metadata):
+        columns = []
+        for key, value in metadata.items():
+            variable_name_original, variable_type = key.split(":", 1)
+            columns.append((variable_name_original, variable_name_original.strip().lower(),
+                            variable_type.strip().lower(), value))
+        return columns
+
+    @staticmethod
+    def iter_csv_rows(extract, columns):
+        # Yields each row id with the values of the template columns, None where a value is missing.
+        # Both the row layout of 'util.extract_csv' and the columnar layout of 'util.extract_csv_columns'
+        # are supported, the columnar one without building a dictionary for each row.
+        csv_dict = extract['csv_dict']
+        if "rows" in csv_dict:
+            for id, row_values in csv_dict['rows'].items():
+                yield id, [row_values.get(column[0]) for column in columns]
+            return
+
+        # Empty values are stored as None in the columns, so the null mask is not needed here
+        missing = [None] * len(csv_dict['ids'])
+        column_values = [csv_dict['columns'].get(column[0], missing) for column in columns]
+        for index, id in enumerate(csv_dict['ids']):
+            yield id, [values[index] for values in column_values]
@@ -0,0 +1,181 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Iterable
+from .jsonldGenerator import JSONLDGenerator
+from .models import TemplateEntry
+
+# Opened catalogs, keyed by their database path
+catalogs = {}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    folder TEXT NOT NULL,
+    name TEXT NOT NULL,
+    extractor TEXT,
+    UNIQUE (folder, name)
+);
+CREATE TABLE IF NOT EXISTS entries (
+    run INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    source TEXT NOT NULL,
+    node TEXT,
+    type TEXT,
+    property TEXT NOT NULL,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS entries_property_value ON entries (property, value);
+CREATE INDEX IF NOT EXISTS entries_node ON entries (node);
+CREATE INDEX IF NOT EXISTS entries_type ON entries (type);
+CREATE INDEX IF NOT EXISTS entries_run ON entries (run);
+"""
+
+class MetadataCatalog:
+    """
+    Keeps the extract, the metadata and the JSON-LD nodes of every extracted run in a local SQLite
+    database, so that runs can be found across simulation folders and campaigns by their values with
+    indexed queries, instead of reading all 'metadata_*.jsonld' files.
+
+    Every value is stored as an entry (run, source, node, type, property, value), where the source is
+    "extract", "metadata" or "jsonld":
+        - extract: the node is the path of the dictionary holding the value, for example 'variables'
+        - metadata: the node is the name of a template node and the type its class
+        - jsonld: the node is the '@id' of a graph node and the type its '@type'. Nested nodes are
+          given by their '@id'
+
+    Input:
+        - The extracted metadata, the metadata and the name of a run
+
+    Output:
+        - The SQLite database given by 'catalog_path' in '../lib/config.json'
+
+    ...
+
+    Attributes
+    ----------
+    database_path : str
+        Path of the SQLite database
+
+    connection : sqlite3.Connection
+        The connection to the database, shared by all threads
+
+    lock : threading.Lock
+        Lets one thread at a time use the connection
+
+
+    Methods
+    -------
+    __init__(database_path: str) -> None:
+        Opens the database and creates its tables and indexes if they do not exist
+
+    open(database_path: str) -> MetadataCatalog:
+        Returns the catalog of 'database_path', keeping its connection open between runs
+
+    format_value(value: Any) -> str:
+        Returns a string value as it is, and any other value as json
+
+    iter_extract_entries(extract: dict, node: str = "") -> Iterator:
+        Yields the entries of the extracted metadata
+
+    iter_metadata_entries(metadata: dict) -> Iterator:
+        Yields the entries of the metadata
+
+    iter_graph_entries(items: Iterable) -> Iterator:
+        Yields the entries of the JSON-LD nodes in 'items'
+
+    add_run(output_folder: str, name: str, extractor: str, extract: dict, metadata: dict) -> None:
+        Replaces the entries of a run in a single transaction
+
+    find_runs(conditions: list) -> list[tuple[str, str]]:
+        Returns the folder and the name of each run having an entry for every (property, value) condition.
+        The value may contain the wildcards '*' and '?'
+
+    get_entries(folder: str, name: str, source: str = None) -> list[tuple]:
+        Returns the source, node, type, property and value of each entry of a run
+    """
+
+    def __init__(self, database_path: str):
+        self.database_path = os.path.expanduser(database_path)
+        self.connection = sqlite3.connect(self.database_path, timeout=60, check_same_thread=False)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        # With write-ahead logging, a transaction per run does not have to wait for the disk on every commit
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def open(cls, database_path: str):
+        if database_path not in catalogs:
+            catalogs[database_path] = cls(database_path)
+        return catalogs[database_path]
+
+    @staticmethod
+    def format_value(value: Any):
+        return value if isinstance(value, str) or value is None else json.dumps(value)
+
+    def iter_extract_entries(self, extract: dict, node: str = ""):
+        for key, value in extract.items():
+            if isinstance(value, dict):
+                yield from self.iter_extract_entries(value, f"{node}/{key}" if node else key)
+            else:
+                yield "extract", node, None, key, self.format_value(value)
+
+    def iter_metadata_entries(self, metadata: dict):
+        for entry in TemplateEntry.from_json(metadata):
+            for prop_key, prop_val in entry.properties.items():
+                yield "metadata", entry.name, entry.type, prop_key, self.format_value(prop_val)
+
+    def iter_graph_entries(self, items: Iterable):
+        for item in items:
+            node_types = item.get("@type")
+            node_type = " ".join(node_types) if isinstance(node_types, list) else node_types
+            for key, values in item.items():
+                if key.startswith("@"):
+                    continue
+                for value in values if isinstance(values, list) else [values]:
+                    if isinstance(value, dict) and "@value" not in value:
+                        yield "jsonld", item.get("@id"), node_type, key, value.get("@id")
+                        yield from self.iter_graph_entries([value])
+                    else:
+                        value = value["@value"] if isinstance(value, dict) else value
+                        yield "jsonld", item.get("@id"), node_type, key, self.format_value(value)
+
+    def add_run(self, output_folder: str, name: str, extractor: str, extract: dict, metadata: dict):
+        folder = os.path.dirname(os.path.abspath(output_folder))
+        generator = JSONLDGenerator(os.path.join(output_folder, f'metadata_{name}.json'),
+                                    os.path.join(output_folder, f'extract_{name}.json'))
+        entries = (self.iter_extract_entries(extract), self.iter_metadata_entries(metadata),
+                   self.iter_graph_entries(generator.iter_jsonld_graph(metadata, extract)))
+
+        # The earlier entries of the run are deleted with it, and all entries are inserted in one transaction
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM runs WHERE folder = ? AND name = ?", (folder, name))
+            run_id = self.connection.execute("INSERT INTO runs (folder, name, extractor) VALUES (?, ?, ?)",
+                                             (folder, name, extractor)).lastrowid
+            for source_entries in entries:
+                self.connection.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                                            ((run_id, *entry) for entry in source_entries))
+
+    def find_runs(self, conditions: list):
+        query = "SELECT folder, name FROM runs"
+        parameters = []
+        for index, (property, value) in enumerate(conditions):
+            # Exact values are compared with '=', so that the index is always used
+            operator = "GLOB" if any(wildcard in value for wildcard in "*?[") else "="
+            query += " WHERE" if index == 0 else " AND"
+            query += f" id IN (SELECT run FROM entries WHERE property = ? AND value {operator} ?)"
+            parameters += [property, value]
+        with self.lock:
+            return self.connection.execute(query + " ORDER BY folder, name", parameters).fetchall()
+
+    def get_entries(self, folder: str, name: str, source: str = None):
+        query = "SELECT source, node, type, property, value FROM entries " \
+                "WHERE run = (SELECT id FROM runs WHERE folder = ? AND name = ?)"
+        parameters = [os.path.abspath(folder), name]
+        if source:
+            query += " AND source = ?"
+            parameters.append(source)
+        with self.lock:
+            return self.connection.execute(query, parameters).fetchall()
@@ -1,7 +1,11 @@
+import copy
 import os
 from typing import Any
 import re
-from .util import save_json, load_json
+from .util import save_json, load_json, load_json_cached, load_config
+from .templateRules import TemplateRuleEngine
+from .templateStore import TemplateStore
+from .models import TemplateEntry
 
 class MetadataGeneratorHelper:
     """
@@ -12,6 +16,9 @@ class MetadataGeneratorHelper:
         - 'extract.json' containing the extracted metadata.
         - 'classes.json' containing class definitions and properties.
         - Optionally, 'template.json' for predefined metadata mapping.
+        - Optionally, 'template_rules.json' for generating the template in bulk, when 'template.json' does not exist.
+        - Optionally, a template store folder given by 'template_store' in '../lib/config.json', which is looked up
+          for a reusable template before any template is created.
 
     Outputs:
         - 'metadata.json' containing the processed metadata.
@@ -27,6 +34,15 @@ class MetadataGeneratorHelper:
     self.target_keys : list
         A list of top-level keys that are listed in metadata.json files
 
+    self.extractor_type : str
+        Name of the extractor, used as a key in the template store
+
+    self.interactive : bool
+        Whether the user may be asked to create the template
+
+    self.template_store : TemplateStore
+        The template store given in config.json, or None if no store is configured
+
     self.context : Any
         A dictionary of context data, loaded from specified URL 
 
@@ -52,8 +68,11 @@ class MetadataGeneratorHelper:
 
     Methods
     -------
-    __init__(directory: str, target_keys: list) -> None:
-        Initializes the class attributes
+    __init__(directory: str, target_keys: list, extractor_type: str = None, interactive: bool = True,
+             extract_data: Any = None) -> None:
+        Initializes the class attributes. When 'interactive' is False, a ValueError is raised instead of
+        asking the user when no template can be created from the store or the rules. The extracted metadata
+        is loaded from the extract file, unless it is given as 'extract_data'
 
     delete_metadata_files() -> None:  
         Checks and removes if metadata.json and metadata.jsonld files already exists 
@@ -64,6 +83,17 @@ class MetadataGeneratorHelper:
     create_metadata_interactive() -> None:   
         Creates the metadata.json file in an interactive process from user
 
+    create_metadata_from_store() -> bool:
+        Creates the template.json file from a stored template with the same or a similar shape of extracted keys.
+        Returns False if there is no matching template in the store
+
+    save_template_to_store(base: str = None) -> None:
+        Saves a newly created template into the template store, as overrides of the 'base' entry if given
+
+    create_metadata_from_rules() -> bool:
+        Creates the template.json file in bulk from the rules in template_rules.json and reports the
+        extracted keys which are not mapped by any rule. Returns False if no key has been mapped
+
     ask_on_extracts() -> None    
         Handles the process where the user wants to specify which extracted metadata belong to which class
 
@@ -77,6 +107,13 @@ class MetadataGeneratorHelper:
     create_metadata_with_template() -> None 
         The process where template.json already exists to cross-matches the template.json and metadata.json          
 
+    get_value_path(template_value: Any) -> str:
+        Returns the path of a template value '#<path>', for example '#attributes/units', or None for '#Value'
+        and for any other value
+
+    get_value_at_path(value: Any, path: str) -> Any:
+        Returns the value at a '/'-separated path of keys within a structured extracted value, or None
+
     add_extra_properties(self) -> None:
         Handles the process where the user wants to add extra properties to already existing nodes
 
@@ -101,21 +138,28 @@ class MetadataGeneratorHelper:
         Only a combination of Unicode characters (letters, numbers, and underscores) is valid.      
     """
 
-    def __init__(self, extract_file_path: str, target_keys: list):
+    def __init__(self, extract_file_path: str, target_keys: list, extractor_type: str = None, interactive: bool = True,
+                 extract_data: Any = None):
         self.extract_file_path = extract_file_path
         self.parent_folder = os.path.dirname(self.extract_file_path)
         self.target_keys = target_keys
-        self.context = load_json(f'{self.parent_folder}/context.json')
+        self.extractor_type = extractor_type or '/'.join(target_keys)
+        self.interactive = interactive
+        self.context = load_json_cached(f'{self.parent_folder}/context.json')
         self.context_dict = self.context['@context']
         self.filtered_context = {k: v for k, v in self.context_dict.items() if isinstance(
             v, str) and (v.startswith("http://") or v.startswith("https://"))}
-        self.extract_data = load_json(self.extract_file_path)
-        self.classes = load_json(f'{self.parent_folder}/classes.json')
+        self.extract_data = load_json(self.extract_file_path) if extract_data is None else extract_data
+        self.classes = load_json_cached(f'{self.parent_folder}/classes.json')
         self.template_file_path = os.path.join(self.parent_folder,'template.json')
+        self.rules_file_path = os.path.join(self.parent_folder,'template_rules.json')
         self.metadata_file_path = self.extract_file_path.replace('extract_','metadata_')
         self.jsonld_file_path = self.metadata_file_path.replace('.json','.jsonld')
         self.template = {}
         self.metadata = {}
+        config = load_config()
+        self.template_store = TemplateStore.open(config["template_store"]) if config.get("template_store") else None
+        self.template_store_min_coverage = config.get("template_store_min_coverage", 1.0)
 
     def delete_metadata_files(self):
         if os.path.exists(self.metadata_file_path):
@@ -125,8 +169,12 @@ class MetadataGeneratorHelper:
 
     def start(self):
         self.delete_metadata_files()
-        if not os.path.exists(self.template_file_path):
-            self.create_metadata_interactive()
+        if not os.path.exists(self.template_file_path) and not self.create_metadata_from_store():
+            if not os.path.exists(self.rules_file_path) or not self.create_metadata_from_rules():
+                if not self.interactive:
+                    raise ValueError(f"No template for {self.extract_file_path}, create `template.json` first.")
+                self.create_metadata_interactive()
+            self.save_template_to_store()
         self.create_metadata_with_template()
         save_json(self.metadata, self.metadata_file_path)
 
@@ -138,6 +186,47 @@ class MetadataGeneratorHelper:
         print("`template.json` has been created.")
         self.metadata = self.template
 
+    def create_metadata_from_store(self):
+        if self.template_store is None:
+            return False
+        match = self.template_store.lookup(self.extractor_type, self.extract_data, self.target_keys,
+                                           self.template_store_min_coverage)
+        if match is None:
+            return False
+        entry_id, self.template, exact, unmapped = match
+        save_json(self.template, self.template_file_path)
+        print(f"`template.json` has been created from the template store entry {entry_id}.")
+        if unmapped:
+            print(f"{len(unmapped)} extracted keys are not mapped by the template store entry {entry_id}:")
+            for key in unmapped:
+                print(f"    {key}")
+        if not exact:
+            self.save_template_to_store(base=entry_id)
+        self.metadata = copy.deepcopy(self.template)
+        return True
+
+    def save_template_to_store(self, base: str = None):
+        if self.template_store is None:
+            return
+        entry_id = self.template_store.save(self.extractor_type, self.extract_data, self.target_keys,
+                                            self.template, base)
+        print(f"`template.json` has been saved in the template store as entry {entry_id}.")
+
+    def create_metadata_from_rules(self):
+        engine = TemplateRuleEngine.from_file(self.rules_file_path)
+        self.template, unmapped = engine.generate(self.extract_data, self.target_keys)
+        if unmapped:
+            print(f"{len(unmapped)} extracted keys are not mapped by any rule in `template_rules.json`:")
+            for key in unmapped:
+                print(f"    {key}")
+        if not self.template:
+            print("No extracted key is mapped by `template_rules.json`, falling back to interactive template creation.")
+            return False
+        save_json(self.template, self.template_file_path)
+        print(f"`template.json` has been created from `template_rules.json` with {len(self.template)} nodes.")
+        self.metadata = copy.deepcopy(self.template)
+        return True
+
     def ask_on_extracts(self):
         if self.target_keys == ["csv_dict"]:
             for key in (k for k in self.extract_data["csv_dict"]['headers'] if k != 'id'):
@@ -179,29 +268,50 @@ class MetadataGeneratorHelper:
         self.template = load_json(self.template_file_path)
 
         # Create metadata based on the template
-        for template_key, template_props in self.template.items():
-            key = template_key.split(":")[0].strip()
+        for entry in TemplateEntry.from_json(self.template):
+            template_key, template_props, key = entry.key, entry.properties, entry.name
             for property_key, template_value in template_props.items():
                 for top_level_key in self.target_keys:
                     if top_level_key in self.extract_data:
                         if key in self.extract_data[top_level_key]:
                             extracted_value = self.extract_data[top_level_key].get(
                                 key)
-                            property_value = extracted_value.get(
-                                property_key) if isinstance(extracted_value, dict) else extracted_value
+                            # Other values starting with '#' are constants unless the extracted value is structured
+                            value_path = self.get_value_path(template_value) if isinstance(extracted_value, dict) else None
+                            if value_path:
+                                # A structured value, for example a NetCDF variable, is read from the path in the template
+                                property_value = self.get_value_at_path(extracted_value, value_path)
+                            else:
+                                property_value = extracted_value.get(
+                                    property_key) if isinstance(extracted_value, dict) else extracted_value
 
-                            # Handle cases where the property value is a list of strings
-                            if isinstance(property_value, list) and all(isinstance(item, str) for item in property_value):
-                                property_value = ''.join(property_value)
+                                # Handle cases where the property value is a list of strings
+                                if isinstance(property_value, list) and all(isinstance(item, str) for item in property_value):
+                                    property_value = ''.join(property_value)
 
                             if template_key not in self.metadata:
                                 self.metadata[template_key] = {}
 
                             if property_value != None:
-                                self.metadata[template_key][property_key] = property_value if template_value == '#Value' else template_value
+                                self.metadata[template_key][property_key] = property_value \
+                                    if template_value == '#Value' or value_path else template_value
             if template_key not in self.metadata:
                 self.metadata[template_key] = template_props
 
+    @staticmethod
+    def get_value_path(template_value: Any):
+        if isinstance(template_value, str) and template_value.startswith('#') and template_value != '#Value':
+            return template_value[1:]
+        return None
+
+    @staticmethod
+    def get_value_at_path(value: Any, path: str):
+        for key in path.split('/'):
+            if not isinstance(value, dict):
+                return None
+            value = value.get(key)
+        return value
+
     def add_extra_properties(self):
         while True:
             print("\nAvailable nodes:")
@@ -0,0 +1,171 @@
+import sys
+from typing import Any, Iterable
+
+class ExtractRecord:
+    """
+    A single extracted value: the section of the extract it is in, for example 'variables', its key and its value.
+    The section and the key are interned, as the same keys are repeated in every run of a simulation folder.
+    A column of a csv file is a record of the 'csv_dict' section without a value.
+
+    Input:
+        - The extract of a run, as returned by the extractors and saved in 'extract_<run>.json'
+
+    Output:
+        - The same extract layout, from 'to_json'
+
+    ...
+
+    Attributes
+    ----------
+    section : str
+        Top-level key of the extract the value is in
+
+    key : str
+        Key of the value within its section
+
+    value : Any
+        The extracted value, a string or a dictionary of property values, or None for a csv column
+
+
+    Methods
+    -------
+    __init__(section: str, key: str, value: Any = None) -> None:
+        Initializes the class attributes
+
+    iter_from_json(extract: dict, sections: list) -> Iterator[ExtractRecord]:
+        Yields the records of the given sections of an extract, or of the columns of a csv extract
+
+    to_json(records: Iterable[ExtractRecord]) -> dict:
+        Returns the extract layout of the records, each section as a dictionary of keys and values
+    """
+
+    __slots__ = ('section', 'key', 'value')
+
+    def __init__(self, section: str, key: str, value: Any = None):
+        self.section = sys.intern(section)
+        self.key = sys.intern(key)
+        self.value = value
+
+    @classmethod
+    def iter_from_json(cls, extract: dict, sections: list):
+        if sections == ["csv_dict"]:
+            for key in extract["csv_dict"]['headers']:
+                if key != 'id':
+                    yield cls("csv_dict", key)
+            return
+        for section in sections:
+            for key, value in extract.get(section, {}).items():
+                yield cls(section, key, value)
+
+    @staticmethod
+    def to_json(records: Iterable):
+        extract = {}
+        for record in records:
+            extract.setdefault(record.section, {})[record.key] = record.value
+        return extract
+
+
+class TemplateEntry:
+    """
+    A node of a template or of the metadata, given by a key 'name: type' and a dictionary of its properties.
+    The key is split only once, and its name and type are interned.
+
+    ...
+
+    Attributes
+    ----------
+    key : str
+        The key of the node as it is written in the template
+
+    name : str
+        The name of the node, which is the extracted key it is mapped from
+
+    type : str
+        The class of the node
+
+    properties : dict
+        The properties of the node. '#Value' stands for the extracted value and '@N' or '@name' for another node
+
+
+    Methods
+    -------
+    __init__(key: str, properties: dict) -> None:
+        Splits the key into the name and the type of the node
+
+    from_json(template: dict) -> list[TemplateEntry]:
+        Returns the entries of a template or of the metadata, in their order
+
+    to_json(entries: Iterable[TemplateEntry]) -> dict:
+        Returns the template layout of the entries
+    """
+
+    __slots__ = ('key', 'name', 'type', 'properties')
+
+    def __init__(self, key: str, properties: dict):
+        name, _, node_type = key.partition(":")
+        self.key = key
+        self.name = sys.intern(name.strip())
+        self.type = sys.intern(node_type.strip())
+        self.properties = properties
+
+    @classmethod
+    def from_json(cls, template: dict):
+        return [cls(key, properties) for key, properties in template.items()]
+
+    @staticmethod
+    def to_json(entries: Iterable):
+        return {entry.key: entry.properties for entry in entries}
+
+
+class GraphNode:
+    """
+    A node of the JSON-LD graph of a run, with its local id, its type, its label and its other properties.
+
+    ...
+
+    Attributes
+    ----------
+    id : str
+        The id of the node, for example 'local:variable_ref_t_1'
+
+    type : str
+        The '@type' of the node
+
+    label : str
+        The label of the node
+
+    properties : dict
+        The other properties of the node
+
+
+    Methods
+    -------
+    __init__(id: str, type: str, label: str, properties: dict) -> None:
+        Initializes the class attributes
+
+    from_json(item: dict) -> GraphNode:
+        Returns the node of a JSON-LD graph item
+
+    to_json() -> dict:
+        Returns the JSON-LD graph item of the node
+    """
+
+    __slots__ = ('id', 'type', 'label', 'properties')
+
+    def __init__(self, id: str, type: str, label: str, properties: dict):
+        self.id = id
+        self.type = type
+        self.label = label
+        self.properties = properties
+
+    @classmethod
+    def from_json(cls, item: dict):
+        properties = {key: value for key, value in item.items() if key not in ("@id", "@type", "label")}
+        return cls(item["@id"], item.get("@type"), item.get("label"), properties)
+
+    def to_json(self):
+        item = {"@id": self.id, "@type": self.type}
+        if self.label is not None:
+            item["label"] = self.label
+        item.update(self.properties)
+        return item
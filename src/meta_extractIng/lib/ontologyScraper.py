@@ -1,8 +1,43 @@
 import requests
-from rdflib import Graph, Namespace
+from rdflib import Graph, Namespace, URIRef
 from rdflib.namespace import RDF, OWL, RDFS, SKOS
+from rdflib.plugins.sparql import prepareQuery
 import os
-from .util import save_json, load_json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from .util import save_json, load_config
+
+NAMESPACES = {'rdf': RDF, 'owl': OWL, 'rdfs': RDFS, 'skos': SKOS}
+
+# Graph of a worker process of the parallel scraping
+worker_graph = None
+
+# Prepared queries, and the number of runs and the total time of each query in this process
+prepared_queries = {}
+query_times = {}
+
+def run_query(name: str, query: str, graph: Graph, classIRI: str = None):
+    # Each query is parsed and translated once, the class is bound to '?classIRI' instead of being formatted into it
+    if name not in prepared_queries:
+        prepared_queries[name] = prepareQuery(query, initNs=NAMESPACES)
+    start = time.perf_counter()
+    rows = list(graph.query(prepared_queries[name],
+                            initBindings={'classIRI': URIRef(classIRI)} if classIRI is not None else None))
+    times = query_times.setdefault(name, [0, 0.0])
+    times[0] += 1
+    times[1] += time.perf_counter() - start
+    return rows
+
+def load_worker_graph(data: str):
+    global worker_graph
+    worker_graph = Graph()
+    worker_graph.parse(data=data, format="nt")
+
+def scrape_classes(classes: list):
+    # Runs in a worker process, on the graph it has loaded once. The query times of the chunk are returned with it
+    query_times.clear()
+    results = [(classLabel, OntologyScraper.queryClassRelations(worker_graph, classIRI)) for classIRI, classLabel in classes]
+    return results, dict(query_times)
 
 class OntologyScraper:
     """
@@ -27,6 +62,14 @@ class OntologyScraper:
     classes_dict : dict
         Dictionary to store the scraped classes and their properties
 
+    workers : int
+        Number of processes the classes are scraped in, as given by 'scrape_workers' in config.json.
+        The classes are scraped one after another if it is 0 or 1
+
+    query_times : dict
+        The number of runs and the total time in seconds of each query of the last scraping, summed over all
+        processes. The queries of the relations are named by their keys in 'queryClassRelations'
+
     OWL : Namespace
         Namespace pointing to "http://www.w3.org/2002/07/owl'
 
@@ -44,28 +87,38 @@ class OntologyScraper:
     scrapOntlogy(self) -> None:
         Main scraping function for OWL or XML format. Fetches the raw content, 
         then with SPARQL queries to populates the classes_dict.
+
+    scrapOntologyParallel(self, graph: Graph, classes: dict) -> None:
+        Runs the SPARQL queries of the classes in 'workers' processes, each of which parses the serialised
+        graph once, merges their results into classes_dict and resolves the inheritance once at the end
         
-    populateClassDictionary(self, classLabel: str, classRelations: dict = None) -> None:
-        Updating classes_dict with their properties
+    populateClassDictionary(self, classLabel: str, classRelations: dict = None, inherit: bool = True) -> None:
+        Updating classes_dict with their properties, and with the data properties of their super-classes if 'inherit' is True
+
+    queryClassRelations(graph: Graph, classIRI: str) -> dict:
+        Handles the queries of all relations of a class
 
     queryClasses(self, graph: Graph) -> dict:
         Handles the query process for fetching classes from a Graph with SPARQL
 
-    queryClassDomainOrRange(self, graph: Graph, classIRI: str, onDomain: bool = True, onObjectProperty: bool = True) -> list:
+    queryClassDomainOrRange(graph: Graph, classIRI: str, onDomain: bool = True, onObjectProperty: bool = True) -> list:
         Handles the query process for those classes which are in domain or in range from a Graph with SPARQL
 
-    queryDisjointClasses(self, graph: Graph, classIRI: str) -> list:
+    queryDisjointClasses(graph: Graph, classIRI: str) -> list:
         Handles the query process for those classes which are disjoint in a Graph with SPARQL
 
-    querySuperClasses(self, graph: Graph, classIRI: str) -> list:
+    querySuperClasses(graph: Graph, classIRI: str) -> list:
         Handles the query process for those classes which are super-classes in a Graph with SPARQL
 
-    querySubClasses(self, graph: Graph, classIRI: str) -> list:
+    querySubClasses(graph: Graph, classIRI: str) -> list:
         Handles the query process for those classes which are sub-classes in a Graph with SPARQL
 
-    queryMembers(self, graph: Graph, classIRI: str) -> list:
+    queryMembers(graph: Graph, classIRI: str) -> list:
         Handles the query process for those classes which have members in a Graph with SPARQL
 
+    printQueryTimes(self) -> None:
+        Prints the number of runs, the total and the mean time of each query of the last scraping, slowest first
+
     updateDataPropertiesFromSuperClasses(self) -> None:
         Recursively searching in classes_dict to find class hierarchies
 
@@ -74,10 +127,12 @@ class OntologyScraper:
     """
      
     def __init__(self, folder_path: str):
-        config = load_json(os.path.join(os.path.dirname(os.path.abspath(__file__)),'config.json'))
+        config = load_config()
         self.context_url = config["context_URL"]
         self.url = config["URL"]
         self.classes_dict = {}
+        self.workers = config.get("scrape_workers", 0)
+        self.query_times = {}
         self.OWL = Namespace("http://www.w3.org/2002/07/owl#")
         self.folder_path = folder_path
         self.output_folder = os.path.join(self.folder_path + '/__output__')
@@ -124,25 +179,37 @@ class OntologyScraper:
         save_json(self.classes_dict, os.path.join(self.output_folder,'classes.json'))
 
     def scrapOntology(self):
+        query_times.clear()
         graph = Graph()
         graph.parse(self.url, format="xml")
         classes = self.queryClasses(graph)
 
-        for classIRI, classLabel in classes.items():
-            classRelations = {
-                'super-classes': self.querySuperClasses(graph, classIRI),
-                'sub-classes': self.querySubClasses(graph, classIRI),
-                'members': self.queryMembers(graph, classIRI),
-                'is disjoint with': self.queryDisjointClasses(graph, classIRI),
-                'domainObjectProperties': self.queryClassDomainOrRange(graph, classIRI, True, True),
-                'domainDataProperties': self.queryClassDomainOrRange(graph, classIRI, True, False),
-                'rangeObjectProperties': self.queryClassDomainOrRange(graph, classIRI, False, True),
-                'rangeDataProperties': self.queryClassDomainOrRange(graph, classIRI, False, False),
-            }
-
-            self.populateClassDictionary(classLabel, classRelations)
+        if self.workers > 1 and len(classes) > 1:
+            self.scrapOntologyParallel(graph, classes)
+        else:
+            for classIRI, classLabel in classes.items():
+                self.populateClassDictionary(classLabel, self.queryClassRelations(graph, classIRI))
+        self.query_times = dict(query_times)
+
+    def scrapOntologyParallel(self, graph: Graph, classes: dict):
+        # Several chunks per worker balance the load, the results are merged in the order of the classes
+        items = list(classes.items())
+        chunk_size = max(len(items) // (self.workers * 4), 1)
+        chunks = [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+        with ProcessPoolExecutor(self.workers, initializer=load_worker_graph,
+                                 initargs=(graph.serialize(format="nt"),)) as executor:
+            for results, chunk_query_times in executor.map(scrape_classes, chunks):
+                for classLabel, classRelations in results:
+                    self.populateClassDictionary(classLabel, classRelations, inherit=False)
+                for name, (count, seconds) in chunk_query_times.items():
+                    times = query_times.setdefault(name, [0, 0.0])
+                    times[0] += count
+                    times[1] += seconds
+
+        # Inheritance is resolved once, when all classes are known
+        self.updateDataPropertiesFromSuperClasses()
 
-    def populateClassDictionary(self, classLabel: str, classRelations: dict = None):
+    def populateClassDictionary(self, classLabel: str, classRelations: dict = None, inherit: bool = True):
         if classRelations is None:
             classRelations = {}
 
@@ -175,7 +242,21 @@ class OntologyScraper:
         self.classes_dict[classLabel] = result
 
         # Inherit data properties from super classes
-        self.updateDataPropertiesFromSuperClasses()
+        if inherit:
+            self.updateDataPropertiesFromSuperClasses()
+
+    @staticmethod
+    def queryClassRelations(graph: Graph, classIRI: str):
+        return {
+            'super-classes': OntologyScraper.querySuperClasses(graph, classIRI),
+            'sub-classes': OntologyScraper.querySubClasses(graph, classIRI),
+            'members': OntologyScraper.queryMembers(graph, classIRI),
+            'is disjoint with': OntologyScraper.queryDisjointClasses(graph, classIRI),
+            'domainObjectProperties': OntologyScraper.queryClassDomainOrRange(graph, classIRI, True, True),
+            'domainDataProperties': OntologyScraper.queryClassDomainOrRange(graph, classIRI, True, False),
+            'rangeObjectProperties': OntologyScraper.queryClassDomainOrRange(graph, classIRI, False, True),
+            'rangeDataProperties': OntologyScraper.queryClassDomainOrRange(graph, classIRI, False, False),
+        }
 
     def queryClasses(self, graph: Graph):
         query = """
@@ -195,19 +276,19 @@ class OntologyScraper:
         }
         ORDER BY ?classLabel
         """
-        results = graph.query(
-            query, initNs={'rdf': RDF, 'owl': OWL, 'rdfs': RDFS, 'skos': SKOS})
+        results = run_query('classes', query, graph)
         classes = dict()
         for row in results:
             classes[str(row[0])] = str(row[1])
         return classes
 
-    def queryClassDomainOrRange(self, graph: Graph, classIRI: str, onDomain: bool = True, onObjectProperty: bool = True):
+    @staticmethod
+    def queryClassDomainOrRange(graph: Graph, classIRI: str, onDomain: bool = True, onObjectProperty: bool = True):
         query = """
         SELECT ?property ?propertyLabel
         WHERE {
             ?property a owl:%s ;
-            rdfs:%s <%s> .
+            rdfs:%s ?classIRI .
             OPTIONAL {
                 ?property skos:prefLabel ?prefLabel.
                 FILTER (lang(?prefLabel) = 'en')
@@ -219,20 +300,21 @@ class OntologyScraper:
             BIND(COALESCE(?prefLabel, ?label) AS ?propertyLabel)
             FILTER (?propertyLabel != "")
         }
-        """ % ('ObjectProperty' if onObjectProperty else 'DatatypeProperty', 'domain' if onDomain else 'range', classIRI)
+        """ % ('ObjectProperty' if onObjectProperty else 'DatatypeProperty', 'domain' if onDomain else 'range')
 
-        results = graph.query(
-            query, initNs={'rdf': RDF, 'owl': OWL, 'rdfs': RDFS, 'skos': SKOS})
+        name = f"{'domain' if onDomain else 'range'}{'Object' if onObjectProperty else 'Data'}Properties"
+        results = run_query(name, query, graph, classIRI)
         labels = list()
         for row in results:
             labels.append(str(row[1]))
         return labels
 
-    def queryDisjointClasses(self, graph: Graph, classIRI: str):
+    @staticmethod
+    def queryDisjointClasses(graph: Graph, classIRI: str):
         query = """
         SELECT ?disjointClass ?disjointClass_label
         WHERE {
-            <%s> owl:disjointWith ?disjointClass .
+            ?classIRI owl:disjointWith ?disjointClass .
             OPTIONAL {
                 ?disjointClass skos:prefLabel ?prefLabel.
                 FILTER (lang(?prefLabel) = 'en')
@@ -244,20 +326,20 @@ class OntologyScraper:
             BIND(COALESCE(?prefLabel, ?label) AS ?disjointClass_label)
             FILTER (?disjointClass_label != "")
         }
-        """ % classIRI
+        """
 
-        results = graph.query(
-            query, initNs={'rdf': RDF, 'owl': OWL, 'rdfs': RDFS, 'skos': SKOS})
+        results = run_query('is disjoint with', query, graph, classIRI)
         labels = list()
         for row in results:
             labels.append(str(row[1]))
         return labels
 
-    def querySuperClasses(self, graph: Graph, classIRI: str):
+    @staticmethod
+    def querySuperClasses(graph: Graph, classIRI: str):
         query = """
         SELECT ?superclass ?superclass_label
         WHERE {
-            <%s> rdfs:subClassOf ?superclass .
+            ?classIRI rdfs:subClassOf ?superclass .
             OPTIONAL {
                 ?superclass skos:prefLabel ?prefLabel.
                 FILTER (lang(?prefLabel) = 'en')
@@ -269,20 +351,20 @@ class OntologyScraper:
             BIND(COALESCE(?prefLabel, ?label) AS ?superclass_label)
             FILTER (?superclass_label != "")
         }
-        """ % classIRI
+        """
 
-        results = graph.query(
-            query, initNs={'rdf': RDF, 'owl': OWL, 'rdfs': RDFS, 'skos': SKOS})
+        results = run_query('super-classes', query, graph, classIRI)
         labels = list()
         for row in results:
             labels.append(str(row[1]))
         return labels
 
-    def querySubClasses(self, graph: Graph, classIRI: str):
+    @staticmethod
+    def querySubClasses(graph: Graph, classIRI: str):
         query = """
         SELECT ?subclass ?subclass_label
         WHERE {
-            ?subclass rdfs:subClassOf <%s> .
+            ?subclass rdfs:subClassOf ?classIRI .
             OPTIONAL {
                 ?subclass skos:prefLabel ?prefLabel.
                 FILTER (lang(?prefLabel) = 'en')
@@ -294,21 +376,21 @@ class OntologyScraper:
             BIND(COALESCE(?prefLabel, ?label) AS ?subclass_label)
             FILTER (?subclass_label != "")
         }
-        """ % classIRI
+        """
 
-        results = graph.query(
-            query, initNs={'rdf': RDF, 'owl': OWL, 'rdfs': RDFS, 'skos': SKOS})
+        results = run_query('sub-classes', query, graph, classIRI)
         labels = list()
         for row in results:
             labels.append(str(row[1]))
         return labels
 
-    def queryMembers(self, graph: Graph, classIRI: str):
+    @staticmethod
+    def queryMembers(graph: Graph, classIRI: str):
         query = """
         SELECT ?namedIndividual ?namedIndividualLabel
         WHERE {
             ?namedIndividual a owl:NamedIndividual.
-            ?namedIndividual rdf:type <%s>.
+            ?namedIndividual rdf:type ?classIRI.
             OPTIONAL {
                 ?namedIndividual skos:prefLabel ?prefLabel.
                 FILTER (lang(?prefLabel) = 'en')
@@ -320,15 +402,19 @@ class OntologyScraper:
             BIND(COALESCE(?prefLabel, ?label) AS ?namedIndividualLabel)
             FILTER (?namedIndividualLabel != "")
         }
-        """ % classIRI
+        """
 
-        results = graph.query(
-            query, initNs={'rdf': RDF, 'owl': OWL, 'rdfs': RDFS, 'skos': SKOS})
+        results = run_query('members', query, graph, classIRI)
         labels = list()
         for row in results:
             labels.append(str(row[1]))
         return labels
 
+    def printQueryTimes(self):
+        print(f"{'query':<24} {'runs':>6} {'total (s)':>10} {'mean (ms)':>10}")
+        for name, (count, seconds) in sorted(self.query_times.items(), key=lambda item: -item[1][1]):
+            print(f"{name:<24} {count:>6} {seconds:>10.3f} {seconds / count * 1000:>10.2f}")
+
     def updateDataPropertiesFromSuperClasses(self):
         for class_name in self.classes_dict:
             super_data_properties = self.gather_super_data_properties(
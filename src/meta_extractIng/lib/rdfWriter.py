@@ -0,0 +1,191 @@
+import re
+from typing import Any, Iterable
+
+RDF_TYPE = "<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>"
+XSD = "http://www.w3.org/2001/XMLSchema#"
+
+# Characters which are not allowed in N-Triples IRIs are percent-encoded, quotes and line breaks in literals
+# escaped. Most values need no escaping, so they are only translated if they contain such a character
+IRI_ESCAPES = {code: f"%{code:02X}" for code in [*range(0x21), *b'<>"{}|^`\\']}
+IRI_UNSAFE = re.compile(r'[\x00-\x20<>"{}|^`\\]')
+LITERAL_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r"})
+LITERAL_UNSAFE = re.compile(r'["\\\n\r]')
+
+class RDFWriter:
+    """
+    Writes the graph of the JSON-LD generator straight as N-Triples, or as N-Quads with the statements
+    of each run in its own named graph, so that triple stores can bulk load it without parsing and
+    expanding JSON-LD. The terms and prefixes of the context are expanded once up front, and the
+    statements are written line by line while the nodes are generated, without building a graph in memory.
+
+    Only the parts of JSON-LD which the generator produces are supported: node objects with '@id' and
+    '@type', terms with an '@id' and a '@type' coercion, nested node objects, arrays and value objects.
+
+    Input:
+        - The '@context' of 'context.json', and the nodes of 'JSONLDGenerator.iter_jsonld_graph'
+
+    Output:
+        - 'metadata_<run>.nt' or 'metadata_<run>.nq', or the equivalent file of a dataset
+
+    ...
+
+    Attributes
+    ----------
+    prefixes : dict
+        The IRI of each prefix of the context
+
+    terms : dict
+        The expanded IRI and the expanded '@type' coercion, or None, of each term of the context
+
+    predicates : dict
+        The formatted predicate and the coercion of each key written so far
+
+    types : dict
+        The formatted IRI of each '@type' written so far
+
+    vocab : str
+        The IRI which terms that are not in the context are appended to
+
+    blank_nodes : int
+        The number of blank nodes written so far, so that their labels are unique within a file
+
+
+    Methods
+    -------
+    __init__(context: dict) -> None:
+        Expands the terms and prefixes of the context
+
+    expand_iri(value: str, vocab: bool = False) -> str:
+        Returns the IRI of a compact IRI, a term or an absolute IRI
+
+    format_iri(iri: str) -> str:
+        Returns the N-Triples form of an IRI or a blank node label
+
+    format_literal(lexical: str) -> str:
+        Returns the N-Triples form of a literal without its datatype
+
+    format_object(value: Any, coercion: str) -> str:
+        Returns the N-Triples object of a value, or None if it is not written
+
+    get_subject(node: dict) -> str:
+        Returns the N-Triples subject of a node, a new blank node if it has no '@id'
+
+    iter_statements(node: dict, graph: str = "", subject: str = None) -> Iterator:
+        Yields the statements of a node and of the nodes nested in it, as lines ending with 'graph'
+
+    write(items: Iterable, file_path: str, graph_name: str = None) -> None:
+        Writes the statements of all nodes in 'items' to 'file_path', in the named graph 'graph_name' if given
+
+    write_graphs(graphs: Iterable, file_path: str) -> None:
+        Writes the statements of the nodes of each named graph in 'graphs' to 'file_path'
+    """
+
+    def __init__(self, context: dict):
+        self.vocab = context.get("@vocab", "")
+        self.prefixes = {term: definition for term, definition in context.items()
+                         if isinstance(definition, str) and not term.startswith("@")}
+        self.terms = {}
+        self.predicates = {}
+        self.types = {}
+        self.blank_nodes = 0
+        for term, definition in context.items():
+            if term.startswith("@") or definition is None:
+                continue
+            if isinstance(definition, str):
+                definition = {"@id": definition}
+            coercion = definition.get("@type")
+            if coercion not in (None, "@id", "@vocab"):
+                coercion = self.expand_iri(coercion, vocab=True)
+            self.terms[term] = (self.expand_iri(definition.get("@id", term), vocab=True), coercion)
+
+    def expand_iri(self, value: str, vocab: bool = False):
+        if vocab and value in self.terms:
+            return self.terms[value][0]
+        prefix, colon, suffix = value.partition(":")
+        if colon and not suffix.startswith("//") and prefix in self.prefixes:
+            return self.prefixes[prefix] + suffix
+        if colon or value.startswith("_:") or not vocab:
+            return value
+        return self.vocab + value
+
+    @staticmethod
+    def format_iri(iri: str):
+        if iri.startswith("_:"):
+            return iri
+        return f"<{iri.translate(IRI_ESCAPES)}>" if IRI_UNSAFE.search(iri) else f"<{iri}>"
+
+    @staticmethod
+    def format_literal(lexical: str):
+        return f'"{lexical.translate(LITERAL_ESCAPES)}"' if LITERAL_UNSAFE.search(lexical) else f'"{lexical}"'
+
+    def format_object(self, value: Any, coercion: str):
+        if isinstance(value, dict) and "@value" in value:
+            coercion = self.expand_iri(value["@type"], vocab=True) if "@type" in value else None
+            if "@language" in value:
+                return f'{self.format_literal(str(value["@value"]))}@{value["@language"]}'
+            value = value["@value"]
+        if value is None:
+            return None
+        if coercion is None and isinstance(value, str):
+            return self.format_literal(value)
+        if coercion in ("@id", "@vocab") and isinstance(value, str):
+            return self.format_iri(self.expand_iri(value, vocab=coercion == "@vocab"))
+
+        # JSON numbers and booleans are typed as in the JSON-LD to RDF conversion
+        if isinstance(value, bool):
+            lexical, datatype = ("true" if value else "false"), XSD + "boolean"
+        elif isinstance(value, int):
+            lexical, datatype = str(value), XSD + "integer"
+        elif isinstance(value, float):
+            mantissa, exponent = f"{value:.15E}".split("E")
+            mantissa = mantissa.rstrip("0")
+            lexical, datatype = f"{mantissa}{'0' if mantissa.endswith('.') else ''}E{int(exponent)}", XSD + "double"
+        else:
+            lexical, datatype = str(value), None
+        datatype = coercion if coercion not in (None, "@id", "@vocab") else datatype
+        literal = self.format_literal(lexical)
+        return f"{literal}^^<{datatype}>" if datatype else literal
+
+    def get_subject(self, node: dict):
+        if "@id" in node:
+            return self.format_iri(self.expand_iri(node["@id"]))
+        self.blank_nodes += 1
+        return f"_:b{self.blank_nodes}"
+
+    def iter_statements(self, node: dict, graph: str = "", subject: str = None):
+        # 'graph' is the end of each line, the named graph of N-Quads followed by the full stop
+        end = f"{graph} .\n"
+        subject = subject or self.get_subject(node)
+
+        node_types = node.get("@type", [])
+        for node_type in node_types if isinstance(node_types, list) else [node_types]:
+            if node_type not in self.types:
+                self.types[node_type] = self.format_iri(self.expand_iri(node_type, vocab=True))
+            yield f"{subject} {RDF_TYPE} {self.types[node_type]}{end}"
+
+        for key, values in node.items():
+            if key.startswith("@"):
+                continue
+            if key not in self.predicates:
+                predicate, coercion = self.terms.get(key) or (self.expand_iri(key, vocab=True), None)
+                self.predicates[key] = (self.format_iri(predicate), coercion)
+            predicate, coercion = self.predicates[key]
+            for value in values if isinstance(values, list) else [values]:
+                if isinstance(value, dict) and "@value" not in value:
+                    nested_subject = self.get_subject(value)
+                    yield f"{subject} {predicate} {nested_subject}{end}"
+                    yield from self.iter_statements(value, graph, nested_subject)
+                    continue
+                rdf_object = self.format_object(value, coercion)
+                if rdf_object is not None:
+                    yield f"{subject} {predicate} {rdf_object}{end}"
+
+    def write(self, items: Iterable, file_path: str, graph_name: str = None):
+        self.write_graphs([(graph_name, items)], file_path)
+
+    def write_graphs(self, graphs: Iterable, file_path: str):
+        with open(file_path, "w", encoding="utf-8", newline="\n") as file:
+            for graph_name, items in graphs:
+                graph = f" {self.format_iri(self.expand_iri(graph_name))}" if graph_name else ""
+                for item in items:
+                    file.writelines(self.iter_statements(item, graph))
@@ -0,0 +1,169 @@
+import fnmatch
+import re
+from typing import Any
+from .util import load_json
+from .models import ExtractRecord
+
+class TemplateRuleEngine:
+    """
+    Generates a template in bulk from a declarative mapping file, instead of asking the user
+    for the class and property of every extracted key.
+
+    Input:
+        - 'template_rules.json' (or another specified filename) with a list of rules of this form:
+            {
+                "rules": [
+                    {"match": "ref_*", "class": "variable", "property": "has symbol"},
+                    {"regex": "^.*_units$", "section": "variables", "class": "unit", "property": "has symbol"},
+                    {"match": "At Date", "skip": true}
+                ]
+            }
+          'match' is a glob and 'regex' a regular expression, both matched against the whole key.
+          'section' optionally restricts a rule to one top-level key of the extracted metadata,
+          'properties' optionally adds constant properties to the generated node and 'skip'
+          marks keys which should deliberately stay out of the template.
+          'value' optionally replaces the '#Value' of the rule's property, for example by a path
+          '#attributes/units' into a structured value such as a NetCDF variable, and 'keys' maps
+          further paths of a structured value to properties, for example {"type": "has kind"}.
+          A structured value is mapped by its 'value' and 'keys' only, and is reported as unmapped
+          if the rule has neither.
+          Rules are applied in order, the first matching rule wins.
+
+    Output:
+        - A template dictionary in the same layout as the interactively created 'template.json'
+
+    ...
+
+    Attributes
+    ----------
+    rules : list
+        A list of rule dictionaries, as given in the mapping file
+
+    compiled : dict
+        A dictionary of compiled matchers for each section, built on first use
+
+    Methods
+    -------
+    __init__(rules: list) -> None:
+        Initializes the class attributes and validates the rules
+
+    from_file(filename: str) -> TemplateRuleEngine:
+        Creates an engine from a json mapping file
+
+    compile_section(section: str) -> tuple[dict, re.Pattern, list, list]:
+        Compiles the rules applicable to 'section' into a dictionary of literal keys and a single
+        combined regular expression, so that each key is matched in one pass over all rules.
+        Rules with groups are kept apart as (rule index, pattern) pairs and matched one by one
+
+    match(key: str, section: str = None) -> dict:
+        Returns the first rule matching 'key', or None if no rule matches
+
+    has_path(value: dict, path: str) -> bool:
+        Returns whether a structured value has a value at 'path', for example 'attributes/units'
+
+    generate(extract_data: Any, target_keys: list) -> tuple[dict, list]:
+        Applies the rules to all extracted keys at once and returns the generated template
+        along with a list of keys left unmapped
+    """
+
+    def __init__(self, rules: list):
+        for index, rule in enumerate(rules):
+            if ('match' in rule) == ('regex' in rule):
+                raise ValueError(f"Rule {index} must have exactly one of 'match' or 'regex'.")
+            if not rule.get('skip') and ('class' not in rule or 'property' not in rule):
+                raise ValueError(f"Rule {index} must have a 'class' and a 'property', or be a 'skip' rule.")
+        self.rules = rules
+        self.compiled = {}
+
+    @classmethod
+    def from_file(cls, filename: str):
+        return cls(load_json(filename)['rules'])
+
+    def compile_section(self, section: str):
+        if section in self.compiled:
+            return self.compiled[section]
+
+        literals = {}
+        patterns = []
+        indices = []
+        separate = []
+        for index, rule in enumerate(self.rules):
+            if rule.get('section', section) != section:
+                continue
+            if 'match' in rule and not any(char in rule['match'] for char in '*?['):
+                literals.setdefault(rule['match'], index)
+                continue
+            pattern = fnmatch.translate(rule['match']) if 'match' in rule else rule['regex']
+            # Numbered groups and back-references would be renumbered in the combined pattern,
+            # so rules with groups are matched one by one
+            if re.compile(pattern).groups:
+                separate.append((index, re.compile(pattern)))
+            else:
+                patterns.append(pattern)
+                indices.append(index)
+
+        # One alternation with a named group per rule, so the first matching rule can be read
+        # from 'lastgroup'. Fall back to matching rule by rule if the patterns can not be combined,
+        # e.g. because of inline global flags.
+        combined = None
+        if patterns:
+            try:
+                combined = re.compile('|'.join(f'(?P<r{i}>{pattern})' for i, pattern in enumerate(patterns)))
+            except re.error:
+                separate = sorted(separate + [(index, re.compile(pattern)) for index, pattern in zip(indices, patterns)],
+                                  key=lambda item: item[0])
+                indices = []
+
+        self.compiled[section] = (literals, combined, indices, separate)
+        return self.compiled[section]
+
+    def match(self, key: str, section: str = None):
+        literals, combined, indices, separate = self.compile_section(section)
+        rule_index = literals.get(key)
+        if combined is not None:
+            found = combined.fullmatch(key)
+            if found and (rule_index is None or indices[int(found.lastgroup[1:])] < rule_index):
+                rule_index = indices[int(found.lastgroup[1:])]
+        for index, pattern in separate:
+            if rule_index is not None and index > rule_index:
+                break
+            if pattern.fullmatch(key):
+                rule_index = index
+                break
+        return self.rules[rule_index] if rule_index is not None else None
+
+    @staticmethod
+    def has_path(value: dict, path: str):
+        for key in path.split('/'):
+            if not isinstance(value, dict) or key not in value:
+                return False
+            value = value[key]
+        return value is not None
+
+    def generate(self, extract_data: Any, target_keys: list):
+        template = {}
+        unmapped = []
+
+        for record in ExtractRecord.iter_from_json(extract_data, target_keys):
+            rule = self.match(record.key, record.section)
+            if rule is None:
+                unmapped.append(record.key)
+                continue
+            if rule.get('skip'):
+                continue
+
+            if isinstance(record.value, dict):
+                # The properties of a structured value are read from its paths, as '#Value' is the whole dictionary
+                node = {property_key: f"#{path}" for path, property_key in rule.get('keys', {}).items()
+                        if self.has_path(record.value, path)}
+                if 'value' in rule:
+                    node[rule['property']] = rule['value']
+                if not node:
+                    unmapped.append(record.key)
+                    continue
+            else:
+                node = {rule['property']: rule.get('value', '#Value')}
+            node.update(rule.get('properties', {}))
+            template[f"{record.key}: {rule['class']}"] = node
+
+        return template, unmapped
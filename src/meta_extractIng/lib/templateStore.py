@@ -0,0 +1,185 @@
+import copy
+import hashlib
+import os
+from typing import Any
+from .util import save_json, load_json
+from .models import ExtractRecord
+
+# Opened stores, keyed by their folder
+template_stores = {}
+
+class TemplateStore:
+    """
+    Keeps compiled templates in a shared folder, keyed by the extractor type and the "shape" of the
+    extracted metadata (the set of extracted keys), so that new simulation folders with the same or
+    a similar schema can reuse an existing template instead of creating one interactively.
+
+    Input:
+        - Store folder, as given by 'template_store' key in '../lib/config.json'
+
+    Output:
+        - 'index.json' in the store folder, mapping each entry id to its extractor type and number of keys
+        - '<id>.json' for each entry, holding the extracted keys, an optional base entry and the
+          template nodes which override the base. A node overridden with null is removed from the base.
+
+    ...
+
+    Attributes
+    ----------
+    store_folder : str
+        Folder where the index and the templates are stored
+
+    index : dict
+        A dictionary of the stored entries, loaded from 'index.json'
+
+    entries : dict
+        A dictionary of the entry files which have already been loaded
+
+    compiled : dict
+        A dictionary of the templates which have already been compiled from their base and overrides
+
+
+    Methods
+    -------
+    __init__(store_folder: str) -> None:
+        Initializes the class attributes and loads the index
+
+    open(store_folder: str) -> TemplateStore:
+        Returns the store of 'store_folder', keeping it and its compiled templates loaded between runs
+
+    get_shape(extract_data: Any, target_keys: list) -> list:
+        Returns the sorted list of extracted keys, each prefixed by its top-level key
+
+    get_entry_id(extractor_type: str, shape: list) -> str:
+        Returns the id of the entry for 'extractor_type' and 'shape'
+
+    load_entry(entry_id: str) -> dict:
+        Loads the file of an entry
+
+    compile(entry_id: str) -> dict:
+        Returns a copy of the template of an entry, with the overrides applied on the template of its base
+
+    lookup(extractor_type: str, extract_data: Any, target_keys: list, min_coverage: float) -> tuple[str, dict, bool, list]:
+        Finds an entry with the same shape, or the entry covering most of the extracted keys if it
+        covers at least 'min_coverage' of them. Returns the entry id, the template adapted to the
+        extracted keys, whether the shape matched exactly and the extracted keys which the entry
+        does not map, or None if no entry matches
+
+    save(extractor_type: str, extract_data: Any, target_keys: list, template: dict, base: str = None) -> str:
+        Stores a copy of 'template' for the shape of 'extract_data', as overrides of 'base' if given
+
+    filter_template(template: dict, removed_keys: set) -> dict:
+        Removes the nodes of the extracted keys in 'removed_keys' from a template and renumbers
+        the '@N' node references accordingly
+    """
+
+    def __init__(self, store_folder: str):
+        self.store_folder = os.path.expanduser(store_folder)
+        self.index_file_path = os.path.join(self.store_folder, 'index.json')
+        self.index = load_json(self.index_file_path) if os.path.exists(self.index_file_path) else {}
+        self.entries = {}
+        self.compiled = {}
+
+    @classmethod
+    def open(cls, store_folder: str):
+        if store_folder not in template_stores:
+            template_stores[store_folder] = cls(store_folder)
+        return template_stores[store_folder]
+
+    @staticmethod
+    def get_shape(extract_data: Any, target_keys: list):
+        return sorted(f"{record.section}/{record.key}" for record in ExtractRecord.iter_from_json(extract_data, target_keys))
+
+    @staticmethod
+    def get_entry_id(extractor_type: str, shape: list):
+        digest = hashlib.sha1(extractor_type.encode('utf8'))
+        for key in shape:
+            digest.update(b'\0' + key.encode('utf8'))
+        return digest.hexdigest()[:16]
+
+    def load_entry(self, entry_id: str):
+        if entry_id not in self.entries:
+            self.entries[entry_id] = load_json(os.path.join(self.store_folder, f'{entry_id}.json'))
+        return self.entries[entry_id]
+
+    def compile(self, entry_id: str):
+        if entry_id not in self.compiled:
+            entry = self.load_entry(entry_id)
+            template = self.compile(entry['base']) if entry.get('base') else {}
+            for template_key, template_props in entry['overrides'].items():
+                if template_props is None:
+                    template.pop(template_key, None)
+                else:
+                    template[template_key] = template_props
+            self.compiled[entry_id] = template
+
+        # The metadata of a run is filled into its template, so each caller gets its own copy
+        return copy.deepcopy(self.compiled[entry_id])
+
+    def lookup(self, extractor_type: str, extract_data: Any, target_keys: list, min_coverage: float):
+        shape = self.get_shape(extract_data, target_keys)
+        entry_id = self.get_entry_id(extractor_type, shape)
+        if entry_id in self.index:
+            return entry_id, self.compile(entry_id), True, []
+
+        # Partial match: the entry of the same extractor type covering most of the extracted keys
+        new_keys = set(shape)
+        best_id, best_coverage = None, 0
+        for candidate_id, info in self.index.items():
+            if info['extractor'] != extractor_type:
+                continue
+            coverage = len(new_keys.intersection(self.load_entry(candidate_id)['keys'])) / max(len(new_keys), 1)
+            if coverage > best_coverage:
+                best_id, best_coverage = candidate_id, coverage
+        if best_id is None or best_coverage < min_coverage:
+            return None
+
+        # Drop the nodes of keys which the matched shape has, but the new extract does not
+        new_names = {key.split('/', 1)[1] for key in new_keys}
+        removed_names = {key.split('/', 1)[1] for key in self.load_entry(best_id)['keys']} - new_names
+        unmapped = sorted(new_keys.difference(self.load_entry(best_id)['keys']))
+        return best_id, self.filter_template(self.compile(best_id), removed_names), False, unmapped
+
+    def save(self, extractor_type: str, extract_data: Any, target_keys: list, template: dict, base: str = None):
+        shape = self.get_shape(extract_data, target_keys)
+        entry_id = self.get_entry_id(extractor_type, shape)
+
+        if base:
+            base_template = self.compile(base)
+            overrides = {key: props for key, props in template.items() if base_template.get(key) != props}
+            overrides.update({key: None for key in base_template if key not in template})
+        else:
+            overrides = template
+        # The template stays with the caller, which may still change it
+        overrides = copy.deepcopy(overrides)
+
+        entry = {"extractor": extractor_type, "keys": shape, "base": base, "overrides": overrides}
+        os.makedirs(self.store_folder, exist_ok=True)
+        save_json(entry, os.path.join(self.store_folder, f'{entry_id}.json'))
+        self.entries[entry_id] = entry
+        self.compiled.pop(entry_id, None)
+
+        self.index[entry_id] = {"extractor": extractor_type, "size": len(shape)}
+        save_json(self.index, self.index_file_path)
+        return entry_id
+
+    @staticmethod
+    def filter_template(template: dict, removed_keys: set):
+        kept = [template_key for template_key in template
+                if template_key.split(":")[0].strip() not in removed_keys]
+        if len(kept) == len(template):
+            return template
+
+        positions = {template_key: index for index, template_key in enumerate(template)}
+        new_indices = {positions[template_key]: new_index for new_index, template_key in enumerate(kept)}
+        filtered = {}
+        for template_key in kept:
+            props = {}
+            for prop_key, prop_val in template[template_key].items():
+                if isinstance(prop_val, str) and prop_val.startswith("@") and prop_val[1:].isdigit():
+                    if int(prop_val[1:]) not in new_indices:
+                        continue
+                    prop_val = f"@{new_indices[int(prop_val[1:])]}"
+                props[prop_key] = prop_val
+            filtered[template_key] = props
+        return filtered
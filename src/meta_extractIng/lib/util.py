@@ -1,6 +1,11 @@
 import json
-from typing import Any
+import os
+from typing import Any, Iterable
 import csv
+import fnmatch
+import locale
+import mmap
+import sys
 
 
 def load_json(filename: str):
@@ -21,6 +26,35 @@ def load_json(filename: str):
         return json.load(file)
 
 
+# Loaded json files, keyed by file path, with the modification time and size they were loaded at
+json_cache = {}
+
+def load_json_cached(filename: str):
+    """	
+    Returns the contents in a json file like 'load_json', but keeps them in memory as long as the
+    file is not modified, so that long running processes do not parse the same files again.
+    The returned contents are shared between the callers and must not be modified.
+
+    Parameters
+    ----------
+    filename: str
+        name of the input file
+
+    Returns
+    ----------
+    Any
+        The contents of file
+    """
+    # Linked copies of the same file share one cache entry
+    filename = os.path.realpath(filename)
+    stat = os.stat(filename)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = json_cache.get(filename)
+    if cached is None or cached[0] != signature:
+        cached = json_cache[filename] = (signature, load_json(filename))
+    return cached[1]
+
+
 def save_json(data: Any, filename: str):
     """	
     Saves the content of 'data' attribute into a file with name 'filename' as json format  
@@ -38,16 +72,374 @@ def save_json(data: Any, filename: str):
         json.dump(data, file, indent=4, ensure_ascii=False)
 
 
-def extract_csv(filepath: str):
+def save_json_stream(data: dict, stream_key: str, items: Iterable, filename: str, serialized: bool = False):
+    """	
+    Saves the content of 'data' along with a list under 'stream_key' key into a file with name 'filename',
+    in the same json format as 'save_json'. The list is written item by item while 'items' is consumed,
+    so large lists are never held in memory as a whole.
+
+    Parameters
+    ----------
+    data: dict
+        Content of the file to be written before the streamed list
+
+    stream_key: str
+        Key of the streamed list, written as the last key of the file
+
+    items: Iterable
+        Items of the streamed list
+
+    serialized: bool
+        Whether the items are already formatted, each as a comma-separated group of one or
+        more list items formatted by 'dumps_json' at level 2, preceded by a new line and indentation
+
+    filename: str
+        name of the output file
+    """
+
+    with open(filename, "w", encoding='utf8') as file:
+        file.write("{")
+        for key, value in data.items():
+            file.write(f"\n    {dumps_json(key, 1)}: {dumps_json(value, 1)},")
+        file.write(f"\n    {dumps_json(stream_key, 1)}: [")
+        separator = ""
+        for item in items:
+            if serialized and not item:
+                continue
+            file.write(separator + (item if serialized else f"\n        {dumps_json(item, 2)}"))
+            separator = ","
+        file.write("\n    ]\n}" if separator else "]\n}")
+
+
+def dumps_json(value: Any, level: int):
+    """	
+    Returns 'value' in the json format of 'save_json', as it is written when nested 'level' levels deep
+
+    Parameters
+    ----------
+    value: Any
+        Content to be formatted
+
+    level: int
+        Nesting level of the content in the written file
+    """
+    return json.dumps(value, indent=4, ensure_ascii=False).replace("\n", "\n" + "    " * level)
+
+
+def read_marked_section(filepath: str, begin_marker: str, end_marker: str, inclusive: bool = False):
+    """	
+    Returns the lines of a text file between the first line containing 'begin_marker' and the next
+    line containing 'end_marker'. The file is memory-mapped and the markers are searched as bytes,
+    so only the section itself is decoded, however large the rest of the file is.
+
+    Parameters
+    ----------
+    filepath: str
+        File path to the text file
+
+    begin_marker: str
+        Marker of the first line of the section
+
+    end_marker: str
+        Marker of the last line of the section, searched after the first line
+
+    inclusive: bool
+        Whether the lines containing the markers belong to the section
+
+    Returns
+    ----------
+    str
+        The decoded section, with new lines translated as in text mode, or None if a marker is not found
+    """
+    encoding = locale.getpreferredencoding(False)
+    with open(filepath, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            begin = data.find(begin_marker.encode(encoding))
+            if begin == -1:
+                return None
+            begin_line_start = data.rfind(b"\n", 0, begin) + 1
+            begin_line_end = data.find(b"\n", begin)
+            if begin_line_end == -1:
+                return None
+            end = data.find(end_marker.encode(encoding), begin_line_end + 1)
+            if end == -1:
+                return None
+            end_line_start = data.rfind(b"\n", 0, end) + 1
+            end_line_end = data.find(b"\n", end)
+            if end_line_end == -1:
+                end_line_end = len(data)
+            if inclusive:
+                section = data[begin_line_start:end_line_end + 1]
+            else:
+                section = data[begin_line_end + 1:end_line_start]
+    return section.decode(encoding).replace("\r\n", "\n").replace("\r", "\n")
+
+
+def read_tail_section(filepath: str, begin_marker: str, max_size: int = 1 << 20, block_size: int = 1 << 16):
+    """	
+    Returns the lines of a text file from the last line containing 'begin_marker' to the end of the file.
+    The file is read backwards in blocks from its end, so a summary at the end of a large file is found
+    without reading the rest of it.
+
+    Parameters
+    ----------
+    filepath: str
+        File path to the text file
+
+    begin_marker: str
+        Marker of the first line of the section
+
+    max_size: int
+        Number of bytes at the end of the file searched for the marker
+
+    block_size: int
+        Number of bytes read at a time
+
+    Returns
+    ----------
+    str
+        The decoded section, with new lines translated as in text mode, or None if the marker is not found
+    """
+    encoding = locale.getpreferredencoding(False)
+    marker = begin_marker.encode(encoding)
+    with open(filepath, "rb") as file:
+        position = file.seek(0, os.SEEK_END)
+        data = b""
+        found = None  # Distance of the marker from the end of the file
+        while position > 0 and len(data) < max_size:
+            read_size = min(block_size, position)
+            position -= read_size
+            file.seek(position)
+            data = file.read(read_size) + data
+            if found is None:
+                # The marker may span the boundary to the block read before, which is searched again
+                begin = data.rfind(marker, 0, read_size + len(marker) - 1)
+                if begin != -1:
+                    found = len(data) - begin
+            if found is not None:
+                # The start of the marker's line may still be in the next block
+                line_start = data.rfind(b"\n", 0, len(data) - found)
+                if line_start != -1 or position == 0:
+                    section = data[line_start + 1:]
+                    return section.decode(encoding).replace("\r\n", "\n").replace("\r", "\n")
+    return None
+
+
+def load_config():
+    """
+    Returns the contents of 'config.json' file in the 'lib' folder
+
+    Returns
+    ----------
+    dict
+        The configuration of the package
+    """
+    return load_json_cached(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json'))
+
+
+# Detected delimiters, keyed by folder and header line of the csv files
+csv_delimiter_cache = {}
+
+CSV_DELIMITERS = ",;\t|"
+
+
+SKIPPED_FOLDERS = ('__output__', '__expected__')
+
+def match_patterns(name: str, patterns: Iterable):
+    """
+    Returns whether 'name' matches one of the glob 'patterns'
+    """
+    return any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+
+
+def scan_folder(folder_path: str, include: Iterable = None, exclude: Iterable = None, max_depth: int = 0,
+                folders: bool = False, _depth: int = 0, _visited: set = None):
+    """	
+    Scans a folder with os.scandir and lazily yields the matching entries, so that the processing of the
+    first entries can start before the scan has finished. The file type of an entry is taken from its
+    cached directory information, so no additional stat call is made on most file systems.
+    Hidden entries and the '__output__' and '__expected__' folders are always skipped. Symbolic links
+    to folders are followed, but a folder is only descended into once, so that link loops end.
+
+    Parameters
+    ----------
+    folder_path: str
+        Folder to scan
+
+    include: Iterable
+        Glob patterns, of which the name of a yielded entry has to match one. All entries match if not given
+
+    exclude: Iterable
+        Glob patterns of names to skip. Excluded folders are not descended into
+
+    max_depth: int
+        Number of nested folder levels to descend into, or None for no limit
+
+    folders: bool
+        Whether to yield folders instead of files
+
+    Returns
+    ----------
+    Iterator
+        The os.DirEntry of each matching entry
+    """
+    if _visited is None:
+        stat = os.stat(folder_path)
+        _visited = {(stat.st_dev, stat.st_ino)}
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            name = entry.name
+            if name.startswith('.') or (exclude and match_patterns(name, exclude)):
+                continue
+            if entry.is_dir():
+                if name in SKIPPED_FOLDERS:
+                    continue
+                if folders and (not include or match_patterns(name, include)):
+                    yield entry
+                if max_depth is None or _depth < max_depth:
+                    stat = entry.stat()
+                    if (stat.st_dev, stat.st_ino) not in _visited:
+                        _visited.add((stat.st_dev, stat.st_ino))
+                        yield from scan_folder(entry.path, include, exclude, max_depth, folders, _depth + 1, _visited)
+            elif not folders and entry.is_file() \
+                    and (not include or match_patterns(name, include)):
+                yield entry
+
+
+def detect_csv_delimiter(filepath: str, sample: str):
+    """	
+    Detects the delimiter of a csv file from a sample of its beginning. Files in the same folder
+    with the same header line share one detection. Only common delimiters are considered, so that
+    numeric data can not be mistaken for delimiters.
+
+    Parameters
+    ----------
+    filepath: str
+        File path to csv file
+
+    sample: str
+        The first characters of the file, including the header line
+
+    Returns
+    ----------
+    str
+        The detected delimiter
+    """
+    header_line = sample.split("\n", 1)[0]
+    key = (os.path.dirname(os.path.abspath(filepath)), header_line)
+    if key not in csv_delimiter_cache:
+        try:
+            csv_delimiter_cache[key] = csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS).delimiter
+        except csv.Error:
+            # Fall back to the most frequent candidate in the header line
+            csv_delimiter_cache[key] = max(CSV_DELIMITERS, key=header_line.count)
+    return csv_delimiter_cache[key]
+
+
+def read_csv_header(file: Any, filepath: str, delimiter: str = None):
+    """	
+    Opens a csv reader on 'file' and reads its header row. Fails before any row is parsed
+    if the header has no 'id' column.
+
+    Parameters
+    ----------
+    file: Any
+        The opened csv file
+
+    filepath: str
+        File path to csv file
+
+    delimiter: str
+        Delimiter of the file, automatically detected if not given
+
+    Returns
+    ----------
+    tuple
+        The csv reader, the list of header names and the delimiter
+    """
+    if delimiter is None:
+        delimiter = detect_csv_delimiter(filepath, file.read(1024))
+        file.seek(0)
+    csv_reader = csv.reader(file, delimiter=delimiter)
+    keys = next(csv_reader, [])
+    if "id" not in keys:
+        raise ValueError(f"{filepath}: the header has no 'id' column.")
+    return csv_reader, keys, delimiter
+
+
+def parse_csv_rows(csv_reader: Any, keys: list, filepath: str, line_offset: int = 0):
+    """	
+    Parses the rows of a csv reader into a dictionary of rows, as returned by 'extract_csv'.
+    Fails on the first row without id or with an id which already occurred in an earlier row.
+    'line_offset' is added to the line numbers of the reader in error messages.
+    """
+    id_index = keys.index("id")
+    final_dict = {}
+    for values in csv_reader:
+        id = values[id_index] if id_index < len(values) else ""
+        check_csv_id(id, final_dict, filepath, csv_reader.line_num + line_offset)
+        data_dict = dict(zip(keys, values))
+        data_dict = {k: v for k, v in data_dict.items() if k !=
+                     "" and v != ""}
+        del data_dict["id"]
+        final_dict[id] = data_dict
+    return {"csv_dict": {"headers": keys, "rows": final_dict}}
+
+
+def parse_csv_columns(csv_reader: Any, keys: list, filepath: str, line_offset: int = 0):
+    """	
+    Parses the rows of a csv reader into the columnar layout returned by 'extract_csv_columns'.
+    Fails on the first row without id or with an id which already occurred in an earlier row.
+    'line_offset' is added to the line numbers of the reader in error messages.
+    """
+    id_index = keys.index("id")
+    keys = [sys.intern(key) for key in keys]
+    column_indices = {key: index for index, key in enumerate(keys) if key != "" and key != "id"}
+    columns = {key: [] for key in column_indices}
+    nulls = {}
+    ids = []
+    known_ids = set()
+    for values in csv_reader:
+        id = values[id_index] if id_index < len(values) else ""
+        check_csv_id(id, known_ids, filepath, csv_reader.line_num + line_offset)
+        known_ids.add(id)
+        position = len(ids)
+        ids.append(id)
+        for key, index in column_indices.items():
+            value = values[index] if index < len(values) else ""
+            if value == "":
+                columns[key].append(None)
+                nulls.setdefault(key, []).append(position)
+            else:
+                columns[key].append(value)
+    return {"csv_dict": {"headers": keys, "ids": ids, "columns": columns, "nulls": nulls}}
+
+
+def check_csv_id(id: str, known_ids: Any, filepath: str, line_number: int):
+    """	
+    Fails on a row without id or with an id which already occurred in an earlier row.
+    """
+    if id == "":
+        raise ValueError(f"{filepath}: missing id in line {line_number}.")
+    if id in known_ids:
+        raise ValueError(f"{filepath}: duplicate id '{id}' in line {line_number}.")
+
+
+def extract_csv(filepath: str, delimiter: str = None):
     """	
     Extracts metadata in a csv file, first row should contain column names.
-    Delimiter is automatically detected.
+    Delimiter is automatically detected, unless it is given.
 
     Parameters
     ----------
     filepath: str
         File path to csv file
 
+    delimiter: str
+        Delimiter of the file, automatically detected if not given
+
     Returns
     ----------
     dict
@@ -55,20 +447,94 @@ def extract_csv(filepath: str):
             -- headers: List of header names
             -- rows: a dict where each key is id and its value are a dict such that,
                      each key is column name and its value is the corresponding value in that row
+
+    Raises
+    ----------
+    ValueError
+        If the header has no 'id' column, or if a row has no id or a duplicate id
     """
     with open(filepath, mode="r") as file:
-        sample = file.read(1024)
-        file.seek(0)
-        detected_dialect = csv.Sniffer().sniff(sample)
-        delimiter = detected_dialect.delimiter
-        csv_reader = csv.reader(file, delimiter=delimiter)
-        keys = next(csv_reader)
-        final_dict = {}
-        for values in csv_reader:
-            data_dict = dict(zip(keys, values))
-            data_dict = {k: v for k, v in data_dict.items() if k !=
-                         "" and v != ""}
-            id = data_dict["id"]
-            del data_dict["id"]
-            final_dict[id] = data_dict
-        return {"csv_dict": {"headers": keys, "rows": final_dict}}
+        csv_reader, keys, _ = read_csv_header(file, filepath, delimiter)
+        return parse_csv_rows(csv_reader, keys, filepath)
+
+
+def extract_csv_columns(filepath: str, delimiter: str = None):
+    """	
+    Extracts metadata in a csv file into a columnar layout, first row should contain column names.
+    Instead of a dictionary for each row, the values of each column are kept in one list,
+    and empty values are recorded in a sparse null mask. Header names are interned.
+    Delimiter is automatically detected, unless it is given.
+
+    Parameters
+    ----------
+    filepath: str
+        File path to csv file
+
+    delimiter: str
+        Delimiter of the file, automatically detected if not given
+
+    Returns
+    ----------
+    dict
+        A dictionary with a single key named 'csv_dict' with four items:
+            -- headers: List of header names
+            -- ids: List of the row ids
+            -- columns: a dict where each key is column name and its value is the list of values of that column,
+                        in the order of 'ids', with None for empty values
+            -- nulls: a dict where each key is column name and its value is the sorted list of the row indices
+                      with an empty value in that column. Columns without empty values are omitted
+
+    Raises
+    ----------
+    ValueError
+        If the header has no 'id' column, or if a row has no id or a duplicate id
+    """
+    with open(filepath, mode="r") as file:
+        csv_reader, keys, _ = read_csv_header(file, filepath, delimiter)
+        return parse_csv_columns(csv_reader, keys, filepath)
+
+
+def extract_csv_batch(filepaths: list, delimiter: str = None, columnar: bool = False):
+    """	
+    Extracts metadata from several csv files, typically sibling files written by the same instrument.
+    Each distinct header line is validated and its delimiter detected only once, the following files
+    with the same header line are parsed right away.
+
+    Parameters
+    ----------
+    filepaths: list
+        File paths to csv files
+
+    delimiter: str
+        Delimiter of the files, automatically detected if not given
+
+    columnar: bool
+        Whether to extract into the columnar layout of 'extract_csv_columns'
+
+    Returns
+    ----------
+    Iterator
+        Tuples of the file path and its extracted metadata, or the ValueError raised for that file,
+        so that an invalid file does not stop the batch
+    """
+    parse = parse_csv_columns if columnar else parse_csv_rows
+    headers = {}  # Header line -> (keys, delimiter), or None if the header is invalid
+    for filepath in filepaths:
+        try:
+            with open(filepath, mode="r") as file:
+                header_line = file.readline()
+                if header_line in headers:
+                    if headers[header_line] is None:
+                        raise ValueError(f"{filepath}: the header has no 'id' column.")
+                    keys, file_delimiter = headers[header_line]
+                    file.seek(0)
+                    csv_reader = csv.reader(file, delimiter=file_delimiter)
+                    next(csv_reader)
+                else:
+                    file.seek(0)
+                    headers[header_line] = None
+                    csv_reader, keys, file_delimiter = read_csv_header(file, filepath, delimiter)
+                    headers[header_line] = (keys, file_delimiter)
+                yield filepath, parse(csv_reader, keys, filepath)
+        except ValueError as error:
+            yield filepath, error
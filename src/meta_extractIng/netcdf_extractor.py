@@ -4,12 +4,28 @@ try:
     from lib.ontologyScraper import OntologyScraper
     from lib.metadataGeneratorHelper import MetadataGeneratorHelper
     from lib.jsonldGenerator import JSONLDGenerator
-    from lib.util import save_json
+    from lib.asyncPipeline import AsyncPipeline
+    from lib.jsonldDataset import JSONLDDataset
+    from lib.metadataCatalog import MetadataCatalog
+    from lib.util import save_json, load_config, scan_folder
 except ImportError:
     from .lib.ontologyScraper import OntologyScraper
     from .lib.metadataGeneratorHelper import MetadataGeneratorHelper
     from .lib.jsonldGenerator import JSONLDGenerator
-    from .lib.util import save_json
+    from .lib.asyncPipeline import AsyncPipeline
+    from .lib.jsonldDataset import JSONLDDataset
+    from .lib.metadataCatalog import MetadataCatalog
+    from .lib.util import save_json, load_config, scan_folder
+
+# Statements of the variables section of a CDL file end with ';', which may also be inside a string
+CDL_STATEMENT = re.compile(r'((?:[^";]|"(?:[^"\\]|\\.)*")+);')
+CDL_DECLARATION = re.compile(r'(char|u?byte|u?short|u?int(?:64)?|long|float|real|double|string)\s+(\w+)\s*(?:\(([^)]*)\))?$')
+CDL_ATTRIBUTE = re.compile(r'(\w*):(\w+)\s*=\s*(.*)$', re.DOTALL)
+CDL_STRING = re.compile(r'"((?:[^"\\]|\\.)*)"')
+CDL_ESCAPE = re.compile(r'\\(.)')
+CDL_ESCAPES = {"n": "\n", "t": "\t"}
+# Numbers with the type suffix of CDL, for example '1000.f', '100s' or '17549208.'
+CDL_NUMBER = re.compile(r'([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)([fFdD]|[uU]?[bBsSlL]{0,2}|)')
 
 def extract():
     """
@@ -49,30 +65,101 @@ def extract():
 
     output_folder = os.path.join(folder_path + '/__output__')
 
-    for file_name in os.listdir(folder_path):
-        if os.path.isfile(os.path.join(folder_path, file_name)):
-            if file_name == '.DS_Store':
-                continue
-            filename = file_name.split('.')[0]
-            filepath = f'{folder_path}/{file_name}'
-            extract_file_path = f'{output_folder}/extract_{filename}.json'
-            metadata_file_path = f'{output_folder}/metadata_{filename}.json'
+    config = load_config()
+    jsonld = not config.get("dataset_output", False)
+    simulations = (entry.path for entry in scan_folder(folder_path, exclude=config.get("scan_exclude"), max_depth=config.get("scan_max_depth", 0)))
+    if config.get("async_in_flight", 0):
+        # Reading, parsing and writing of different simulations overlap
+        pipeline = AsyncPipeline(read_simulation, parse_simulation,
+                                 lambda path, metadata_extract: write_simulation(path, output_folder, metadata_extract, jsonld=jsonld),
+                                 config["async_in_flight"], config.get("async_parse_workers", 0))
+        pipeline.start(simulations)
+    else:
+        for path in simulations:
+            process_simulation(path, output_folder, jsonld=jsonld)
+
+    if not jsonld:
+        # All runs are aggregated into one dataset document with a shared context
+        dataset = JSONLDDataset(output_folder, config.get("compact_csv", False), config.get("dataset_shard_size", 0),
+                                config.get("context_reference", ""), config.get("rdf_export", ""))
+        for file_path in dataset.write():
+            print(f"File {file_path} successfully created.")
+
+def process_simulation(filepath: str, output_folder: str, interactive: bool = True, jsonld: bool = True):
+    """
+    Extracts the metadata of a single NetCDF file and creates its metadata and JSON-LD files in 'output_folder'.
+
+    Parameters
+    ----------
+    filepath: str
+        File path to the NetCDF file
+
+    output_folder: str
+        Folder of the output files, holding 'classes.json' and 'context.json'
+
+    interactive: bool
+        Whether the user may be asked to create the template. If False, a ValueError is raised instead
+
+    jsonld: bool
+        Whether the JSON-LD file is created, which is left out when the runs are aggregated into a dataset
+    """
+    write_simulation(filepath, output_folder, parse_simulation(filepath, read_simulation(filepath)), interactive, jsonld)
+
+def read_simulation(filepath: str):
+    """
+    Reads the content of a NetCDF file, the I/O-bound first step of 'process_simulation'.
+    """
+    return NetCDFMetadataExtractor(filepath, None).read_content()
+
+def parse_simulation(filepath: str, content: str):
+    """
+    Extracts the metadata from the content of a NetCDF file, the CPU-bound second step of 'process_simulation'.
+    """
+    structured = load_config().get("netcdf_structured", False)
+    return NetCDFMetadataExtractor(filepath, None, structured).extract_content(content)
+
+def write_simulation(filepath: str, output_folder: str, metadata_extract: dict, interactive: bool = True, jsonld: bool = True):
+    """
+    Creates the extract, metadata and JSON-LD files of a NetCDF file from its extracted metadata,
+    the I/O-bound last step of 'process_simulation'.
+    """
+    filename = os.path.basename(filepath).split('.')[0]
+    extract_file_path = f'{output_folder}/extract_{filename}.json'
+    metadata_file_path = f'{output_folder}/metadata_{filename}.json'
 
-            metadataExtractor = NetCDFMetadataExtractor(filepath, extract_file_path)
-            metadataExtractor.start()
+    save_json(metadata_extract, extract_file_path)
 
-            metadata_generator = MetadataGeneratorHelper(extract_file_path, ["dimensions", "variables", "global_attributes"])
-            metadata_generator.start()  
-            
-            jsonLDGenerator = JSONLDGenerator(metadata_file_path, extract_file_path)
-            jsonLDGenerator.start()
+    metadata_generator = MetadataGeneratorHelper(extract_file_path, ["dimensions", "variables", "global_attributes"], "netcdf",
+                                                 interactive, metadata_extract)
+    metadata_generator.start()  
 
-            print(f"File {metadata_file_path.replace('.json','.jsonld')} successfully created.")
+    config = load_config()
+    if config.get("catalog_path"):
+        MetadataCatalog.open(config["catalog_path"]).add_run(output_folder, filename, "netcdf", metadata_extract,
+                                                             metadata_generator.metadata)
+
+    if not jsonld:
+        print(f"File {metadata_file_path} successfully created.")
+        return
+
+    jsonLDGenerator = JSONLDGenerator(metadata_file_path, extract_file_path, streaming=config.get("jsonld_streaming", False),
+                                      context_reference=config.get("context_reference", ""))
+    jsonLDGenerator.start(metadata_generator.metadata, metadata_extract)
+
+    print(f"File {metadata_file_path.replace('.json','.jsonld')} successfully created.")
+    if config.get("rdf_export"):
+        rdf_file_path = jsonLDGenerator.write_rdf(config["rdf_export"], metadata_generator.metadata, metadata_extract)
+        print(f"File {rdf_file_path} successfully created.")
     
 class NetCDFMetadataExtractor:
     """
     Extracts dimensions, variables, and global attributes from a CDL content file.																				
 
+    By default each string attribute of a variable is flattened into a '<variable>_<attribute>' key. In the
+    structured mode, given by 'netcdf_structured' in '../lib/config.json', each variable is kept as
+    {"type", "dimensions", "attributes"} with typed attribute values, numbers and lists of numbers included,
+    and the variables are indexed by their 'standard_name' and 'units' in the 'variable_index' key.
+
     Input: 																																							
         - CDL file specified by the user at runtime																														#
         - 'classes.json' file containing necessary class information
@@ -87,10 +174,13 @@ class NetCDFMetadataExtractor:
     classes : dict
         A dictionary which holds the 'classes' metadata, loaded from 'classes.json' file
 
+    structured : bool
+        Whether the variables are extracted in the structured mode
+
 
     Methods
     -------
-    __init__(self, filepath: str, extract_file_path: str) -> None:
+    __init__(self, filepath: str, extract_file_path: str, structured: bool = False) -> None:
         Initilaizes the 'current_folder_path' and 'extract_file_path' variables
 
     start(self) -> None:
@@ -102,20 +192,36 @@ class NetCDFMetadataExtractor:
     extract_variables(self, content: str) -> dict:
         Extract variables and their attributes from the CDL content
 
+    extract_variables_structured(self, content: str) -> dict:
+        Extract each variable with its type, its dimensions and its typed attributes from the CDL content, in one pass
+
+    parse_attribute_value(value: str) -> Any:
+        Returns the typed value of a CDL attribute: a string, a number, or a list of numbers
+
+    index_variables(variables: dict) -> dict:
+        Returns the names of the variables of each 'standard_name' and each 'units' value
+
     extract_global_attributes(self, content: str) -> dict[Any, str]:
         Extract global attributes from the CDL content
 
-    extract_metadata(self, read_file: str) -> dict[str, Any]:
-        Reads the content of the file 'read_file' and extracts metadata 
-        from it into the a dictionary with these top-level keys:
+    read_content(self) -> str:
+        Reads the content of the CDL file
+
+    extract_metadata(self) -> dict[str, Any]:
+        Reads the content of the CDL file and extracts metadata from it
+
+    extract_content(self, cdl_content: str) -> dict[str, Any]:
+        Extracts metadata from the CDL content into the a dictionary with these top-level keys:
             - dimensions
             - variables
             - global_attributes
+            - variable_index, in the structured mode
     """
 
-    def __init__(self, filepath: str, extract_file_path: str):
+    def __init__(self, filepath: str, extract_file_path: str, structured: bool = False):
         self.filepath = filepath
         self.extract_file_path = extract_file_path
+        self.structured = structured
     
     def start(self):
         extracted_metadata = self.extract_metadata()
@@ -146,6 +252,58 @@ class NetCDFMetadataExtractor:
                         attributes_dict[key] = value
         return attributes_dict
 
+    def extract_variables_structured(self, content: str):
+        variables = {}
+        variables_section = re.search(r'variables:\s*(.*?)\s*global attributes:', content, re.DOTALL)
+        if not variables_section:
+            return variables
+
+        for statement in CDL_STATEMENT.findall(variables_section.group(1)):
+            statement = statement.strip()
+            declaration = CDL_DECLARATION.match(statement)
+            if declaration:
+                variable_type, name, dimensions = declaration.groups()
+                variables[name] = {
+                    "type": variable_type,
+                    "dimensions": [dimension.strip() for dimension in (dimensions or "").split(',') if dimension.strip()],
+                    "attributes": {}
+                }
+                continue
+            # An attribute belongs to the variable named by its prefix, even if other variables are declared in between
+            attribute = CDL_ATTRIBUTE.match(statement)
+            if attribute and attribute.group(1) in variables:
+                name, attribute_name, value = attribute.groups()
+                variables[name]["attributes"][attribute_name] = self.parse_attribute_value(value)
+        return variables
+
+    @staticmethod
+    def parse_attribute_value(value: str):
+        strings = CDL_STRING.findall(value)
+        if strings:
+            # Adjacent strings of a multi-line attribute are concatenated
+            return ''.join(CDL_ESCAPE.sub(lambda match: CDL_ESCAPES.get(match.group(1), match.group(1)), string)
+                           for string in strings)
+
+        numbers = []
+        for item in value.split(','):
+            number = CDL_NUMBER.fullmatch(item.strip())
+            if not number:
+                return ' '.join(value.split())
+            digits, suffix = number.groups()
+            is_float = suffix.lower() in ('f', 'd') or any(character in digits for character in '.eE')
+            numbers.append(float(digits) if is_float else int(digits))
+        return numbers[0] if len(numbers) == 1 else numbers
+
+    @staticmethod
+    def index_variables(variables: dict):
+        index = {"standard_name": {}, "units": {}}
+        for name, variable in variables.items():
+            for attribute, names in index.items():
+                value = variable["attributes"].get(attribute)
+                if isinstance(value, str):
+                    names.setdefault(value, []).append(name)
+        return index
+
     def extract_global_attributes(self, content: str):
         global_attributes_section = content.split("global attributes:\n")[-1]
         global_vars = re.findall(
@@ -153,20 +311,28 @@ class NetCDFMetadataExtractor:
         return {global_var_name.strip(): ' '.join(global_var_value.split()) 
                 for global_var_name, global_var_value in global_vars}
 
-    def extract_metadata(self):
+    def read_content(self):
         with open(self.filepath, 'r') as file:
-            cdl_content = file.read()
+            return file.read()
+
+    def extract_metadata(self):
+        return self.extract_content(self.read_content())
 
+    def extract_content(self, cdl_content: str):
         dimensions_dict = self.extract_dimensions(cdl_content)
-        variables_dict = self.extract_variables(cdl_content)
+        variables_dict = self.extract_variables_structured(cdl_content) if self.structured \
+            else self.extract_variables(cdl_content)
         global_vars_dict = self.extract_global_attributes(cdl_content)
 
         # Combine all metadata into a single dictionary
-        return {
+        metadata = {
             "dimensions": dimensions_dict,
             "variables": variables_dict,
             "global_attributes": global_vars_dict
         }
+        if self.structured:
+            metadata["variable_index"] = self.index_variables(variables_dict)
+        return metadata
      
 if __name__ == "__main__":
     extract()
\ No newline at end of file
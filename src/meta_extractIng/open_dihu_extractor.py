@@ -1,14 +1,48 @@
+import ast
+import csv
+import json
 import os
+import re
 try:
     from lib.ontologyScraper import OntologyScraper
     from lib.metadataGeneratorHelper import MetadataGeneratorHelper
     from lib.jsonldGenerator import JSONLDGenerator
-    from lib.util import save_json
+    from lib.asyncPipeline import AsyncPipeline
+    from lib.jsonldDataset import JSONLDDataset
+    from lib.metadataCatalog import MetadataCatalog
+    from lib.util import save_json, read_marked_section, load_config, scan_folder
 except ImportError:
     from .lib.ontologyScraper import OntologyScraper
     from .lib.metadataGeneratorHelper import MetadataGeneratorHelper
     from .lib.jsonldGenerator import JSONLDGenerator
-    from .lib.util import save_json
+    from .lib.asyncPipeline import AsyncPipeline
+    from .lib.jsonldDataset import JSONLDDataset
+    from .lib.metadataCatalog import MetadataCatalog
+    from .lib.util import save_json, read_marked_section, load_config, scan_folder
+
+# Lines of the log file with performance values. The header line is written by every run, the scenario name
+# is needed to find the run in the timing file
+LOG_PERFORMANCE_PATTERNS = {
+    "header": re.compile(r'This is opendihu ([^,]+), built ([^,]+),.*?current time: ([^,]+), hostname: ([^,]+), n ranks: (\d+)'),
+    "duration": re.compile(r'duration of (.+?):\s*([\d.eE+-]+)\s*s\b'),
+    "config parse time": re.compile(r'Python config parsed in ([\d.eE+-]+)\s*s'),
+    "scenario name": re.compile(r'scenario_name:\s*([^,\s]+)'),
+}
+# All patterns at once, so that the lines without performance values are skipped with a single search
+LOG_PERFORMANCE_LINE = re.compile("|".join(pattern.pattern for pattern in LOG_PERFORMANCE_PATTERNS.values()))
+# Timing table which OpenDiHu appends a row per rank to at the end of every run
+TIMING_FILE = os.path.join("logs", "log.csv")
+# Columns of the timing file which are kept as strings, even if they look like numbers
+TIMING_TEXT_COLUMNS = ("timestamp", "hostname", "version", "scenarioName")
+INTEGER = re.compile(r'[+-]?\d+')
+# Tokens of a line of the python output: quoted strings, brackets, commas and colons, and the separator of
+# pairs written without a comma, two or more spaces before a name and a colon
+PYTHON_OUTPUT_TOKEN = re.compile(r'''(?P<string>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')'''
+                                 r'''|(?P<separator>\s{2,}(?=[A-Za-z_]\w*:\s))|[()\[\]{},:]|[^"'()\[\]{},:\s]+|\s+|["']''')
+OPENING_BRACKETS = "([{"
+CLOSING_BRACKETS = ")]}"
+# Only values starting like a python literal are evaluated
+PYTHON_LITERAL = re.compile(r'[-+.\d\[({"\']|(?:True|False|None)$')
 
 def extract():
     """
@@ -48,30 +82,118 @@ def extract():
 
     output_folder = os.path.join(folder_path + '/__output__')
 
-    for file_name in os.listdir(folder_path):
-        if os.path.isfile(os.path.join(folder_path, file_name)):
-            if file_name == '.DS_Store':
-                continue
-            filename = file_name.split('.')[0]
-            filepath = f'{folder_path}/{file_name}'
-            extract_file_path = f'{output_folder}/extract_{filename}.json'
-            metadata_file_path = f'{output_folder}/metadata_{filename}.json'
+    config = load_config()
+    jsonld = not config.get("dataset_output", False)
+    simulations = (entry.path for entry in scan_folder(folder_path, exclude=config.get("scan_exclude"), max_depth=config.get("scan_max_depth", 0)))
+    if config.get("async_in_flight", 0):
+        # Reading, parsing and writing of different simulations overlap
+        pipeline = AsyncPipeline(read_simulation, parse_simulation,
+                                 lambda path, metadata_extract: write_simulation(path, output_folder, metadata_extract, jsonld=jsonld),
+                                 config["async_in_flight"], config.get("async_parse_workers", 0))
+        pipeline.start(simulations)
+    else:
+        for path in simulations:
+            process_simulation(path, output_folder, jsonld=jsonld)
+
+    if not jsonld:
+        # All runs are aggregated into one dataset document with a shared context
+        dataset = JSONLDDataset(output_folder, config.get("compact_csv", False), config.get("dataset_shard_size", 0),
+                                config.get("context_reference", ""), config.get("rdf_export", ""))
+        for file_path in dataset.write():
+            print(f"File {file_path} successfully created.")
+
+def process_simulation(filepath: str, output_folder: str, interactive: bool = True, jsonld: bool = True):
+    """
+    Extracts the metadata of a single OpenDiHu log file and creates its metadata and JSON-LD files in 'output_folder'.
 
-            metadataExtractor = OpenDihuMetadataExtractor(filepath, extract_file_path)
-            metadataExtractor.start()
+    Parameters
+    ----------
+    filepath: str
+        File path to the OpenDiHu log file
 
-            metadata_generator = MetadataGeneratorHelper(extract_file_path, ["variables"])
-            metadata_generator.start()  
-            
-            jsonLDGenerator = JSONLDGenerator(metadata_file_path, extract_file_path)
-            jsonLDGenerator.start()
+    output_folder: str
+        Folder of the output files, holding 'classes.json' and 'context.json'
+
+    interactive: bool
+        Whether the user may be asked to create the template. If False, a ValueError is raised instead
+
+    jsonld: bool
+        Whether the JSON-LD file is created, which is left out when the runs are aggregated into a dataset
+    """
+    write_simulation(filepath, output_folder, parse_simulation(filepath, read_simulation(filepath)), interactive, jsonld)
 
-            print(f"File {metadata_file_path.replace('.json','.jsonld')} successfully created.")
+def read_simulation(filepath: str):
+    """
+    Reads the python output section of an OpenDiHu log file, and its performance lines and timing rows
+    if 'open_dihu_performance' is set, the I/O-bound first step of 'process_simulation'.
+    """
+    extractor = OpenDihuMetadataExtractor(filepath, None, load_config().get("open_dihu_performance", False))
+    return extractor.read_log(), extractor.read_performance()
+
+def parse_simulation(filepath: str, content: tuple):
+    """
+    Extracts the metadata from the python output section of an OpenDiHu log file and its performance,
+    the CPU-bound second step of 'process_simulation'.
+    """
+    section, performance = content
+    extractor = OpenDihuMetadataExtractor(filepath, None, structured=load_config().get("open_dihu_structured", False))
+    metadata_extract = extractor.extract_content(section)
+    if metadata_extract and performance is not None:
+        performance_data = extractor.extract_performance(*performance)
+        if performance_data:
+            metadata_extract["performance"] = performance_data
+    return metadata_extract
+
+def write_simulation(filepath: str, output_folder: str, metadata_extract: dict, interactive: bool = True, jsonld: bool = True):
+    """
+    Creates the extract, metadata and JSON-LD files of an OpenDiHu log file from its extracted metadata,
+    the I/O-bound last step of 'process_simulation'.
+    """
+    filename = os.path.basename(filepath).split('.')[0]
+    extract_file_path = f'{output_folder}/extract_{filename}.json'
+    metadata_file_path = f'{output_folder}/metadata_{filename}.json'
+
+    save_json(metadata_extract, extract_file_path)
+
+    metadata_generator = MetadataGeneratorHelper(extract_file_path, ["variables", "performance"], "open_dihu", interactive, metadata_extract)
+    metadata_generator.start()  
+
+    config = load_config()
+    if config.get("catalog_path"):
+        MetadataCatalog.open(config["catalog_path"]).add_run(output_folder, filename, "open_dihu", metadata_extract,
+                                                             metadata_generator.metadata)
+
+    if not jsonld:
+        print(f"File {metadata_file_path} successfully created.")
+        return
+
+    jsonLDGenerator = JSONLDGenerator(metadata_file_path, extract_file_path, streaming=config.get("jsonld_streaming", False),
+                                      context_reference=config.get("context_reference", ""))
+    jsonLDGenerator.start(metadata_generator.metadata, metadata_extract)
+
+    print(f"File {metadata_file_path.replace('.json','.jsonld')} successfully created.")
+    if config.get("rdf_export"):
+        rdf_file_path = jsonLDGenerator.write_rdf(config["rdf_export"], metadata_generator.metadata, metadata_extract)
+        print(f"File {rdf_file_path} successfully created.")
     
 class OpenDihuMetadataExtractor:
     """
     Processes an OpenDiHu log file, extracting metadata between specific markers.
 
+    If 'collect_performance' is set, the whole log file is also streamed line by line for the header of the
+    run (version, hostname, start time and number of MPI ranks), the durations of its stages and the time
+    to parse the python config. Only the matching lines are kept. The rows of the run in the timing file
+    'logs/log.csv' next to the log file are added to them: the rows with the start time of the run, or
+    else the last rows of its scenario. Both are extracted into the 'performance' section.
+
+    If 'structured' is set, the python output section is tokenized line by line instead of being split on
+    every comma and colon. Commas and colons within brackets and quotes belong to the value, and values
+    written as python literals (numbers, booleans, lists, tuples and dictionaries) are evaluated with
+    'ast.literal_eval'. A bracket left open continues the value on the next lines until it is closed, and one
+    which is never closed belongs to its line only.
+    A key without a value opens a scope, which holds the pairs of the following, further indented lines.
+    A key found more than once in a scope keeps all its values as a list.
+
     Input: 
         - OpenDiHU file specified by the user at runtime
         - 'classes.json' file containing necessary class information	
@@ -81,12 +203,22 @@ class OpenDihuMetadataExtractor:
 
     Attributes
     ----------
-    None
+    filepath : str
+        Path of the log file
+
+    extract_file_path : str
+        Path of the extract file written by 'start'
+
+    collect_performance : bool
+        Whether the performance lines and timing rows are read
+
+    structured : bool
+        Whether the python output section is parsed into typed and nested values
 
 
     Methods
     -------
-    __init__(self, filepath: str, extract_file_path: str) -> None:
+    __init__(self, filepath: str, extract_file_path: str, collect_performance: bool = False, structured: bool = False) -> None:
         Initilaizes the 'current_folder_path' and 'extract_file_path' variables
 
     start(self) -> None:
@@ -100,11 +232,55 @@ class OpenDihuMetadataExtractor:
 
     process_line(line: str) -> dict:
         Extract key-value pairs from a line and return as a dictionary
+
+    extract_metadata() -> dict:
+        Reads the log file and extracts its metadata, or returns None if it is not a log file
+
+    read_log() -> str:
+        Reads the section between the python output markers of the log file, or returns None
+        if it is not a log file or the markers are not found
+
+    extract_content(section: str) -> dict:
+        Extracts the variables from the python output section read by 'read_log'
+
+    extract_structured(section: str) -> dict:
+        Parses the python output section in a single pass into nested variables with typed values
+
+    split_line(line: str, depth: int = 0) -> tuple[list[tuple[int, int, int]], int]:
+        Returns the start, colon and end of each comma-separated segment of a line, and the depth of the
+        brackets left open at its end. The colon is None if the segment has no key
+
+    parse_line(line: str, segments: list = None) -> list[tuple[str, Any]]:
+        Returns the key and value pairs of a logical line, from its segments if they are given
+
+    evaluate_value(value: str) -> Any:
+        Returns a value evaluated as a python literal, or the value itself if it is not one
+
+    add_value(scope: dict, key: str, value: Any, repeated: set) -> None:
+        Adds a value to a scope, or to the list of values of its key if the key is repeated
+
+    read_performance() -> tuple[list[str], list[dict]]:
+        Reads the performance lines of the log file and the timing rows of the run, or returns None
+        if 'collect_performance' is not set or it is not a log file
+
+    read_timing(lines: list[str]) -> list[dict]:
+        Reads the rows of the run given by its performance lines from the timing file
+
+    get_timestamp(value: str) -> tuple:
+        Returns the numbers of a date and time, so that times with and without leading zeros are equal
+
+    parse_value(value: str) -> Any:
+        Returns a value of the timing file as an integer, a float or a string
+
+    extract_performance(lines: list[str], rows: list[dict]) -> dict:
+        Extracts the performance from the lines and rows read by 'read_performance'
     """
 
-    def __init__(self, filepath: str, extract_file_path: str):
+    def __init__(self, filepath: str, extract_file_path: str, collect_performance: bool = False, structured: bool = False):
         self.filepath = filepath
         self.extract_file_path = extract_file_path
+        self.collect_performance = collect_performance
+        self.structured = structured
     
     def start(self):
         extracted_metadata = self.extract_metadata()
@@ -125,36 +301,33 @@ class OpenDihuMetadataExtractor:
         return pairs
 
     def extract_metadata(self):
-        extension = os.path.splitext(self.filepath)[1]
-        if extension == '.log':
-            return self.extract_log()
-        else:
+        metadata = self.extract_content(self.read_log())
+        performance = self.read_performance()
+        if metadata and performance is not None:
+            performance_data = self.extract_performance(*performance)
+            if performance_data:
+                metadata["performance"] = performance_data
+        return metadata
+
+    def read_log(self):
+        if os.path.splitext(self.filepath)[1] != '.log':
             return None
-        
-    def extract_log(self):
-        begin_keyword = "begin python output"
-        end_keyword = "end python output"
+        # Only the section between the markers is decoded
+        return read_marked_section(self.filepath, "begin python output", "end python output")
 
-        begin_index, end_index = None, None
-
-        with open(self.filepath, 'r') as f:
-            lines = f.readlines()
-
-            # Find the lines containing the keywords
-            for i, line in enumerate(lines):
-                if self.find_marker(line, begin_keyword) and begin_index is None:
-                    begin_index = i
-                elif self.find_marker(line, end_keyword) and begin_index is not None:
-                    end_index = i
-                    break
+    def extract_content(self, section: str):
+        if os.path.splitext(self.filepath)[1] != '.log':
+            return None
 
         # Check if both markers were found
-        if begin_index is None or end_index is None:
+        if section is None:
             print("Error: Couldn't find the begin or end markers in the log file.")
             return {}
 
-        # Extract the section and join it as a single string
-        extracted_data = ''.join(lines[begin_index + 1:end_index]).strip()
+        if self.structured:
+            return {"variables": self.extract_structured(section)}
+
+        extracted_data = section.strip()
 
         data_dict = {"variables": {}}
 
@@ -164,6 +337,181 @@ class OpenDihuMetadataExtractor:
             data_dict["variables"].update(line_data)
 
         return data_dict
+
+    def extract_structured(self, section: str):
+        variables = {}
+        # The scope and the key of each list of repeated values, as a value may be a list itself
+        repeated = set()
+        # Open scopes as (indent of the key, scope of the key, key, scope opened by the key)
+        scopes = [[-1, None, None, variables]]
+        lines = section.splitlines()
+        index = 0
+        while index < len(lines):
+            line = lines[index]
+            index += 1
+            if not line.strip():
+                continue
+            indent = len(line) - len(line.lstrip())
+            segments, depth = self.split_line(line)
+            # A value with open brackets, as in a printed config, continues on the next lines until they are closed.
+            # The lines are joined once, so that a long value is not copied for each of its lines
+            continued_segments, offset, next_index = list(segments), len(line), index
+            while depth > 0 and next_index < len(lines):
+                next_line = lines[next_index]
+                next_index += 1
+                offset += 1
+                next_segments, depth = self.split_line(next_line, depth)
+                continued_segments[-1] = (continued_segments[-1][0], continued_segments[-1][1], next_segments[0][2] + offset)
+                continued_segments += [(start + offset, colon if colon is None else colon + offset, end + offset)
+                                       for start, colon, end in next_segments[1:]]
+                offset += len(next_line)
+            # A bracket which is never closed, as in 'note: 71% (of the fibers', belongs to its line only
+            if depth == 0 and next_index > index:
+                line = "\n".join(lines[index - 1:next_index])
+                segments = continued_segments
+                index = next_index
+
+            while indent <= scopes[-1][0]:
+                scopes.pop()
+            parent = scopes[-1]
+            if parent[3] is None:
+                # The first pair of the scope replaces the empty value of its key
+                parent[3] = {}
+                if (id(parent[1]), parent[2]) in repeated:
+                    parent[1][parent[2]][-1] = parent[3]
+                else:
+                    parent[1][parent[2]] = parent[3]
+            pairs = self.parse_line(line, segments)
+            for key, value in pairs:
+                self.add_value(parent[3], key, value, repeated)
+            if pairs and pairs[-1][1] == "":
+                scopes.append([indent, parent[3], pairs[-1][0], None])
+        return variables
+
+    def split_line(self, line: str, depth: int = 0):
+        segments = []
+        start, colon = 0, None
+        for match in PYTHON_OUTPUT_TOKEN.finditer(line):
+            token = match.group()
+            if token in OPENING_BRACKETS:
+                depth += 1
+            elif token in CLOSING_BRACKETS:
+                depth = max(depth - 1, 0)
+            elif depth == 0 and token == ":" and colon is None:
+                colon = match.start()
+            elif depth == 0 and (token == "," or match.lastgroup == "separator"):
+                segments.append((start, colon, match.start()))
+                start, colon = match.end(), None
+        segments.append((start, colon, len(line)))
+        return segments, depth
+
+    def parse_line(self, line: str, segments: list = None):
+        pairs = []
+        for start, colon, end in segments if segments is not None else self.split_line(line)[0]:
+            key = line[start:colon].strip() if colon is not None else ""
+            if key:
+                pairs.append([key, colon + 1, end])
+            elif pairs and line[start:end].strip():
+                # A segment without a key, as '2' in 'size: 1, 2', belongs to the previous value
+                pairs[-1][2] = end
+        return [(key, self.evaluate_value(line[value_start:end].strip())) for key, value_start, end in pairs]
+
+    @staticmethod
+    def evaluate_value(value: str):
+        if not PYTHON_LITERAL.match(value):
+            return value
+        try:
+            # Tuples become lists and dictionary keys strings, as they are written to json
+            return json.loads(json.dumps(ast.literal_eval(value)))
+        except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+            return value
+
+    @staticmethod
+    def add_value(scope: dict, key: str, value, repeated: set):
+        if key not in scope:
+            scope[key] = value
+        elif (id(scope), key) in repeated:
+            scope[key].append(value)
+        else:
+            scope[key] = [scope[key], value]
+            repeated.add((id(scope), key))
+
+    def read_performance(self):
+        if not self.collect_performance or os.path.splitext(self.filepath)[1] != '.log':
+            return None
+        with open(self.filepath, errors="replace") as file:
+            lines = [line.strip() for line in file if LOG_PERFORMANCE_LINE.search(line)]
+        return lines, self.read_timing(lines)
+
+    def read_timing(self, lines: list):
+        timing_path = os.path.join(os.path.dirname(self.filepath), TIMING_FILE)
+        if not os.path.isfile(timing_path):
+            return []
+        start_time = scenario_name = None
+        for line in lines:
+            match = LOG_PERFORMANCE_PATTERNS["header"].search(line)
+            if match and start_time is None:
+                start_time = self.get_timestamp(match.group(3))
+            match = LOG_PERFORMANCE_PATTERNS["scenario name"].search(line)
+            if match and scenario_name is None:
+                scenario_name = match.group(1)
+
+        # A header line starting with '#' is written again whenever the columns change
+        rows, scenario_rows, columns = [], [], []
+        with open(timing_path, newline="", errors="replace") as file:
+            for values in csv.reader(file, delimiter=";"):
+                if values and values[0].startswith("#"):
+                    columns = [value.strip().lstrip("#").strip() for value in values]
+                    continue
+                row = {column: value.strip() for column, value in zip(columns, values) if column and value.strip()}
+                if start_time and self.get_timestamp(row.get("timestamp", "")) == start_time:
+                    rows.append(row)
+                elif scenario_name and row.get("scenarioName") == scenario_name:
+                    scenario_rows.append(row)
+        if rows or not scenario_rows:
+            return rows
+        # The rows of the last run of the scenario share its timestamp
+        last_run = scenario_rows[-1].get("timestamp")
+        return [row for row in scenario_rows if row.get("timestamp") == last_run]
+
+    @staticmethod
+    def get_timestamp(value: str):
+        return tuple(int(number) for number in re.findall(r'\d+', value))
+
+    @staticmethod
+    def parse_value(value: str):
+        if INTEGER.fullmatch(value):
+            return int(value)
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+    def extract_performance(self, lines: list, rows: list):
+        performance = {}
+        durations = {}
+        for line in lines:
+            match = LOG_PERFORMANCE_PATTERNS["header"].search(line)
+            if match and "opendihu version" not in performance:
+                performance.update({"opendihu version": match.group(1).strip(), "build date": match.group(2).strip(),
+                                    "start time": match.group(3).strip(), "hostname": match.group(4).strip(),
+                                    "MPI ranks": int(match.group(5))})
+            match = LOG_PERFORMANCE_PATTERNS["config parse time"].search(line)
+            if match:
+                performance["python config parse time (s)"] = float(match.group(1))
+            for match in LOG_PERFORMANCE_PATTERNS["duration"].finditer(line):
+                durations[match.group(1).strip()] = float(match.group(2))
+        if durations:
+            performance["durations (s)"] = durations
+
+        # The timing rows are given by the rank which wrote them
+        timing = {}
+        for index, row in enumerate(rows):
+            timing[f"rank {row.get('rankNo', index)}"] = {column: value if column in TIMING_TEXT_COLUMNS else self.parse_value(value)
+                                                     for column, value in row.items()}
+        if timing:
+            performance["timing"] = timing
+        return performance
      
 if __name__ == "__main__":
     extract()
\ No newline at end of file
@@ -0,0 +1,30 @@
+import csv_extractor
+import gromacs_extractor
+import netcdf_extractor
+import open_dihu_extractor
+from lib.extractionService import ExtractionService
+from lib.util import load_config
+
+# 'process_simulation' function of each extractor, and whether its simulations are folders
+EXTRACTORS = {
+    "csv": (csv_extractor.process_simulation, False),
+    "netcdf": (netcdf_extractor.process_simulation, False),
+    "open_dihu": (open_dihu_extractor.process_simulation, False),
+    "gromacs": (gromacs_extractor.process_simulation, True),
+}
+
+def serve():
+    """
+    This method runs the extraction as a local HTTP service, configured by the 'service_*' keys in 'lib/config.json'.
+    The templates have to exist already, the service does not create them interactively.
+
+    Parameters
+    ----------
+    None
+    """
+    config = load_config()
+    service = ExtractionService(EXTRACTORS, config.get("service_workers", 0), config.get("service_max_requests", 16))
+    service.serve(config.get("service_host", "127.0.0.1"), config.get("service_port", 8765))
+
+if __name__ == "__main__":
+    serve()
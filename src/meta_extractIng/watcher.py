@@ -0,0 +1,77 @@
+import os
+import csv_extractor
+import gromacs_extractor
+import netcdf_extractor
+import open_dihu_extractor
+from lib.ontologyScraper import OntologyScraper
+from lib.folderWatcher import FolderWatcher
+from lib.util import load_config
+
+# Extractor module and kind of simulations of each choice
+EXTRACTORS = {
+    "0": (csv_extractor, {"include": ["*.csv"]}),
+    "1": (netcdf_extractor, {}),
+    "2": (open_dihu_extractor, {}),
+    "3": (gromacs_extractor, {"folders": True}),
+}
+
+def watch():
+    """
+    This method runs the extraction as a long running process. It watches a simulation folder and only
+    processes the simulations which are added or modified, while the extractors, the ontology, the context
+    and the templates stay loaded between them.
+
+    Parameters
+    ----------
+    None
+    """
+
+    print("Choose a file type to watch:")
+    print("0. CSV")
+    print("1. NetCDF")
+    print("2. OpenDiHu")
+    print("3. GROMACS")
+
+    choice = input("Enter your choice (0, 1, 2 or 3): ")
+    if choice not in EXTRACTORS:
+        print("Invalid choice. Exiting.")
+        return
+    extractor, simulations = EXTRACTORS[choice]
+
+    # Determine the absolute path of the parent directory of the script
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parent_dir = os.path.dirname(script_dir)
+
+    folder_path = input("Enter the folder path to watch: ").strip()
+
+    if not os.path.exists(f'{folder_path}/__output__/classes.json') \
+        or not os.path.exists(f'{folder_path}/__output__/context.json'):
+        scraper = OntologyScraper(folder_path)
+        scraper.scrape()
+
+    # Check if the folder path is absolute. If not, resolve it relative to both
+    # the script directory and parent directory
+    if not os.path.isabs(folder_path):
+        folder_path_script_dir = os.path.join(script_dir, folder_path)
+        folder_path_parent_dir = os.path.join(parent_dir, folder_path)
+
+        if os.path.exists(folder_path_script_dir):
+            folder_path = folder_path_script_dir
+        elif os.path.exists(folder_path_parent_dir):
+            folder_path = folder_path_parent_dir
+        else:
+            print(f"Folder not found: {folder_path}")
+            return
+
+    output_folder = os.path.join(folder_path + '/__output__')
+    process_existing = input("Process the simulations which already exist? (y/n): ").lower() == "y"
+
+    config = load_config()
+    watcher = FolderWatcher(folder_path, lambda path: extractor.process_simulation(path, output_folder),
+                            exclude=config.get("scan_exclude"), debounce=config.get("watch_debounce", 2.0),
+                            poll_interval=config.get("watch_poll_interval", 5.0),
+                            polling=config.get("watch_polling", False), **simulations)
+    watcher.watch(process_existing)
+
+if __name__ == "__main__":
+    watch()
@@ -0,0 +1,62 @@
+import unittest
+import operator
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng'))
+from lib.asyncPipeline import AsyncPipeline
+
+class TestAsyncPipeline(unittest.TestCase):
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.events = []
+        self.taken = 0
+        self.finished = 0
+        self.max_pending = 0
+
+    def items(self, count: int):
+        for index in range(count):
+            with self.lock:
+                self.taken += 1
+                self.max_pending = max(self.max_pending, self.taken - self.finished)
+            yield f"run{index}"
+
+    def read(self, item: str):
+        time.sleep(0.01)
+        return ":read"
+
+    def write(self, item: str, result: str):
+        with self.lock:
+            self.events.append(("start", item))
+        # The first simulation is slow to write, as if its template was created interactively
+        time.sleep(0.2 if item == "run0" else 0.01)
+        with self.lock:
+            self.events.append(("end", result))
+            self.finished += 1
+
+    def test_first_simulation_is_written_alone(self):
+        # The parse function runs in another process, so a picklable built-in is used
+        AsyncPipeline(self.read, operator.add, self.write, in_flight=4, parse_workers=2).start(self.items(12))
+        self.assertEqual(self.events[:2], [("start", "run0"), ("end", "run0:read")])
+        self.assertEqual(sorted(result for event, result in self.events if event == "end"),
+                         sorted(f"run{index}:read" for index in range(12)))
+
+    def test_in_flight_simulations_are_bounded(self):
+        AsyncPipeline(self.read, operator.add, self.write, in_flight=3, parse_workers=2).start(self.items(20))
+        self.assertEqual(self.finished, 20)
+        self.assertLessEqual(self.max_pending, 3)
+
+    def test_failed_simulations_are_skipped(self):
+        def read(item: str):
+            if item == "run0":
+                raise OSError("unreadable")
+            return ":read"
+
+        AsyncPipeline(read, operator.add, self.write, in_flight=2, parse_workers=1).start(self.items(5))
+        self.assertEqual(sorted(result for event, result in self.events if event == "end"),
+                         [f"run{index}:read" for index in range(1, 5)])
+
+if __name__ == '__main__':
+    unittest.main()
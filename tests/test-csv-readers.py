@@ -0,0 +1,101 @@
+import unittest
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import filecmp
+
+import rdflib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng'))
+from lib.util import extract_csv, extract_csv_columns, extract_csv_batch, save_json, load_json
+from lib.csvChunkReader import CsvChunkReader
+from lib.jsonldGenerator import JSONLDGenerator
+
+EXAMPLE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng', 'simulations', 'csv')
+
+class TestCsvReaders(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.filepath = os.path.join(self.folder, 'data.csv')
+        with open(self.filepath, 'w', newline='') as file:
+            writer = csv.writer(file, lineterminator='\r\n')
+            writer.writerow(['id', 'name', 'lat'])
+            for index in range(2000):
+                name = f'multi "line",\nname {index}' if index % 97 == 0 else f'name {index}'
+                writer.writerow([index, name, '' if index % 5 == 0 else index / 2])
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write(self, file_name: str, content: str):
+        with open(os.path.join(self.folder, file_name), 'w') as file:
+            file.write(content)
+        return os.path.join(self.folder, file_name)
+
+    def test_batch_reports_invalid_files(self):
+        valid = self.write('a.csv', 'id;x\n1;2.5\n2;\n')
+        duplicate = self.write('b.csv', 'id;x\n1;2.5\n1;3\n')
+        no_id = self.write('c.csv', 'x;y\n1;2\n')
+        results = dict(extract_csv_batch([valid, duplicate, no_id]))
+        self.assertEqual(results[valid], {"csv_dict": {"headers": ["id", "x"], "rows": {"1": {"x": "2.5"}, "2": {}}}})
+        self.assertIn("duplicate id '1' in line 3", str(results[duplicate]))
+        self.assertIn("no 'id' column", str(results[no_id]))
+
+    def test_columnar_extract(self):
+        filepath = self.write('a.csv', 'id,x,y\n1,2.5,\n2,,4\n')
+        self.assertEqual(extract_csv_columns(filepath), {"csv_dict": {
+            "headers": ["id", "x", "y"], "ids": ["1", "2"],
+            "columns": {"x": ["2.5", None], "y": [None, "4"]}, "nulls": {"x": [1], "y": [0]}}})
+
+    def test_chunked_extract_matches_serial(self):
+        reader = CsvChunkReader(self.filepath, workers=2, chunk_size=4096)
+        self.assertGreater(len(reader.find_chunks()), 1)
+        self.assertEqual(reader.extract(), extract_csv(self.filepath))
+        self.assertEqual(reader.extract(columnar=True), extract_csv_columns(self.filepath))
+
+    def test_chunked_jsonld_matches_serial(self):
+        shutil.copy(os.path.join(EXAMPLE_FOLDER, '__expected__', 'context.json'), self.folder)
+        metadata_file_path = os.path.join(self.folder, 'metadata_data.json')
+        extract_file_path = os.path.join(self.folder, 'extract_data.json')
+        save_json({"name: variable": {"has value": "#Value", "description": "Name"},
+                   "lat: variable": {"has value": "#Value"}}, metadata_file_path)
+        save_json(extract_csv(self.filepath), extract_file_path)
+        for compact_csv in (False, True):
+            generator = JSONLDGenerator(metadata_file_path, extract_file_path, compact_csv=compact_csv)
+            generator.start()
+            chunked_file_path = os.path.join(self.folder, 'chunked.jsonld')
+            reader = CsvChunkReader(self.filepath, workers=2, chunk_size=4096)
+            reader.write_jsonld(chunked_file_path, load_json(metadata_file_path), load_json(generator.context_file_path),
+                                compact_csv)
+            self.assertTrue(filecmp.cmp(generator.jsonld_file_path, chunked_file_path, shallow=False))
+            # The chunked extract is written as it is, the file is not parsed again
+            for columnar in (False, True):
+                extract = reader.extract(columnar)
+                os.remove(chunked_file_path)
+                os.rename(self.filepath, self.filepath + '.moved')
+                try:
+                    reader.write_jsonld(chunked_file_path, load_json(metadata_file_path),
+                                        load_json(generator.context_file_path), compact_csv, extract=extract)
+                finally:
+                    os.rename(self.filepath + '.moved', self.filepath)
+                self.assertTrue(filecmp.cmp(generator.jsonld_file_path, chunked_file_path, shallow=False))
+
+    def test_compact_rows_link_column_nodes(self):
+        shutil.copy(os.path.join(EXAMPLE_FOLDER, '__expected__', 'context.json'), self.folder)
+        metadata_file_path = os.path.join(self.folder, 'metadata_data.json')
+        extract_file_path = os.path.join(self.folder, 'extract_data.json')
+        save_json({"lat: variable": {"has value": "#Value", "description": "Latitude"}}, metadata_file_path)
+        save_json(extract_csv(self.write('a.csv', 'id,lat\n1,2.5\n2,3\n')), extract_file_path)
+        generator = JSONLDGenerator(metadata_file_path, extract_file_path, compact_csv=True)
+        generator.start()
+        graph = rdflib.Graph().parse(generator.jsonld_file_path, format='json-ld')
+        objects = list(graph.objects(None, rdflib.URIRef("http://w3id.org/nfdi4ing/metadata4ing#representsVariable")))
+        self.assertEqual(len(objects), 2)
+        for column in objects:
+            self.assertIsInstance(column, rdflib.URIRef)
+            self.assertIn((column, None, None), graph)
+
+if __name__ == '__main__':
+    unittest.main()
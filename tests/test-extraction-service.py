@@ -0,0 +1,80 @@
+import unittest
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng'))
+from lib.extractionService import ExtractionService
+
+class TestExtractionService(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.running = 0
+        self.max_running = 0
+        self.release = threading.Event()
+        self.release.set()
+        self.service = ExtractionService({"fake": (self.process, False), "broken": (self.fail, False)}, workers=4,
+                                         max_requests=4)
+
+    def tearDown(self):
+        self.service.executor.shutdown()
+        shutil.rmtree(self.folder)
+
+    def process(self, path: str, output_folder: str, interactive: bool = True):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        self.release.wait()
+        time.sleep(0.05)
+        os.makedirs(output_folder, exist_ok=True)
+        name = os.path.basename(path).split('.')[0]
+        with open(os.path.join(output_folder, f'metadata_{name}.jsonld'), "w") as file:
+            json.dump({"@graph": [{"@id": f"local:{name}"}]}, file)
+        self.running -= 1
+
+    def fail(self, path: str, output_folder: str, interactive: bool = True):
+        raise RuntimeError("template is broken")
+
+    def write(self, file_name: str):
+        path = os.path.join(self.folder, file_name)
+        with open(path, "w") as file:
+            file.write("")
+        return path
+
+    def test_extract(self):
+        status, body = self.service.handle({"extractor": "fake", "path": self.write("simulation 1.cdl")})
+        self.assertEqual((status, json.loads(body)), (200, {"@graph": [{"@id": "local:simulation 1"}]}))
+
+    def test_errors(self):
+        self.assertEqual(self.service.handle({"extractor": "csv", "path": self.folder})[0], 400)
+        self.assertEqual(self.service.handle({"extractor": "fake"})[0], 400)
+        status, body = self.service.handle({"extractor": "broken", "path": self.write("simulation 1.cdl")})
+        self.assertEqual((status, json.loads(body)), (500, {"error": "RuntimeError: template is broken"}))
+
+    def test_same_folder_is_serialised(self):
+        paths = [self.write(f"simulation {index}.cdl") for index in range(3)]
+        threads = [threading.Thread(target=self.service.handle, args=({"extractor": "fake", "path": path},))
+                   for path in paths]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.max_running, 1)
+
+    def test_too_many_requests(self):
+        self.service.executor.shutdown()
+        self.service = ExtractionService({"fake": (self.process, False)}, workers=1, max_requests=1)
+        self.release.clear()
+        thread = threading.Thread(target=self.service.handle, args=({"extractor": "fake", "path": self.write("a.cdl")},))
+        thread.start()
+        while not self.running:
+            time.sleep(0.01)
+        self.assertEqual(self.service.handle({"extractor": "fake", "path": self.write("b.cdl")})[0], 503)
+        self.release.set()
+        thread.join()
+
+if __name__ == '__main__':
+    unittest.main()
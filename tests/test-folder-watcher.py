@@ -0,0 +1,81 @@
+import unittest
+import _thread
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng'))
+from lib.folderWatcher import FolderWatcher
+
+class TestFolderWatcher(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.processed = []
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write(self, file_name: str, content: str, mode: str = 'w'):
+        with open(os.path.join(self.folder, file_name), mode) as file:
+            file.write(content)
+        return os.path.join(self.folder, file_name)
+
+    def watch(self, watcher: FolderWatcher, process_existing: bool = False):
+        # The watcher is stopped if the simulation is never processed
+        timer = threading.Timer(10, _thread.interrupt_main)
+        timer.start()
+        try:
+            watcher.watch(process_existing)
+        finally:
+            timer.cancel()
+
+    def stop_after_first(self, path: str):
+        self.processed.append((path, os.path.getsize(path), time.monotonic()))
+        raise KeyboardInterrupt
+
+    def test_polling_fallback_finds_changes(self):
+        existing = self.write('a.csv', 'id,x\n1,2\n')
+        watcher = FolderWatcher(self.folder, self.processed.append, include=['*.csv'], poll_interval=0, polling=True)
+        self.assertIsNone(watcher.inotify_fd)
+        watcher.signatures = watcher.scan()
+        self.assertEqual(watcher.wait_for_changes(0), set())
+
+        added = self.write('b.csv', 'id,x\n1,2\n')
+        self.write('notes.txt', 'ignored')
+        self.assertEqual(watcher.wait_for_changes(0), {added})
+        self.write('a.csv', '2,3\n', 'a')
+        self.assertEqual(watcher.wait_for_changes(0), {existing, added})
+
+    def test_debounce_waits_until_unchanged(self):
+        path = self.write('a.csv', 'id,x\n')
+        last_write = []
+
+        def append_rows():
+            for index in range(5):
+                time.sleep(0.1)
+                self.write('a.csv', f'{index},{index}\n', 'a')
+                last_write.append(time.monotonic())
+
+        writer = threading.Thread(target=append_rows)
+        writer.start()
+        watcher = FolderWatcher(self.folder, self.stop_after_first, debounce=0.3, poll_interval=0.05, polling=True)
+        self.watch(watcher, process_existing=True)
+        writer.join()
+
+        self.assertEqual(len(self.processed), 1)
+        processed_path, size, processed_time = self.processed[0]
+        self.assertEqual((processed_path, size), (path, os.path.getsize(path)))
+        self.assertGreaterEqual(processed_time - last_write[-1], 0.3)
+
+    def test_only_new_simulations_are_processed(self):
+        self.write('a.csv', 'id,x\n1,2\n')
+        threading.Timer(0.2, self.write, ['b.csv', 'id,x\n1,2\n']).start()
+        watcher = FolderWatcher(self.folder, self.stop_after_first, debounce=0.1, poll_interval=0.05, polling=True)
+        self.watch(watcher)
+        self.assertEqual([path for path, _, _ in self.processed], [os.path.join(self.folder, 'b.csv')])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import os
+import struct
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng'))
+from lib.gromacsBinaryReader import GromacsBinaryReader
+
+def xdr_string(value: str):
+    data = value.encode()
+    return struct.pack(">I", len(data)) + data + b"\0" * (-len(data) % 4)
+
+def gmx_string(value: str):
+    return struct.pack(">i", len(value) + 1) + xdr_string(value)
+
+def edr_frame(time: float, step: int, energies: list, sum_count: int):
+    header = struct.pack(">fiidqiqdiii", -2e10, -7777777, 5, time, step, sum_count, 1, 0.002, len(energies), 0, 1)
+    # One block with a subblock of two ints
+    header += struct.pack(">iiii", 7, 1, 0, 2) + struct.pack(">iii", 0, 0, 0)
+    values = [value for energy in energies for value in ([energy, energy, energy] if sum_count else [energy])]
+    return header + struct.pack(f">{len(values)}f", *values) + struct.pack(">ii", 1, 2)
+
+class TestGromacsBinaryReader(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        for file_name in os.listdir(self.folder):
+            os.remove(os.path.join(self.folder, file_name))
+        os.rmdir(self.folder)
+
+    def write(self, file_name: str, data: bytes):
+        file_path = os.path.join(self.folder, file_name)
+        with open(file_path, "wb") as file:
+            file.write(data)
+        return file_path
+
+    def test_tpr_header(self):
+        box = [5.0, 0, 0, 0, 5.0, 0, 0, 0, 7.5]
+        data = gmx_string("VERSION 2020.4") + struct.pack(">iii", 4, 119, 27) + gmx_string("release") \
+            + struct.pack(">iiif6iq", 33876, 2, 0, 0.0, 1, 1, 1, 1, 0, 1, 4096) + struct.pack("<9f", *box) + b"\0" * 4096
+        with GromacsBinaryReader(self.write("topol.tpr", data)) as reader:
+            header = reader.read_tpr_header()
+        self.assertEqual(header["GROMACS version"], "2020.4")
+        self.assertEqual((header["tpx version"], header["file tag"], header["number of atoms"]), (119, "release", 33876))
+        self.assertEqual(header["box (nm)"], box)
+        self.assertFalse(header["has forces"])
+
+    def test_edr_header(self):
+        data = struct.pack(">iii", -55555, 5, 2) + xdr_string("Potential") + xdr_string("kJ/mol") \
+            + xdr_string("Temperature") + xdr_string("K")
+        data += edr_frame(0.0, 0, [-1000.0, 300.0], 0) + edr_frame(2.0, 1000, [-1001.0, 301.0], 10)
+        # An incomplete last frame of a run which is still writing is not counted
+        data += edr_frame(4.0, 2000, [-1002.0, 302.0], 10)[:40]
+        with GromacsBinaryReader(self.write("ener.edr", data)) as reader:
+            header = reader.read_edr_header(count_frames=True)
+        self.assertEqual(header["energy terms"], "Potential, Temperature")
+        self.assertEqual(header["energy term units"]["Temperature"], "K")
+        self.assertEqual(header["number of frames"], 2)
+        self.assertEqual((header["last time (ps)"], header["last step"]), (2.0, 1000))
+
+    def test_edr_last_frame_without_counting(self):
+        data = struct.pack(">iii", -55555, 5, 1) + xdr_string("Potential") + xdr_string("kJ/mol")
+        # The magic number of the frames within the values of the last frame is skipped
+        last_frame = edr_frame(3.0, 1500, [0.0], 0)
+        last_frame = last_frame[:-12] + struct.pack(">i", -7777777) + last_frame[-8:]
+        data += edr_frame(0.0, 0, [-1000.0], 0) + edr_frame(2.0, 1000, [-1001.0], 0) + last_frame \
+            + edr_frame(4.0, 2000, [-1002.0], 10)[:40]
+        with GromacsBinaryReader(self.write("ener.edr", data)) as reader:
+            header = reader.read_edr_header()
+        self.assertNotIn("number of frames", header)
+        self.assertEqual((header["first time (ps)"], header["first step"]), (0.0, 0))
+        self.assertEqual((header["last time (ps)"], header["last step"]), (3.0, 1500))
+
+if __name__ == '__main__':
+    unittest.main()
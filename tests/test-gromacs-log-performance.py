@@ -0,0 +1,63 @@
+import unittest
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng'))
+from gromacs_extractor import GromacsMetadataExtractor, LOG_PERFORMANCE_MARKER
+from lib.util import read_tail_section
+
+LOG_TAIL = """	M E G A - F L O P S   A C C O U N T I N G
+
+ Computing:                               M-Number         M-Flops  % Flops
+-----------------------------------------------------------------------------
+ Total                                                 229234565.111   100.0
+-----------------------------------------------------------------------------
+
+     R E A L   C Y C L E   A N D   T I M E   A C C O U N T I N G
+
+On 1 MPI rank, each using 8 OpenMP threads
+
+ Computing:          Num   Num      Call    Wall time         Giga-Cycles
+                     Ranks Threads  Count      (s)         total sum    %
+-----------------------------------------------------------------------------
+ Neighbor search        1    8        251       0.305          7.310   1.8
+ Rest                                           0.544         13.056   0.5
+-----------------------------------------------------------------------------
+ Total                                         16.854        404.480 100.0
+-----------------------------------------------------------------------------
+
+               Core t (s)   Wall t (s)        (%)
+       Time:      134.832       16.854      800.0
+                 (ns/day)    (hour/ns)
+Performance:       51.274        0.468
+Finished mdrun on rank 0 Fri Oct 16 10:12:31 2020
+"""
+
+class TestGromacsLogPerformance(unittest.TestCase):
+    def setUp(self):
+        self.file = tempfile.NamedTemporaryFile("w", suffix=".log", delete=False)
+        self.file.write("GROMACS:      gmx mdrun, version 2020.4\n" + "Step Time\n" * 10000 + LOG_TAIL)
+        self.file.close()
+
+    def tearDown(self):
+        os.remove(self.file.name)
+
+    def test_read_tail_section(self):
+        for block_size in (7, 100, 1 << 16):
+            tail = read_tail_section(self.file.name, LOG_PERFORMANCE_MARKER, block_size=block_size)
+            self.assertEqual(tail, LOG_TAIL)
+        self.assertIsNone(read_tail_section(self.file.name, "A V E R A G E S"))
+
+    def test_log_performance(self):
+        extractor = GromacsMetadataExtractor(None, None)
+        extractor.extract_performance_from_log(LOG_TAIL)
+        performance = extractor.log_performance
+        self.assertEqual((performance["MPI ranks"], performance["OpenMP threads"]), (1, 8))
+        self.assertEqual((performance["ns/day"], performance["hour/ns"]), (51.274, 0.468))
+        self.assertEqual(performance["Wall time (s)"], 16.854)
+        self.assertEqual(performance["cycle accounting"]["Neighbor search"]["calls"], 251)
+        self.assertEqual(performance["cycle accounting"]["Total"], {"wall time (s)": 16.854, "giga-cycles": 404.48, "percent": 100.0})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng'))
+from lib.jobScriptParser import get_job_script_parser, parse_sacct
+
+SBATCH_SCRIPT = """#!/bin/bash
+#SBATCH --job-name=lysozyme
+#SBATCH -N 2
+#SBATCH --ntasks-per-node=8
+#SBATCH --cpus-per-task 4
+#SBATCH --time=1-12:00:00
+#SBATCH --mem=64G
+#SBATCH --gres=gpu:a100:4
+#SBATCH -p gpu   # partition
+export OMP_NUM_THREADS=4
+srun gmx_mpi mdrun -deffnm md -ntomp 4 -nb gpu
+"""
+
+PBS_SCRIPT = """#PBS -N md
+#PBS -l select=2:ncpus=32:mpiprocs=8:ngpus=2:mem=128gb
+#PBS -l walltime=48:00:00
+mpirun -np 16 gmx_mpi mdrun -ntomp 4 -ntmpi 1
+"""
+
+SACCT_DUMP = """JobID           JobName    Elapsed      NCPUS   NNodes     MaxRSS      State
+------------ ---------- ---------- ---------- -------- ---------- ----------
+123456         lysozyme   10:00:00         64        2             COMPLETED
+123456.0        gmx_mpi   09:59:58         64        2   8123456K  COMPLETED
+"""
+
+class TestJobScriptParser(unittest.TestCase):
+    def test_msub_directives(self):
+        content = "#MSUB -l nodes=1:ppn=18\n#MSUB -l walltime=24:00:00\n#MSUB -N edcHex_3_2\n"
+        parser = get_job_script_parser(content)
+        self.assertEqual(parser.parse_directives(content), {"nodes": "1", "ppn": "18"})
+        self.assertEqual(parser.parse_resources(content)["walltime (s)"], 86400)
+
+    def test_sbatch_resources(self):
+        resources = get_job_script_parser(SBATCH_SCRIPT).parse_resources(SBATCH_SCRIPT)
+        self.assertEqual((resources["nodes"], resources["tasks"], resources["cpus per task"]), (2, 16, 4))
+        self.assertEqual((resources["walltime (s)"], resources["memory (MB)"], resources["gpus"]), (129600, 131072, 8))
+        self.assertEqual((resources["job queue"], resources["OMP_NUM_THREADS"], resources["mdrun ntomp"]), ("gpu", 4, 4))
+
+    def test_sbatch_attached_short_options(self):
+        content = "#SBATCH -N2\n#SBATCH -n 8\n#SBATCH -t1:00:00\n#SBATCH -Jmd\n"
+        parser = get_job_script_parser(content)
+        self.assertEqual(parser.parse_directives(content), {"nodes": "2", "ntasks": "8", "time": "1:00:00", "job-name": "md"})
+        self.assertEqual(parser.parse_resources(content)["walltime (s)"], 3600)
+
+    def test_pbs_resources(self):
+        resources = get_job_script_parser(PBS_SCRIPT).parse_resources(PBS_SCRIPT)
+        self.assertEqual((resources["nodes"], resources["tasks"], resources["gpus"]), (2, 16, 4))
+        self.assertEqual((resources["walltime (s)"], resources["MPI ranks"], resources["mdrun ntmpi"]), (172800, 16, 1))
+        self.assertEqual(resources["memory (MB)"], 262144)
+        content = "#PBS -l nodes=2:ppn=4\n#PBS -l pmem=2gb\n"
+        self.assertEqual(get_job_script_parser(content).parse_resources(content)["memory (MB)"], 16384)
+        content = "#PBS -l nodes=2:ppn=4,mem=8gb\n"
+        self.assertEqual(get_job_script_parser(content).parse_resources(content)["memory (MB)"], 8192)
+
+    def test_sacct(self):
+        accounting = parse_sacct(SACCT_DUMP)
+        self.assertEqual((accounting["job id"], accounting["state"], accounting["allocated cores"]), ("123456", "COMPLETED", 64))
+        self.assertEqual((accounting["core-hours"], accounting["max RSS (MB)"]), (640.0, 7933.1))
+        self.assertEqual(parse_sacct("JobID|Elapsed|NCPUS|\n42|01:00:00|16|\n")["core-hours"], 16.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import rdflib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng'))
+from lib.jsonldDataset import JSONLDDataset
+from lib.jsonldGenerator import JSONLDGenerator
+from lib.util import save_json, load_json
+
+EXAMPLE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng', 'simulations', 'netcdf')
+
+METADATA = {
+    "ref_t: variable": {"has symbol": "ref_t", "has value": "300"},
+    "run: processing step": {"has input": "@ref_t"},
+}
+
+CSV_METADATA = {"lat: variable": {"has value": "#Value", "description": "Latitude"}}
+
+class TestJSONLDDataset(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        shutil.copy(os.path.join(EXAMPLE_FOLDER, '__expected__', 'context.json'), self.folder)
+        # Two runs with the same template, which would have the same local ids, and a csv run
+        for run in ("simulation 1", "simulation 2"):
+            save_json(METADATA, os.path.join(self.folder, f'metadata_{run}.json'))
+            save_json({"variables": {}}, os.path.join(self.folder, f'extract_{run}.json'))
+        save_json(CSV_METADATA, os.path.join(self.folder, 'metadata_parking.json'))
+        save_json({"csv_dict": {"headers": ["id", "lat"], "rows": {"1": {"lat": "2.5"}, "2": {}}}},
+                  os.path.join(self.folder, 'extract_parking.json'))
+        # A template without an extract is not a run
+        save_json(METADATA, os.path.join(self.folder, 'metadata_template.json'))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_run_prefixed_ids(self):
+        file_paths = JSONLDDataset(self.folder).write()
+        self.assertEqual(file_paths, [os.path.join(self.folder, 'dataset.jsonld')])
+        graph = load_json(file_paths[0])["@graph"]
+        self.assertEqual([item["@id"] for item in graph], [
+            "local:parking/1", "local:parking/2",
+            "local:simulation%201/variable_ref_t_1", "local:simulation%201/processing step_run_1",
+            "local:simulation%202/variable_ref_t_1", "local:simulation%202/processing step_run_1"])
+        self.assertEqual(graph[0]["data"][0]["@id"], "local:parking/lat_1")
+        # References point to the node of the same run
+        self.assertEqual(graph[3]["has input"], "local:simulation%201/variable_ref_t_1")
+        self.assertEqual(graph[5]["has input"], "local:simulation%202/variable_ref_t_1")
+
+        # The same node of both runs stays two nodes when the graph is merged
+        rdf_graph = rdflib.Graph().parse(file_paths[0], format='json-ld')
+        subjects = {str(subject) for subject in rdf_graph.subjects()}
+        self.assertTrue({"https://local-domain.org/simulation%201/variable_ref_t_1",
+                         "https://local-domain.org/simulation%202/variable_ref_t_1"} <= subjects)
+
+    def test_streamed_output_matches_run_documents(self):
+        dataset = JSONLDDataset(self.folder, context_reference="file")
+        graph = load_json(dataset.write()[0])
+        self.assertEqual(graph["@context"], ["context.json", {"local": "https://local-domain.org/"}])
+        for run in ("parking", "simulation 1"):
+            generator = JSONLDGenerator(os.path.join(self.folder, f'metadata_{run}.json'),
+                                        os.path.join(self.folder, f'extract_{run}.json'))
+            generator.start()
+            items = load_json(generator.jsonld_file_path)["@graph"]
+            prefix = f"local:{run.replace(' ', '%20')}/"
+            run_items = [item for item in graph["@graph"] if item["@id"].startswith(prefix)]
+            # The nodes are the same as in the document of the run, apart from the prefixed ids
+            self.assertEqual(json.dumps(run_items), json.dumps(items).replace('"local:', f'"{prefix}'))
+
+    def test_shards_replace_earlier_dataset(self):
+        JSONLDDataset(self.folder).write()
+        file_paths = JSONLDDataset(self.folder, shard_size=2, rdf_export="nq").write()
+        self.assertEqual([os.path.basename(file_path) for file_path in file_paths],
+                         ['dataset_1.jsonld', 'dataset_1.nq', 'dataset_2.jsonld', 'dataset_2.nq'])
+        self.assertFalse(os.path.exists(os.path.join(self.folder, 'dataset.jsonld')))
+        self.assertEqual(len(load_json(file_paths[2])["@graph"]), 2)
+        quads = rdflib.Dataset().parse(file_paths[3], format='nquads')
+        self.assertIn(rdflib.URIRef("https://local-domain.org/simulation%202"),
+                      {graph.identifier for graph in quads.graphs()})
+
+if __name__ == '__main__':
+    unittest.main()
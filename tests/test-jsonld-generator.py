@@ -0,0 +1,81 @@
+import unittest
+import filecmp
+import os
+import shutil
+import sys
+import tempfile
+
+import rdflib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng'))
+from lib.jsonldGenerator import JSONLDGenerator
+from lib.util import save_json, load_json, load_json_cached, load_config
+
+EXAMPLE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng', 'simulations', 'netcdf')
+
+METADATA = {
+    "ref_t: variable": {"has symbol": "ref_t", "has value": "300"},
+    "ref_t: unit": {"has symbol": "K"},
+    "nsteps: variable": {"has value": "5000"},
+    "run: processing step": {"has input": "@0", "has output": "@nsteps", "has parameter": "@ref_t: unit"},
+}
+
+class TestJSONLDGenerator(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        shutil.copy(os.path.join(EXAMPLE_FOLDER, '__expected__', 'context.json'), self.folder)
+        self.metadata_file_path = os.path.join(self.folder, 'metadata_run.json')
+        self.extract_file_path = os.path.join(self.folder, 'extract_run.json')
+        save_json(METADATA, self.metadata_file_path)
+        save_json({"variables": {}}, self.extract_file_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_references_by_index_and_name(self):
+        generator = JSONLDGenerator(self.metadata_file_path, self.extract_file_path)
+        run = list(generator.iter_graph(generator.build_node_table(METADATA)))[-1]
+        self.assertEqual(run["has input"], "local:variable_ref_t_1")
+        self.assertEqual(run["has output"], "local:variable_nsteps_2")
+        self.assertEqual(run["has parameter"], "local:unit_ref_t_1")
+
+    def test_dangling_references(self):
+        generator = JSONLDGenerator(self.metadata_file_path, self.extract_file_path)
+        for reference in ("@4", "@pressure", "@ref_t: processing step"):
+            node_table = generator.build_node_table({"run: processing step": {"has input": reference}})
+            with self.assertRaisesRegex(ValueError, "Dangling node reference"):
+                list(generator.iter_graph(node_table))
+
+    def test_streaming_writes_same_file(self):
+        JSONLDGenerator(self.metadata_file_path, self.extract_file_path).start()
+        expected = load_json(os.path.join(self.folder, 'metadata_run.jsonld'))
+        os.rename(os.path.join(self.folder, 'metadata_run.jsonld'), os.path.join(self.folder, 'expected.jsonld'))
+        JSONLDGenerator(self.metadata_file_path, self.extract_file_path, streaming=True).start()
+        self.assertEqual(load_json(os.path.join(self.folder, 'metadata_run.jsonld')), expected)
+        self.assertTrue(filecmp.cmp(os.path.join(self.folder, 'expected.jsonld'),
+                                    os.path.join(self.folder, 'metadata_run.jsonld'), shallow=False))
+
+    def test_context_reference(self):
+        local = {"local": "https://local-domain.org/"}
+        JSONLDGenerator(self.metadata_file_path, self.extract_file_path).start()
+        embedded_file_path = os.path.join(self.folder, 'embedded.jsonld')
+        os.rename(os.path.join(self.folder, 'metadata_run.jsonld'), embedded_file_path)
+        context = load_json(os.path.join(self.folder, 'context.json'))["@context"]
+        self.assertEqual(load_json(embedded_file_path)["@context"], {**context, **local})
+        # The cached context which is shared by all runs is left as it is
+        self.assertNotIn("local", load_json_cached(os.path.join(self.folder, 'context.json'))["@context"])
+
+        generator = JSONLDGenerator(self.metadata_file_path, self.extract_file_path, context_reference="remote")
+        generator.start()
+        self.assertEqual(load_json(generator.jsonld_file_path)["@context"], [load_config()["context_URL"], local])
+
+        generator = JSONLDGenerator(self.metadata_file_path, self.extract_file_path, context_reference="file")
+        generator.start()
+        self.assertEqual(load_json(generator.jsonld_file_path)["@context"], ["context.json", local])
+        # The context file next to the document is resolved to the same graph
+        referenced = rdflib.Graph().parse(generator.jsonld_file_path, format='json-ld')
+        self.assertGreater(len(referenced), 0)
+        self.assertEqual(set(referenced), set(rdflib.Graph().parse(embedded_file_path, format='json-ld')))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng'))
+from lib.metadataCatalog import MetadataCatalog
+
+class TestMetadataCatalog(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.output_folder = os.path.join(self.folder, '__output__')
+        self.catalog = MetadataCatalog(os.path.join(self.folder, 'catalog.db'))
+        for name, ref_t in (("run 1", "300"), ("run 2", "310")):
+            extract = {"variables": {"ref_t": ref_t, "nsteps": "5000"}, "log_data": {"GROMACS version": "2023.1"}}
+            metadata = {"ref_t: variable": {"has symbol": ref_t}, "run: processing step": {"has input": "@0"}}
+            self.catalog.add_run(self.output_folder, name, "gromacs", extract, metadata)
+
+    def tearDown(self):
+        self.catalog.connection.close()
+        shutil.rmtree(self.folder)
+
+    def test_find_runs(self):
+        self.assertEqual(self.catalog.find_runs([("ref_t", "300")]), [(self.folder, "run 1")])
+        self.assertEqual(self.catalog.find_runs([("nsteps", "5000"), ("GROMACS version", "2023*")]),
+                         [(self.folder, "run 1"), (self.folder, "run 2")])
+        self.assertEqual(self.catalog.find_runs([("ref_t", "310"), ("label", "ref_t")]), [(self.folder, "run 2")])
+        self.assertEqual(self.catalog.find_runs([("ref_t", "300"), ("nsteps", "1")]), [])
+
+    def test_add_run_replaces_entries(self):
+        self.catalog.add_run(self.output_folder, "run 1", "gromacs", {"variables": {"ref_t": "320"}}, {})
+        self.assertEqual(self.catalog.find_runs([("ref_t", "300")]), [])
+        self.assertEqual(self.catalog.get_entries(self.folder, "run 1"), [("extract", "variables", None, "ref_t", "320")])
+
+    def test_graph_entries(self):
+        entries = self.catalog.get_entries(self.folder, "run 2", "jsonld")
+        self.assertIn(("jsonld", "local:processing step_run_1", "processing step", "has input",
+                       "local:variable_ref_t_1"), entries)
+        self.assertIn(("jsonld", "local:variable_ref_t_1", "variable", "has symbol", "310"), entries)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import collections
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng'))
+from lib.models import ExtractRecord, TemplateEntry, GraphNode
+from lib.jsonldGenerator import JSONLDGenerator
+from lib.util import load_json
+
+SIMULATIONS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng', 'simulations')
+
+class TestModels(unittest.TestCase):
+    def expected(self, extractor: str, file_name: str):
+        return load_json(os.path.join(SIMULATIONS_FOLDER, extractor, '__expected__', file_name))
+
+    def test_extract_records_round_trip(self):
+        for extractor in ('netcdf', 'gromacs', 'open_dihu'):
+            extract = self.expected(extractor, 'extract_simulation 1.json')
+            records = list(ExtractRecord.iter_from_json(extract, list(extract)))
+            self.assertEqual(ExtractRecord.to_json(records), {key: value for key, value in extract.items() if value})
+            # Only the given sections are read, missing ones are skipped
+            self.assertEqual(ExtractRecord.to_json(ExtractRecord.iter_from_json(extract, ["variables", "missing"])),
+                             {"variables": extract["variables"]})
+
+        # A csv extract has a record for each column but the id
+        extract = self.expected('csv', 'extract_parking.json')
+        columns = list(ExtractRecord.iter_from_json(extract, ["csv_dict"]))
+        self.assertEqual([record.key for record in columns], [key for key in extract["csv_dict"]["headers"] if key != "id"])
+        self.assertTrue(all(record.value is None for record in columns))
+
+    def test_template_entries_round_trip(self):
+        for extractor in ('csv', 'netcdf', 'gromacs', 'open_dihu'):
+            template = self.expected(extractor, 'template.json')
+            entries = TemplateEntry.from_json(template)
+            self.assertEqual(json.dumps(TemplateEntry.to_json(entries)), json.dumps(template))
+        entry = TemplateEntry.from_json({" ref_t : variable ": {"has value": "#Value"}})[0]
+        self.assertEqual((entry.key, entry.name, entry.type), (" ref_t : variable ", "ref_t", "variable"))
+
+    def test_graph_nodes_round_trip(self):
+        for extractor in ('netcdf', 'gromacs', 'open_dihu'):
+            graph = self.expected(extractor, 'metadata_simulation 1.jsonld')["@graph"]
+            nodes = [GraphNode.from_json(item) for item in graph]
+            self.assertEqual(json.dumps([node.to_json() for node in nodes]), json.dumps(graph))
+        node = GraphNode.from_json({"@id": "local:run", "@type": "processing step", "has input": "local:x"})
+        self.assertIsNone(node.label)
+        self.assertEqual(node.to_json(), {"@id": "local:run", "@type": "processing step", "has input": "local:x"})
+
+    def test_slots(self):
+        record = ExtractRecord("variables", "ref_t", "300")
+        with self.assertRaises(AttributeError):
+            record.unit = "K"
+        self.assertIs(record.key, sys.intern("ref_t"))
+
+    def test_node_table_keeps_no_graph_items(self):
+        metadata = {f"v{index}: variable": {"has value": str(index)} for index in range(20000)}
+        generator = JSONLDGenerator('metadata_run.json', 'extract_run.json')
+        node_table = generator.build_node_table(metadata)
+        # The entries share the property dictionaries of the metadata
+        self.assertIs(node_table["entries"][0].properties, metadata["v0: variable"])
+        self.assertFalse(hasattr(node_table["entries"][0], '__dict__'))
+
+        peaks = []
+        for streamed in (True, False):
+            tracemalloc.start()
+            items = generator.iter_graph(generator.build_node_table(metadata))
+            graph = collections.deque(items, maxlen=0) if streamed else list(items)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            del items, graph
+        # Streaming the graph only holds the node table, not a dictionary for each node
+        self.assertLess(peaks[0], peaks[1] * 0.7)
+
+if __name__ == '__main__':
+    unittest.main()
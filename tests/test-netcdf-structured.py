@@ -0,0 +1,81 @@
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng'))
+from netcdf_extractor import NetCDFMetadataExtractor
+from lib.metadataGeneratorHelper import MetadataGeneratorHelper
+from lib.util import save_json
+
+EXAMPLE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng', 'simulations', 'netcdf')
+
+CDL_CONTENT = """netcdf air {
+dimensions:
+	lat = 73 ;
+	time = UNLIMITED ; // (365 currently)
+variables:
+	float air(time, lat) ;
+		air:standard_name = "air_temperature" ;
+		air:units = "degK" ;
+		air:valid_range = 150.f, 400.f ;
+		air:missing_value = 32766s ;
+		air:var_desc = "Air temperature\\n",
+    "A" ;
+	double time(time) ;
+		time:units = "hours since 1-1-1 00:00:0.0" ;
+		time:actual_range = 17549208., 17557944. ;
+
+global attributes:
+		:title = "mean daily air temperature" ;
+data:
+}"""
+
+class TestNetCDFStructured(unittest.TestCase):
+    def setUp(self):
+        self.metadata = NetCDFMetadataExtractor(None, None, structured=True).extract_content(CDL_CONTENT)
+
+    def test_typed_variables(self):
+        air = self.metadata["variables"]["air"]
+        self.assertEqual(air["type"], "float")
+        self.assertEqual(air["dimensions"], ["time", "lat"])
+        self.assertEqual(air["attributes"]["valid_range"], [150.0, 400.0])
+        self.assertEqual(air["attributes"]["missing_value"], 32766)
+        self.assertEqual(air["attributes"]["var_desc"], "Air temperature\nA")
+        self.assertEqual(self.metadata["variables"]["time"]["attributes"]["actual_range"], [17549208.0, 17557944.0])
+
+    def test_attributes_of_named_variable(self):
+        content = "variables:\n\tdouble t(t) ;\n\tdouble lat(t) ;\n\t\tt:units = \"s\" ;\n\t\tlat:units = \"deg\" ;\nglobal attributes:\n"
+        variables = NetCDFMetadataExtractor(None, None, structured=True).extract_variables_structured(content)
+        self.assertEqual(variables["t"]["attributes"], {"units": "s"})
+        self.assertEqual(variables["lat"]["attributes"], {"units": "deg"})
+
+    def test_variable_index(self):
+        self.assertEqual(self.metadata["variable_index"]["standard_name"], {"air_temperature": ["air"]})
+        self.assertEqual(self.metadata["variable_index"]["units"]["degK"], ["air"])
+
+    def test_flattened_by_default(self):
+        variables = NetCDFMetadataExtractor(None, None).extract_content(CDL_CONTENT)["variables"]
+        self.assertEqual(variables["air_units"], "degK")
+        self.assertNotIn("variable_index", NetCDFMetadataExtractor(None, None).extract_content(CDL_CONTENT))
+
+    def test_template_value_paths(self):
+        folder = tempfile.mkdtemp()
+        try:
+            for file_name in ('context.json', 'classes.json'):
+                shutil.copy(os.path.join(EXAMPLE_FOLDER, '__expected__', file_name), folder)
+            extract = {"variables": {**self.metadata["variables"], "scale": "2.5"}}
+            save_json(extract, os.path.join(folder, 'extract_run.json'))
+            save_json({"air: variable": {"has unit": "#attributes/units", "has kind": "#type"},
+                       "scale: variable": {"has value": "#Value", "has rank": "#1"}}, os.path.join(folder, 'template.json'))
+            helper = MetadataGeneratorHelper(os.path.join(folder, 'extract_run.json'), ["variables"], "netcdf", False, extract)
+            helper.create_metadata_with_template()
+        finally:
+            shutil.rmtree(folder)
+        self.assertEqual(helper.metadata["air: variable"], {"has unit": "degK", "has kind": "float"})
+        # A constant starting with '#' is written as it is for a plain extracted value
+        self.assertEqual(helper.metadata["scale: variable"], {"has value": "2.5", "has rank": "#1"})
+
+if __name__ == '__main__':
+    unittest.main()
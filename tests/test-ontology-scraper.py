@@ -0,0 +1,112 @@
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+
+from rdflib import Graph, Literal, Namespace
+from rdflib.namespace import RDF, RDFS, OWL, SKOS
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng'))
+from lib.ontologyScraper import OntologyScraper, NAMESPACES, prepared_queries, run_query
+from lib.util import save_json
+
+EX = Namespace("http://example.org/ontology#")
+
+def build_ontology():
+    graph = Graph()
+    labels = {"Zebra": "zebra", "Apple": "apple", "Mango": "mango", "Berry": "berry", "Cherry": "cherry"}
+    for name, label in labels.items():
+        graph.add((EX[name], RDF.type, OWL.Class))
+        graph.add((EX[name], RDFS.label, Literal(label, lang="en")))
+    # The preferred label is used over the label, labels in other languages are ignored
+    graph.add((EX.Cherry, SKOS.prefLabel, Literal("sour cherry", lang="en")))
+    graph.add((EX.Cherry, RDFS.label, Literal("Kirsche", lang="de")))
+    # A sub-class sorted before its super-class still inherits its data properties
+    graph.add((EX.Apple, RDFS.subClassOf, EX.Zebra))
+    graph.add((EX.Berry, RDFS.subClassOf, EX.Apple))
+    graph.add((EX.Mango, OWL.disjointWith, EX.Zebra))
+    for name, property_type, domain, range_ in (("stripes", OWL.DatatypeProperty, EX.Zebra, None),
+                                                 ("weight", OWL.DatatypeProperty, EX.Apple, None),
+                                                 ("eats", OWL.ObjectProperty, EX.Zebra, EX.Apple)):
+        graph.add((EX[name], RDF.type, property_type))
+        graph.add((EX[name], RDFS.label, Literal(name, lang="en")))
+        graph.add((EX[name], RDFS.domain, domain))
+        if range_ is not None:
+            graph.add((EX[name], RDFS.range, range_))
+    graph.add((EX.marty, RDF.type, OWL.NamedIndividual))
+    graph.add((EX.marty, RDF.type, EX.Zebra))
+    graph.add((EX.marty, RDFS.label, Literal("Marty", lang="en")))
+    return graph
+
+class TestOntologyScraper(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        # An existing context is not downloaded again
+        os.mkdir(os.path.join(self.folder, '__output__'))
+        save_json({"@context": {}}, os.path.join(self.folder, '__output__', 'context.json'))
+        self.ontology_path = os.path.join(self.folder, 'ontology.owl')
+        build_ontology().serialize(self.ontology_path, format="xml")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def scrape(self, workers: int):
+        scraper = OntologyScraper(self.folder)
+        scraper.url = self.ontology_path
+        scraper.workers = workers
+        scraper.scrapOntology()
+        return scraper
+
+    def test_parallel_matches_serial(self):
+        serial = self.scrape(0)
+        parallel = self.scrape(2)
+        self.assertEqual(list(serial.classes_dict), ["apple", "berry", "mango", "sour cherry", "zebra"])
+        self.assertEqual(parallel.classes_dict, serial.classes_dict)
+        self.assertEqual(list(parallel.classes_dict), list(serial.classes_dict))
+
+        classes = serial.classes_dict
+        self.assertEqual(classes["zebra"]["has members"], {"Marty": "named individual"})
+        self.assertEqual(classes["zebra"]["has sub-classes"], {"apple": "class"})
+        self.assertEqual(classes["mango"]["has is disjoint with"], {"zebra": "class"})
+        self.assertEqual(classes["apple"]["is in range of"], {"eats": "object property"})
+        # Data properties are inherited through all super-classes, object properties are not
+        self.assertEqual(classes["berry"]["is in domain of"], {"weight": "data property", "stripes": "data property"})
+        self.assertNotIn("eats", classes["apple"]["is in domain of"])
+
+        # The query times of the workers are added up
+        self.assertEqual({name: count for name, (count, _) in parallel.query_times.items()},
+                         {name: count for name, (count, _) in serial.query_times.items()})
+        self.assertEqual(serial.query_times["members"][0], 5)
+
+    def test_prepared_queries_bind_class(self):
+        graph = build_ontology()
+        query = """
+        SELECT ?subclass
+        WHERE { ?subclass rdfs:subClassOf ?classIRI . }
+        """
+        prepared_queries.pop('test sub-classes', None)
+        self.assertEqual([str(row[0]) for row in run_query('test sub-classes', query, graph, str(EX.Zebra))], [str(EX.Apple)])
+        prepared = prepared_queries['test sub-classes']
+        # The query is prepared once, the next class is only bound to it
+        self.assertEqual([str(row[0]) for row in run_query('test sub-classes', query, graph, str(EX.Apple))], [str(EX.Berry)])
+        self.assertIs(prepared_queries['test sub-classes'], prepared)
+        self.assertEqual(run_query('test sub-classes', query, graph, str(EX.Berry)), [])
+
+        # The bound queries find the same as the queries with the class written into them
+        for classIRI in (EX.Zebra, EX.Apple, EX.Mango):
+            for onDomain in (True, False):
+                for onObjectProperty in (True, False):
+                    labels = OntologyScraper.queryClassDomainOrRange(graph, str(classIRI), onDomain, onObjectProperty)
+                    formatted = graph.query(f"""
+                        SELECT ?property ?label WHERE {{
+                            ?property a owl:{'ObjectProperty' if onObjectProperty else 'DatatypeProperty'} ;
+                            rdfs:{'domain' if onDomain else 'range'} <{classIRI}> ;
+                            rdfs:label ?label .
+                        }}""", initNs=NAMESPACES)
+                    self.assertEqual(labels, [str(row[1]) for row in formatted])
+        self.assertEqual(OntologyScraper.queryClassDomainOrRange(graph, str(EX.Zebra), True, True), ["eats"])
+        self.assertEqual(OntologyScraper.queryClassDomainOrRange(graph, str(EX.Apple), True, False), ["weight"])
+
+if __name__ == '__main__':
+    unittest.main()
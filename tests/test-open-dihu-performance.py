@@ -0,0 +1,61 @@
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng'))
+from open_dihu_extractor import OpenDihuMetadataExtractor
+
+LOG_CONTENT = """This is opendihu 1.2, built Feb 18 2021, C++ 201402, GCC 10.2.0, current time: 2021/6/8 17:50:42, hostname: pcsgs02, n ranks: 2
+begin python output
+scenario_name: 20mus, n_subdomains: 1 1 1,  n_ranks: 2,  end_time: 80.0
+end python output
+duration of assembling this list: 100.970 s
+Python config parsed in 102.7s.
+"""
+
+TIMING_CONTENT = """# timestamp;hostname;version;nRanks;rankNo;scenarioName;durationInit;durationSolve;nIterations
+2021/6/1 09:00:00;pcsgs02;1.2;2;0;20mus;1.0;2.0;10
+2021/06/08 17:50:42;pcsgs02;1.2;2;0;20mus;101.2;5.5e2;1000
+2021/06/08 17:50:42;pcsgs02;1.2;2;1;20mus;101.3;5.4e2;1000
+"""
+
+class TestOpenDihuPerformance(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.log_path = os.path.join(self.folder, "simulation 1.log")
+        with open(self.log_path, "w") as file:
+            file.write(LOG_CONTENT)
+        os.mkdir(os.path.join(self.folder, "logs"))
+        with open(os.path.join(self.folder, "logs", "log.csv"), "w") as file:
+            file.write(TIMING_CONTENT)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_performance(self):
+        metadata = OpenDihuMetadataExtractor(self.log_path, None, collect_performance=True).extract_metadata()
+        performance = metadata["performance"]
+        self.assertEqual(metadata["variables"]["scenario_name"], "20mus")
+        self.assertEqual((performance["MPI ranks"], performance["hostname"]), (2, "pcsgs02"))
+        self.assertEqual(performance["python config parse time (s)"], 102.7)
+        self.assertEqual(performance["durations (s)"], {"assembling this list": 100.97})
+        self.assertEqual(list(performance["timing"]), ["rank 0", "rank 1"])
+        self.assertEqual(performance["timing"]["rank 1"]["durationSolve"], 540.0)
+        self.assertEqual(performance["timing"]["rank 0"]["version"], "1.2")
+
+    def test_timing_of_last_scenario_run(self):
+        with open(self.log_path, "w") as file:
+            file.write(LOG_CONTENT.replace("2021/6/8", "2021/7/1"))
+        lines, rows = OpenDihuMetadataExtractor(self.log_path, None, collect_performance=True).read_performance()
+        self.assertEqual([row["rankNo"] for row in rows], ["0", "1"])
+        self.assertEqual(rows[0]["timestamp"], "2021/06/08 17:50:42")
+
+    def test_performance_is_opt_in(self):
+        extractor = OpenDihuMetadataExtractor(self.log_path, None)
+        self.assertIsNone(extractor.read_performance())
+        self.assertNotIn("performance", extractor.extract_metadata())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng'))
+from open_dihu_extractor import OpenDihuMetadataExtractor
+
+PYTHON_OUTPUT = """Loading variables from "20mus.py".
+scenario_name: 20mus, n_subdomains: 1 1 1,  n_ranks: 2,  end_time: 80.0
+output_timestep: 1.0e+03  stimulation_frequency: 0.1 1/ms = 100.0 Hz
+paraview_output: True, fiber_file: "fibers, 49x49.bin"
+meshes: {'3Dmesh': {'nElements': (24, 24, 30)}, 'ranks': [0, 1]}
+solver: {'type': 'cg',
+         'relativeTolerance': 1e-10}
+per fiber: 1D mesh    nodes global: 1481, local: 1481
+    linear 3D mesh    nodes global: 25 x 25 x 31 = 19375, local: 25 x 25 x 31 = 19375
+number of degrees of freedom:
+                    1D fiber:       1481  (per process: 1481)
+                 3D bidomain:      19375  (per process: 19375)
+stimulated MUs: 16, not stimulated MUs: 0
+"""
+
+class TestOpenDihuStructured(unittest.TestCase):
+    def setUp(self):
+        self.variables = OpenDihuMetadataExtractor("simulation.log", None, structured=True).extract_content(PYTHON_OUTPUT)["variables"]
+
+    def test_typed_values(self):
+        self.assertEqual((self.variables["n_subdomains"], self.variables["n_ranks"]), ("1 1 1", 2))
+        self.assertEqual((self.variables["output_timestep"], self.variables["stimulation_frequency"]), (1000.0, "0.1 1/ms = 100.0 Hz"))
+        self.assertIs(self.variables["paraview_output"], True)
+        self.assertEqual(self.variables["fiber_file"], "fibers, 49x49.bin")
+
+    def test_nested_values(self):
+        self.assertEqual(self.variables["meshes"], {"3Dmesh": {"nElements": [24, 24, 30]}, "ranks": [0, 1]})
+        self.assertEqual(self.variables["solver"], {"type": "cg", "relativeTolerance": 1e-10})
+
+    def test_scopes_and_repeated_keys(self):
+        self.assertEqual(self.variables["local"], [1481, "25 x 25 x 31 = 19375"])
+        self.assertEqual(self.variables["number of degrees of freedom"]["3D bidomain"], "19375  (per process: 19375)")
+        self.assertEqual((self.variables["stimulated MUs"], self.variables["not stimulated MUs"]), (16, 0))
+
+    def test_continued_values(self):
+        extractor = OpenDihuMetadataExtractor("simulation.log", None, structured=True)
+        self.assertEqual(extractor.extract_structured("a: [1,\n\n 2]\nb: 3"), {"a": [1, 2], "b": 3})
+        self.assertEqual(extractor.extract_structured("a: [1, 2\n 3]\nb: 4"), {"a": "[1, 2\n 3]", "b": 4})
+        self.assertEqual(extractor.extract_structured("note: 71% (of the fibers\nb: 5"), {"note": "71% (of the fibers", "b": 5})
+
+    def test_flat_by_default(self):
+        variables = OpenDihuMetadataExtractor("simulation.log", None).extract_content(PYTHON_OUTPUT)["variables"]
+        self.assertEqual(variables["n_ranks"], "2")
+        self.assertNotIn("stimulation_frequency", variables)
+
+if __name__ == '__main__':
+    unittest.main()
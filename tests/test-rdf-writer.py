@@ -0,0 +1,53 @@
+import unittest
+import glob
+import os
+import sys
+import tempfile
+
+import rdflib
+from rdflib.compare import isomorphic
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng'))
+from lib.rdfWriter import RDFWriter
+from lib.util import load_json
+
+SIMULATIONS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng', 'simulations')
+
+class TestRDFWriter(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.folder, 'graph.nq')
+
+    def tearDown(self):
+        if os.path.exists(self.file_path):
+            os.remove(self.file_path)
+        os.rmdir(self.folder)
+
+    def test_same_graph_as_jsonld(self):
+        for jsonld_file_path in glob.glob(os.path.join(SIMULATIONS_FOLDER, '*', '__expected__', '*.jsonld')):
+            jsonld = load_json(jsonld_file_path)
+            RDFWriter(jsonld['@context']).write(jsonld['@graph'], self.file_path)
+            expected = rdflib.Graph().parse(jsonld_file_path, format='json-ld')
+            written = rdflib.Graph().parse(self.file_path, format='nt')
+            self.assertTrue(isomorphic(expected, written), jsonld_file_path)
+
+    def test_named_graph_and_values(self):
+        writer = RDFWriter({"@vocab": "http://example.org/#", "local": "https://local-domain.org/",
+                            "ref": {"@id": "http://example.org/ref", "@type": "@id"}})
+        writer.write([{"@id": "local:a", "@type": "run", "steps": 5000, "dt": 0.002, "ref": "local:b",
+                       "note": 'a "quoted"\nvalue', "part": {"size": "1"}}], self.file_path, "local:run%201")
+        with open(self.file_path) as file:
+            lines = file.read().splitlines()
+        self.assertIn('<https://local-domain.org/a> <http://example.org/#steps> '
+                      '"5000"^^<http://www.w3.org/2001/XMLSchema#integer> <https://local-domain.org/run%201> .', lines)
+        self.assertIn('<https://local-domain.org/a> <http://example.org/#dt> '
+                      '"2.0E-3"^^<http://www.w3.org/2001/XMLSchema#double> <https://local-domain.org/run%201> .', lines)
+        self.assertIn('<https://local-domain.org/a> <http://example.org/ref> <https://local-domain.org/b> '
+                      '<https://local-domain.org/run%201> .', lines)
+        self.assertIn('<https://local-domain.org/a> <http://example.org/#note> "a \\"quoted\\"\\nvalue" '
+                      '<https://local-domain.org/run%201> .', lines)
+        self.assertIn('_:b1 <http://example.org/#size> "1" <https://local-domain.org/run%201> .', lines)
+        self.assertEqual(len(rdflib.Dataset().parse(self.file_path, format='nquads')), 7)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng'))
+from lib.util import scan_folder
+
+class TestScanFolder(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        for path in ("a.csv", "b.txt", "run 1/c.csv", "run 1/deep/d.csv", "__output__/e.csv", ".hidden/f.csv"):
+            os.makedirs(os.path.dirname(os.path.join(self.folder, path)), exist_ok=True)
+            open(os.path.join(self.folder, path), "w").close()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def scan(self, **options):
+        return sorted(os.path.relpath(entry.path, self.folder) for entry in scan_folder(self.folder, **options))
+
+    def test_depth_and_patterns(self):
+        self.assertEqual(self.scan(include=["*.csv"]), ["a.csv"])
+        self.assertEqual(self.scan(include=["*.csv"], max_depth=None), ["a.csv", "run 1/c.csv", "run 1/deep/d.csv"])
+        self.assertEqual(self.scan(exclude=["deep"], max_depth=None), ["a.csv", "b.txt", "run 1/c.csv"])
+        self.assertEqual(self.scan(folders=True, max_depth=1), ["run 1", "run 1/deep"])
+
+    def test_symlink_loop(self):
+        os.symlink(self.folder, os.path.join(self.folder, "run 1", "loop"))
+        os.symlink(os.path.join(self.folder, "run 1", "deep"), os.path.join(self.folder, "linked"))
+        # Each folder is scanned once, through whichever path is found first
+        files = self.scan(include=["*.csv"], max_depth=None)
+        self.assertEqual(sorted(os.path.basename(path) for path in files), ["a.csv", "c.csv", "d.csv"])
+
+if __name__ == '__main__':
+    unittest.main()
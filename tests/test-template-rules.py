@@ -0,0 +1,70 @@
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng'))
+from lib.templateRules import TemplateRuleEngine
+
+class TestTemplateRules(unittest.TestCase):
+    def setUp(self):
+        self.engine = TemplateRuleEngine([
+            {"match": "ref_*", "class": "variable", "property": "has symbol"},
+            {"regex": r"\w+_units", "section": "variables", "class": "unit", "property": "has symbol",
+             "properties": {"description": "Unit of a variable"}},
+            {"match": "ref_p", "class": "numerical variable", "property": "has value"},
+            {"match": "*", "section": "global_attributes", "skip": True},
+        ])
+
+    def test_first_matching_rule_wins(self):
+        self.assertEqual(self.engine.match("ref_p", "variables")["class"], "variable")
+        self.assertEqual(self.engine.match("temp_units", "variables")["class"], "unit")
+        self.assertIsNone(self.engine.match("temp_units", "log_data"))
+
+    def test_rules_with_back_references(self):
+        engine = TemplateRuleEngine([
+            {"match": "ref_t", "class": "temperature", "property": "has value"},
+            {"regex": r"(x)y", "class": "xy", "property": "has symbol"},
+            {"regex": r"(\w)_\1", "class": "repeated", "property": "has symbol"},
+            {"regex": r"\w+", "class": "variable", "property": "has symbol"},
+        ])
+        self.assertEqual(engine.match("a_a")["class"], "repeated")
+        self.assertEqual(engine.match("xy")["class"], "xy")
+        self.assertEqual(engine.match("a_b")["class"], "variable")
+        self.assertEqual(engine.match("ref_t")["class"], "temperature")
+
+    def test_generate_template(self):
+        extract = {
+            "variables": {"ref_t": "300", "temp_units": "K", "nsteps": "5000"},
+            "global_attributes": {"var1.name": "ref_t"},
+        }
+        template, unmapped = self.engine.generate(extract, ["variables", "global_attributes"])
+        self.assertEqual(template, {
+            "ref_t: variable": {"has symbol": "#Value"},
+            "temp_units: unit": {"has symbol": "#Value", "description": "Unit of a variable"},
+        })
+        self.assertEqual(unmapped, ["nsteps"])
+
+    def test_generate_csv_template(self):
+        extract = {"csv_dict": {"headers": ["id", "ref_a", "name"], "rows": {}}}
+        template, unmapped = self.engine.generate(extract, ["csv_dict"])
+        self.assertEqual(template, {"ref_a: variable": {"has symbol": "#Value"}})
+        self.assertEqual(unmapped, ["name"])
+
+    def test_generate_structured_template(self):
+        engine = TemplateRuleEngine([
+            {"match": "air", "class": "variable", "property": "has unit", "value": "#attributes/units",
+             "keys": {"type": "has kind", "attributes/long_name": "description"}},
+            {"match": "*", "class": "variable", "property": "has symbol"},
+        ])
+        extract = {"variables": {"air": {"type": "float", "attributes": {"units": "degK"}},
+                                 "lat": {"type": "float", "attributes": {}}}}
+        template, unmapped = engine.generate(extract, ["variables"])
+        self.assertEqual(template, {"air: variable": {"has kind": "#type", "has unit": "#attributes/units"}})
+        self.assertEqual(unmapped, ["lat"])
+
+    def test_invalid_rule(self):
+        with self.assertRaises(ValueError):
+            TemplateRuleEngine([{"match": "*", "class": "variable"}])
+
+if __name__ == '__main__':
+    unittest.main()
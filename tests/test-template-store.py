@@ -0,0 +1,80 @@
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng'))
+from lib.templateStore import TemplateStore
+from lib.metadataGeneratorHelper import MetadataGeneratorHelper
+from lib.util import save_json
+
+EXAMPLE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'meta_extractIng', 'simulations', 'netcdf')
+
+TEMPLATE = {
+    "ref_t: variable": {"has symbol": "#Value"},
+    "ref_p: variable": {"has symbol": "#Value"},
+    "nsteps: variable": {"has value": "#Value"},
+    "run: processing step": {"has input": "@0", "has output": "@2"},
+}
+
+class TestTemplateStore(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.store = TemplateStore(self.folder)
+        self.extract = {"variables": {"ref_t": "300", "ref_p": "1", "nsteps": "5000"}}
+        self.entry_id = self.store.save("gromacs", self.extract, ["variables"], TEMPLATE)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_exact_match(self):
+        # A new store instance reads the entry back from the folder
+        match = TemplateStore(self.folder).lookup("gromacs", {"variables": {"nsteps": "1", "ref_p": "2", "ref_t": "3"}},
+                                                  ["variables"], 1.0)
+        self.assertEqual(match, (self.entry_id, TEMPLATE, True, []))
+
+    def test_partial_match(self):
+        extract = {"variables": {"ref_p": "1", "nsteps": "5000", "dt": "0.002"}}
+        entry_id, template, exact, unmapped = self.store.lookup("gromacs", extract, ["variables"], 0.5)
+        self.assertEqual((entry_id, exact, unmapped), (self.entry_id, False, ["variables/dt"]))
+        # The node of 'ref_t' is dropped and the references are renumbered
+        self.assertEqual(template, {
+            "ref_p: variable": {"has symbol": "#Value"},
+            "nsteps: variable": {"has value": "#Value"},
+            "run: processing step": {"has output": "@1"},
+        })
+
+        # The adapted template is stored as overrides of the matched entry
+        adapted_id = self.store.save("gromacs", extract, ["variables"], template, base=entry_id)
+        stored = self.store.load_entry(adapted_id)
+        self.assertEqual(stored["base"], entry_id)
+        self.assertEqual(stored["overrides"]["ref_t: variable"], None)
+        self.assertEqual(TemplateStore(self.folder).compile(adapted_id), template)
+
+    def test_no_match(self):
+        extract = {"variables": {"ref_p": "1", "dt": "0.002", "nstlist": "10"}}
+        self.assertIsNone(self.store.lookup("gromacs", extract, ["variables"], 0.5))
+        self.assertIsNone(self.store.lookup("netcdf", self.extract, ["variables"], 0.0))
+
+    def test_filled_metadata_leaves_store_unchanged(self):
+        output_folder = os.path.join(self.folder, '__output__')
+        os.mkdir(output_folder)
+        for file_name in ('context.json', 'classes.json'):
+            shutil.copy(os.path.join(EXAMPLE_FOLDER, '__expected__', file_name), output_folder)
+        extract_file_path = os.path.join(output_folder, 'extract_run.json')
+        save_json(self.extract, extract_file_path)
+
+        # The store is kept open between runs, as in watch mode or in the extraction service
+        for _ in range(2):
+            helper = MetadataGeneratorHelper(extract_file_path, ["variables"], "gromacs", False, self.extract)
+            helper.template_store = self.store
+            self.assertTrue(helper.create_metadata_from_store())
+            helper.create_metadata_with_template()
+            self.assertEqual(helper.metadata["nsteps: variable"], {"has value": "5000"})
+            self.assertEqual(helper.template, TEMPLATE)
+            os.remove(helper.template_file_path)
+        self.assertEqual(self.store.lookup("gromacs", self.extract, ["variables"], 1.0)[1], TEMPLATE)
+
+if __name__ == '__main__':
+    unittest.main()